@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+
+# *******************************************
+# Parsing benchmarks for etscrape.
+# Run as:
+#   python3 benchmark.py [logfile]
+# If no log file is given then a synthetic log is generated.
+# *******************************************
+
+import copy
+import logging
+import mmap
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import logreader
+import patterns
+import tripinfo
+import tripquery
+import tripstore
+import dataexport
+
+# *******************************************
+# Configuration used by the benchmarks.
+# Only the trip data limits are used while parsing.
+# *******************************************
+class BenchConfig():
+    TripData = {"RssiErrorLimit" : 5, "GnssErrorLimit" : 20}
+    LogParsing = {"MemoryMapLogs" : 0, "ParallelWorkers" : 0, "ParallelMinFileSize" : 0}
+    filterEvents = ["CHECKLIST", "DEBUG", "Time1H", "Time1H INV", "IMPACT", "INPUT", "OVERSPEED", "POWER", "XSIDLE", "ZONECHANGE"]
+
+# Logger for benchmarks; debug messages not wanted when timing.
+logger = logging.getLogger("benchmark")
+logger.setLevel(logging.INFO)
+
+# Event types and specifics used to generate synthetic logs.
+syntheticEvents = [
+    ("OVERSPEED", "{0:d} 12 v:125"),
+    ("ZONEOVERSPEED", "{0:d} 5 80 2 v:125"),
+    ("ENGINEOVERSPEED", "{0:d} 5 5300 v:120"),
+    ("LOWCOOLANT", "{0:d} 7 v:124"),
+    ("UNBUCKLED", "{0:d} 3 D v:125"),
+    ("ZONECHANGE", "{0:d} 1 2 3 v:125"),
+    ("IMPACT", "{0:d} 10 2 3 4 15 90 W v:125"),
+    ("CHECKLIST", "{0:d} OK 0 35 2 Forklift v:126"),
+    ("XSIDLE", "{0:d} 300 1 v:125"),
+    ("REPORT", "{0:d} 25 180 v:125"),
+    ("INPUT", "3 1 20 v:125"),
+    ("DEBUG", "Some debug text v:125"),
+    ("POWER", "125 OK {0:d} v:125"),
+    ("OOS PM", "{0:d} 2 v:125"),
+    ("CUSTOMEVENT", "1 2 3"),
+]
+
+# Trip queries used by the query benchmark.
+benchQueries = [
+    "IMPACT[severity = W] within 60 s of OVERSPEED",
+    "*[rssi < 10 and speed > 20]",
+    "UNBUCKLED and not XSIDLE",
+    "\"OOS PM\" or CHECKLIST[result = OK]",
+    "Time1H",
+]
+
+# *******************************************
+# Format an event line.
+# *******************************************
+def eventLine(r, signonId, eTime, eType, specifics):
+    stamp = time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(eTime))
+    return "{0:s} 12,abc,EVENT {1:d} {2:d} -318{3:05d}00/1158{4:05d}00/{5:d}/{6:d}/{7:d} {8:s} {9:s}".format(
+        stamp, signonId, eTime, r.randint(0, 99999), r.randint(0, 99999), r.choice([800, 1500, 30000]),
+        r.choice([0, 3, 12, 25]), r.randint(0, 40), eType, specifics)
+
+# *******************************************
+# Generate synthetic log with the given number of trips.
+# *******************************************
+def makeSyntheticLog(numTrips, eventsPerTrip, seed=1):
+    r = random.Random(seed)
+    lines = ["21/05/2020 10:00:00 UNIT 1234", "21/05/2020 10:00:00 12,abc,EVENT 1 1590000000 0/0/0/0/0 SWSTART ET 4.2.7 v:125"]
+    eTime = 1590000000
+    for sid in range(1, numTrips + 1):
+        tripStart = eTime
+        lines.append(eventLine(r, sid, eTime, "SIGNON", "1234 00AbCd OK 26 0 1 v:125"))
+        for _ in range(eventsPerTrip):
+            eTime += r.choice([0, 1, 2, 5])
+            eType, specifics = r.choice(syntheticEvents)
+            lines.append(eventLine(r, sid, eTime, eType, specifics.format(sid)))
+            lines.append("{0:s} 12,abc,GPS fix ok".format(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(eTime))))
+        eTime += 1
+        tripTime = eTime - tripStart
+        lines.append(eventLine(r, sid, eTime, "TRIP", "{0:d} {1:d} 0 0 0 100 v:125".format(sid, tripTime)))
+        eTime += 60
+    return "\n".join(lines) + "\n"
+
+# *******************************************
+# Time a function, returning best time of a number of runs.
+# *******************************************
+def bestTime(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best
+
+# *******************************************
+# Benchmark event header tokenizing.
+# Compares the single pass tokenizer with the previous whole buffer regex,
+# and tokenizing the log file bytes (as the log reader does) with decoding the log and tokenizing text.
+# *******************************************
+def benchTokenizer(logData):
+    patternData = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) ([ _a-zA-Z]+) (.+)$', re.MULTILINE)
+
+    def regexHeaders():
+        return sum(1 for _ in re.finditer(patternData, logData))
+
+    def tokenizedHeaders():
+        return sum(1 for line in logData.split("\n") if tripinfo.tokenizeEvent(line) is not None)
+
+    if regexHeaders() != tokenizedHeaders():
+        print("WARNING : tokenizer and regex event counts differ.")
+
+    tRegex = bestTime(regexHeaders)
+    tToken = bestTime(tokenizedHeaders)
+    mb = len(logData) / 1e6
+    print("Header regex     : {0:8.3f} s  {1:8.1f} MB/s".format(tRegex, mb / tRegex))
+    print("Header tokenizer : {0:8.3f} s  {1:8.1f} MB/s  ({2:.1f}x)".format(tToken, mb / tToken, tRegex / tToken))
+
+    logBytes = logData.encode("cp1252", errors="surrogateescape")
+
+    def decodedHeaders():
+        text = logBytes.decode("cp1252", errors="surrogateescape")
+        return sum(1 for line in tripinfo.bufferLines(text) if tripinfo.tokenizeEvent(line) is not None)
+
+    def bytesHeaders():
+        return sum(1 for line in tripinfo.bufferLines(logBytes) if tripinfo.tokenizeEvent(line) is not None)
+
+    if decodedHeaders() != bytesHeaders():
+        print("WARNING : bytes and text tokenizer event counts differ.")
+
+    tDecoded = bestTime(decodedHeaders)
+    tBytes = bestTime(bytesHeaders)
+    print("Decode, tokenize : {0:8.3f} s  {1:8.1f} MB/s".format(tDecoded, mb / tDecoded))
+    print("Bytes tokenizer  : {0:8.3f} s  {1:8.1f} MB/s  ({2:.1f}x)".format(tBytes, mb / tBytes, tDecoded / tBytes))
+
+# *******************************************
+# Benchmark trip extraction.
+# *******************************************
+def benchExtract(logData):
+    # Split log at SIGNON events as done by the application.
+    edges = [m.start() for m in patterns.tripStartPattern.finditer(logData)]
+    edges.append(len(logData))
+    buffers = [logData[edges[i]:edges[i + 1]] for i in range(len(edges) - 1)]
+
+    def extract():
+        for buf in buffers:
+            trip = tripinfo.Trip(BenchConfig, logger, buf)
+            trip.extractTripData()
+
+    tExtract = bestTime(extract)
+    mb = len(logData) / 1e6
+    print("Trip extraction  : {0:8.3f} s  {1:8.1f} MB/s  ({2:d} trips)".format(tExtract, mb / tExtract, len(buffers)))
+
+# *******************************************
+# Trip using a linear scan of the speed log to check for speed times, as trips used to.
+# *******************************************
+class LinearSpeedTimeTrip(tripinfo.Trip):
+    def checkForSpeedTime(self, spdTime):
+        timeFound = False
+        for sdTime in self.speedLog.column("time"):
+            if sdTime == spdTime:
+                timeFound = True
+        return timeFound
+
+# *******************************************
+# Benchmark speed time duplicate checking on long trips.
+# Every event logs speed, so this is dominated by the speed time checks.
+# *******************************************
+def benchSpeedTime():
+    for eventsPerTrip in [1000, 10000, 20000]:
+        tripData = makeSyntheticLog(1, eventsPerTrip)
+        tripData = tripData[patterns.tripStartPattern.search(tripData).start():]
+
+        def extract(tripClass):
+            trip = tripClass(BenchConfig, logger, tripData)
+            trip.extractTripData()
+            return len(trip.speedLog)
+
+        if extract(tripinfo.Trip) != extract(LinearSpeedTimeTrip):
+            print("WARNING : speed logs differ.")
+
+        tLinear = bestTime(lambda: extract(LinearSpeedTimeTrip), 1)
+        tSet = bestTime(lambda: extract(tripinfo.Trip), 1)
+        print("Speed time check : {0:6d} events  linear {1:8.3f} s  set {2:8.3f} s  ({3:.1f}x)".format(eventsPerTrip, tLinear, tSet, tLinear / tSet))
+
+# *******************************************
+# Event with all variables in its instance dictionary, as events used to be.
+# Used to compare event memory use.
+# *******************************************
+class DictEvent():
+    def __init__(self, ev):
+        for name in eventVariables():
+            setattr(self, name, getattr(ev, name))
+
+# *******************************************
+# Names of all event variables, common and event specific.
+# *******************************************
+def eventVariables():
+    common = [name for name in tripinfo.Event.__slots__ if name != "__dict__"]
+    specific = [name for name, value in vars(tripinfo.Event).items() if (not name.startswith("_")) and isinstance(value, (int, float, str))]
+    return common + specific
+
+# *******************************************
+# Memory allocated by function, in bytes.
+# *******************************************
+def allocated(func):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+# *******************************************
+# Benchmark event memory use.
+# Compares events with all variables in an instance dictionary to slotted events.
+# Event values are shared by both, so only the events themselves are measured.
+# *******************************************
+def benchEventMemory(logData):
+    edges = [m.start() for m in patterns.tripStartPattern.finditer(logData)]
+    edges.append(len(logData))
+    events = []
+    for i in range(len(edges) - 1):
+        trip = tripinfo.Trip(BenchConfig, logger, logData[edges[i]:edges[i + 1]])
+        trip.extractTripData()
+        events += trip.events
+
+    dictBytes = allocated(lambda: [DictEvent(ev) for ev in events])
+    slotBytes = allocated(lambda: [copy.copy(ev) for ev in events])
+    print("Event dictionary : {0:8.1f} bytes/event".format(dictBytes / len(events)))
+    print("Event slots      : {0:8.1f} bytes/event  ({1:.1f}x smaller, {2:d} events)".format(slotBytes / len(events), dictBytes / slotBytes, len(events)))
+
+# *******************************************
+# Benchmark time series memory use.
+# Compares lists of info objects, as series used to be, to series columns.
+# *******************************************
+def benchSeriesMemory(logData):
+    edges = [m.start() for m in patterns.tripStartPattern.finditer(logData)]
+    edges.append(len(logData))
+    series = []
+    for i in range(len(edges) - 1):
+        trip = tripinfo.Trip(BenchConfig, logger, logData[edges[i]:edges[i + 1]])
+        trip.extractTripData()
+        series += [trip.speedLog, trip.gnssLog, trip.rssiLog, trip.batteryLevel, trip.zoneXings]
+    points = sum(len(s) for s in series)
+
+    listBytes = allocated(lambda: [list(s) for s in series])
+    columnBytes = allocated(lambda: [copy.deepcopy(s) for s in series])
+    print("Series objects   : {0:8.1f} bytes/point".format(listBytes / points))
+    print("Series columns   : {0:8.1f} bytes/point  ({1:.1f}x smaller, {2:d} points)".format(columnBytes / points, listBytes / columnBytes, points))
+
+# *******************************************
+# Split log into trips, extracting their data, and index their event types.
+# *******************************************
+def indexedTrips(logData):
+    edges = [m.start() for m in patterns.tripStartPattern.finditer(logData)]
+    edges.append(len(logData))
+    trips = []
+    for i in range(len(edges) - 1):
+        trip = tripinfo.Trip(BenchConfig, logger, logData[edges[i]:edges[i + 1]])
+        trip.extractTripData()
+        trips.append(trip)
+    index = tripinfo.EventIndex()
+    index.replaceTrips(0, trips)
+    return trips, index
+
+# *******************************************
+# Benchmark event filtering of many short trips.
+# Compares looking through the events of every trip with looking up the event index.
+# *******************************************
+def benchEventFilter():
+    trips, index = indexedTrips(makeSyntheticLog(10000, 20))
+
+    def scanTrips():
+        found = []
+        for filterEvent in BenchConfig.filterEvents:
+            found.append({row for row, t in enumerate(trips) if any((filterEvent in ev.event) or (ev.isDebug and (filterEvent in ev.debugInfo)) for ev in t.events)})
+        return found
+
+    def lookupTrips():
+        return [index.findTrips(filterEvent) for filterEvent in BenchConfig.filterEvents]
+
+    if scanTrips() != lookupTrips():
+        print("WARNING : filtered trips differ.")
+
+    numFilters = len(BenchConfig.filterEvents)
+    tScan = bestTime(scanTrips) / numFilters
+    tLookup = bestTime(lookupTrips) / numFilters
+    print("Event filter     : {0:6d} trips  scan {1:8.4f} s  index {2:8.4f} s  ({3:.0f}x)".format(len(trips), tScan, tLookup, tScan / tLookup))
+
+# *******************************************
+# Trip queries, scanning every trip against looking up candidate trips in the event index first.
+# *******************************************
+def benchQuery():
+    trips, index = indexedTrips(makeSyntheticLog(10000, 20))
+    queries = [tripquery.TripQuery(BenchConfig, text) for text in benchQueries]
+
+    def scanTrips():
+        return [[row for row, t in enumerate(trips) if query.root.match(t, row, None)] for query in queries]
+
+    def lookupTrips():
+        return [query.findTrips(trips, index) for query in queries]
+
+    if scanTrips() != lookupTrips():
+        print("WARNING : queried trips differ.")
+
+    tScan = bestTime(scanTrips) / len(queries)
+    tLookup = bestTime(lookupTrips) / len(queries)
+    print("Trip query       : {0:6d} trips  scan {1:8.4f} s  index {2:8.4f} s  ({3:.0f}x)".format(len(trips), tScan, tLookup, tScan / tLookup))
+
+# *******************************************
+# Trip store; adding a log, adding it again (skipped), and finding events of a type in a time range.
+# *******************************************
+def benchStore():
+    trips, index = indexedTrips(makeSyntheticLog(2000, 100))
+    logData = {"controllerID" : 1234, "firmwareVersion" : "4.2.7", "tripLog" : trips, "zoneXLog" : []}
+    query = tripquery.TripQuery(BenchConfig, "IMPACT[severity = W]")
+    startTime = trips[len(trips) // 4].tripStart
+    endTime = trips[len(trips) // 2].tripStart
+
+    with tempfile.TemporaryDirectory() as storeDir:
+        store = tripstore.TripStore(BenchConfig, logger, os.path.join(storeDir, "bench.db"))
+        t0 = time.perf_counter()
+        store.addLog("bench.log", logData, contentHash="bench")
+        tAdd = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store.addLog("bench.log", logData, contentHash="bench")
+        tAgain = time.perf_counter() - t0
+        tFind = bestTime(lambda: store.findEvents(query, startTime, endTime))
+        numFound = len(store.findEvents(query, startTime, endTime))
+        store.close()
+
+    numEvents = sum(len(t.events) for t in trips)
+    print("Trip store       : {0:6d} events  add {1:8.4f} s  again {2:8.4f} s  find {3:8.4f} s  ({4:d} found)".format(numEvents, tAdd, tAgain, tFind, numFound))
+
+# *******************************************
+# Data export of synthetic log; csv, and Parquet if pyarrow is installed.
+# *******************************************
+def benchDataExport():
+    trips, index = indexedTrips(makeSyntheticLog(2000, 100))
+    logData = {"controllerID" : 1234, "firmwareVersion" : "4.2.7", "tripLog" : trips, "zoneXLog" : []}
+    formats = ["csv", "parquet"] if dataexport.parquetAvailable() else ["csv"]
+
+    with tempfile.TemporaryDirectory() as exportDir:
+        for fmt in formats:
+            t0 = time.perf_counter()
+            written = dataexport.exportData(BenchConfig, logger, os.path.join(exportDir, "bench"), logData, fmt)
+            tExport = time.perf_counter() - t0
+            size = sum(os.path.getsize(f) for f in written)
+            print("Data export      : {0:>7s}  {1:8.4f} s  {2:8.1f} MB".format(fmt, tExport, size / 1e6))
+
+# *******************************************
+# Log prescan; single pass over the mapped log file, compared with a regex search of the whole log per pattern
+# (controller ID, firmware version, trip starts, and power cycle starts if no trips) as the log used to be scanned.
+# *******************************************
+def benchPrescan(fileName):
+    with open(fileName, 'r', encoding='cp1252', errors='surrogateescape') as lf:
+        logData = lf.read()
+
+    def regexScans():
+        patterns.cntrlIdPattern.search(logData)
+        patterns.cntrlFirmwarePattern.search(logData)
+        starts = [m.start() for m in patterns.tripStartPattern.finditer(logData)]
+        if len(starts) == 0:
+            starts = [m.start() for m in patterns.powerCycleStartPattern.finditer(logData)]
+        return len(starts)
+
+    def prescan():
+        with open(fileName, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                scan = logreader.LogPrescan()
+                scan.scanMapped(mm)
+                return len(scan.logStarts())
+
+    if regexScans() != prescan():
+        print("WARNING : prescan and regex trip counts differ.")
+
+    tRegex = bestTime(regexScans, 1)
+    tPrescan = bestTime(prescan)
+    print("Log prescan      : regex {0:8.3f} s  prescan {1:8.3f} s  ({2:.0f}x)".format(tRegex, tPrescan, tRegex / tPrescan))
+
+# *******************************************
+# Benchmark matching of malformed (pathological) log lines.
+# Lines are made longer and longer; time per byte should stay about the same,
+# if it grows the line patterns or header tokenizing backtrack.
+# *******************************************
+def benchPathological():
+    stamp = "01/01/2020 10:00:00 "
+    lineMakers = (
+        ("slashes", lambda n: stamp + "x,EVENT 1 2 " + "1/" * n),
+        ("events", lambda n: stamp + "EVENT " * n),
+        ("stamps", lambda n: "SIGNON IGN_ON SWSTART " + (stamp + "EVENT 1 ") * n),
+        ("type run", lambda n: stamp + "EVENT 1 2 0/0/0/0/0 " + "A" * n + ":x" * n),
+        ("spaces", lambda n: stamp + "EVENT 1 2 0/0/0/0/0 IMPACT" + " " * n + "x"))
+    matchers = (
+        ("tokenize", tripinfo.tokenizeEvent),
+        ("trip start", patterns.tripStartPattern.search),
+        ("firmware", patterns.cntrlFirmwarePattern.search),
+        ("controller", patterns.cntrlIdPattern.search))
+
+    print("Pathological lines (ns/byte at 100, 1000, 10000 repeats) :")
+    for lineName, makeLine in lineMakers:
+        for matchName, match in matchers:
+            perByte = []
+            for n in (100, 1000, 10000):
+                line = makeLine(n)
+                perByte.append(bestTime(lambda: match(line)) / len(line) * 1e9)
+            print("  {0:8s} {1:10s} {2:9.1f} {3:9.1f} {4:9.1f}".format(lineName, matchName, *perByte))
+            if perByte[-1] > 4 * max(perByte[0], 50):
+                print("WARNING : {0:s} time per byte grows with line length.".format(matchName))
+
+# *******************************************
+# Benchmark reading log file; streamed, memory mapped, and in parallel.
+# *******************************************
+def benchReader(fileName):
+    workers = os.cpu_count()
+    for mmapLogs, numWorkers, title in [(0, 0, "Streamed"), (1, 0, "Memory mapped"), (0, workers, "Streamed parallel"), (1, workers, "Mapped parallel")]:
+        BenchConfig.LogParsing["MemoryMapLogs"] = mmapLogs
+        BenchConfig.LogParsing["ParallelWorkers"] = numWorkers
+
+        # Time to first trip is how soon a trip can be shown when trips are shown as they are read.
+        firstTrip = []
+        def read():
+            start = time.perf_counter()
+
+            def progress(numLogs, position):
+                if numLogs == 1:
+                    firstTrip.append(time.perf_counter() - start)
+
+            reader = logreader.LogReader(BenchConfig, logger, fileName)
+            reader.progress = progress
+            reader.readLog()
+
+        tRead = bestTime(read, 1)
+        print("Read {0:18s}: {1:8.3f} s  first trip {2:6.3f} s  ({3:d} workers)".format(title, tRead, firstTrip[0], numWorkers))
+
+    BenchConfig.LogParsing["MemoryMapLogs"] = 0
+    BenchConfig.LogParsing["ParallelWorkers"] = 0
+
+# *******************************************
+# Run benchmarks.
+# *******************************************
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='cp1252', errors='surrogateescape') as lf:
+            logData = lf.read()
+        print("Log file : {0:s}".format(sys.argv[1]))
+    else:
+        logData = makeSyntheticLog(200, 500)
+        print("Synthetic log")
+    print("Size     : {0:.1f} MB".format(len(logData) / 1e6))
+
+    benchTokenizer(logData)
+    benchExtract(logData)
+    benchEventMemory(logData)
+    benchSeriesMemory(logData)
+    benchSpeedTime()
+    benchEventFilter()
+    benchQuery()
+    benchStore()
+    benchDataExport()
+    benchPathological()
+
+    # Reader benchmarks need a log file.
+    if len(sys.argv) > 1:
+        benchPrescan(sys.argv[1])
+        benchReader(sys.argv[1])
+    else:
+        fd, fileName = tempfile.mkstemp(suffix=".log")
+        try:
+            with os.fdopen(fd, 'w', encoding='cp1252', errors='surrogateescape') as lf:
+                lf.write(logData)
+            benchPrescan(fileName)
+            benchReader(fileName)
+        finally:
+            os.remove(fileName)
+
+    # Pattern statistics from the benchmark runs.
+    print("Pattern statistics :")
+    for name, hits, misses in patterns.patternStats():
+        if (hits + misses) > 0:
+            print("  {0:20s} hits {1:10d}  misses {2:10d}".format(name, hits, misses))
+
+if __name__ == "__main__":
+    main()
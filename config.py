@@ -10,7 +10,7 @@ class Config():
     def __init__(self):
 
         # Version of configuration.
-        self.ConfigVersion = 14
+        self.ConfigVersion = 15
 
         # Logger configuration values
         self.DebugLevel = 20
@@ -75,6 +75,21 @@ class Config():
             "RssiErrorLimit" : 5
         }
 
+        # Log file parsing.
+        self.LogParsing = {
+            "MemoryMapLogs" : 0,
+            "ParallelWorkers" : 0,
+            "ParallelMinFileSize" : 20000000,
+            "CacheLogs" : 1,
+            "CacheDir" : "logcache",
+            "CacheMaxSize" : 500000000,
+            "FollowIntervalMsec" : 5000,
+            "DisplayBatchMsec" : 250,
+            "FleetWorkers" : 0,
+            "StoreLogs" : 0,
+            "StoreFile" : "etscrape.db"
+        }
+
         # Speed plot data.
         # Zone speeds are open speed followed by 4 speed zones.
         self.SpdPlot = {
@@ -290,6 +305,86 @@ class Config():
                     self.TripData["RssiErrorLimit"] = paramSaved
                     updateConfig = True
                 # *********************************************************
+                # Checking elements of LogParsing.
+                # *********************************************************
+                # Try setting MemoryMapLogs from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["MemoryMapLogs"]
+                    self.LogParsing["MemoryMapLogs"] = config["LogParsing"]["MemoryMapLogs"]
+                except Exception:
+                    self.LogParsing["MemoryMapLogs"] = paramSaved
+                    updateConfig = True
+                # Try setting ParallelWorkers from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["ParallelWorkers"]
+                    self.LogParsing["ParallelWorkers"] = config["LogParsing"]["ParallelWorkers"]
+                except Exception:
+                    self.LogParsing["ParallelWorkers"] = paramSaved
+                    updateConfig = True
+                # Try setting ParallelMinFileSize from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["ParallelMinFileSize"]
+                    self.LogParsing["ParallelMinFileSize"] = config["LogParsing"]["ParallelMinFileSize"]
+                except Exception:
+                    self.LogParsing["ParallelMinFileSize"] = paramSaved
+                    updateConfig = True
+                # Try setting CacheLogs from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["CacheLogs"]
+                    self.LogParsing["CacheLogs"] = config["LogParsing"]["CacheLogs"]
+                except Exception:
+                    self.LogParsing["CacheLogs"] = paramSaved
+                    updateConfig = True
+                # Try setting CacheDir from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["CacheDir"]
+                    self.LogParsing["CacheDir"] = config["LogParsing"]["CacheDir"]
+                except Exception:
+                    self.LogParsing["CacheDir"] = paramSaved
+                    updateConfig = True
+                # Try setting CacheMaxSize from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["CacheMaxSize"]
+                    self.LogParsing["CacheMaxSize"] = config["LogParsing"]["CacheMaxSize"]
+                except Exception:
+                    self.LogParsing["CacheMaxSize"] = paramSaved
+                    updateConfig = True
+                # Try setting FollowIntervalMsec from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["FollowIntervalMsec"]
+                    self.LogParsing["FollowIntervalMsec"] = config["LogParsing"]["FollowIntervalMsec"]
+                except Exception:
+                    self.LogParsing["FollowIntervalMsec"] = paramSaved
+                    updateConfig = True
+                # Try setting DisplayBatchMsec from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["DisplayBatchMsec"]
+                    self.LogParsing["DisplayBatchMsec"] = config["LogParsing"]["DisplayBatchMsec"]
+                except Exception:
+                    self.LogParsing["DisplayBatchMsec"] = paramSaved
+                    updateConfig = True
+                # Try setting FleetWorkers from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["FleetWorkers"]
+                    self.LogParsing["FleetWorkers"] = config["LogParsing"]["FleetWorkers"]
+                except Exception:
+                    self.LogParsing["FleetWorkers"] = paramSaved
+                    updateConfig = True
+                # Try setting StoreLogs from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["StoreLogs"]
+                    self.LogParsing["StoreLogs"] = config["LogParsing"]["StoreLogs"]
+                except Exception:
+                    self.LogParsing["StoreLogs"] = paramSaved
+                    updateConfig = True
+                # Try setting StoreFile from user configuration (json).
+                try:
+                    paramSaved = self.LogParsing["StoreFile"]
+                    self.LogParsing["StoreFile"] = config["LogParsing"]["StoreFile"]
+                except Exception:
+                    self.LogParsing["StoreFile"] = paramSaved
+                    updateConfig = True
+                # *********************************************************
                 # Checking elements of SpdPlot from user configuration (json).
                 # *********************************************************
                 # Try setting zone speed limits (including open) from user configuration (json).
@@ -451,6 +546,7 @@ class Config():
             "LogBackups" : self.LogBackups,
             "TimeUTC" : self.TimeUTC,
             "TripData" : self.TripData,
+            "LogParsing" : self.LogParsing,
             "SpdPlot" : self.SpdPlot,
             "EvPlot" : self.EvPlot,
             "Channels" : self.Channels,
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+import csv
+from array import array
+
+from tripinfo import *
+from tripquery import *
+
+# Parquet export needs pyarrow; without it data is exported as csv.
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# *******************************************
+# Data export.
+# Writes the parsed data of a log as tables, for loading into analysis tools without parsing the log again:
+#
+#   <name>.events  : event per row, with a typed column per event variable.
+#   <name>.gnss, <name>.speed, <name>.rssi, <name>.battery, <name>.zone : time series points per row.
+#
+# Every table has the controller, firmware version, trip / power cycle (row in log) and sign-on ID columns,
+# so tables of many logs can be combined, and mixed firmware logs compared.
+# Tables are written as Parquet files if pyarrow is installed, otherwise as csv files.
+# *******************************************
+
+# Types of common event variables; event specific variables have the type of their default value.
+eventCommonTypes = {"event" : str, "serverTime" : int, "alertText" : str, "isOther" : bool, "isInput" : bool, "isDebug" : bool,
+                    "isReport" : bool, "isOutOfTrip" : bool, "tripStartId" : int, "battery" : float, "rssi" : int,
+                    "lat" : float, "long" : float, "posErr" : float}
+
+# Time series exported, by table name; trip attribute and series class.
+dataSeries = (("gnss", "gnssLog", GnssSeries), ("speed", "speedLog", SpeedSeries), ("rssi", "rssiLog", RssiSeries),
+              ("battery", "batteryLevel", BatterySeries), ("zone", "zoneXings", ZoneSeries))
+
+# *******************************************
+# Check if Parquet export is available.
+# *******************************************
+def parquetAvailable():
+    return pyarrow is not None
+
+# *******************************************
+# Names and types of event columns.
+# Display only variables (event in alert) are not exported.
+# *******************************************
+def eventColumnTypes():
+    types = []
+    for name in eventVariables():
+        if name == "eventInAlert":
+            continue
+        if name in eventCommonTypes:
+            types.append((name, eventCommonTypes[name]))
+        else:
+            types.append((name, type(getattr(Event, name))))
+    return types
+
+# *******************************************
+# Controller ID and firmware version at the start of trip / power cycle; those of the log if not known.
+# *******************************************
+def tripDetails(t, controllerID, firmwareVersion):
+    return (t.controllerID if t.controllerID is not None else controllerID,
+            t.firmwareVersion if t.firmwareVersion is not None else firmwareVersion)
+
+# *******************************************
+# Build events table of trips / power cycles.
+# Returns list of (name, type, values) columns.
+# *******************************************
+def eventsTable(logs, controllerID, firmwareVersion):
+    events = [ev for t in logs for ev in t.events]
+    rows = [row for row, t in enumerate(logs) for ev in t.events]
+    details = [tripDetails(t, controllerID, firmwareVersion) for t in logs for ev in t.events]
+    columns = [("controllerID", int, [cid for cid, fw in details]), ("firmwareVersion", str, [fw for cid, fw in details]), ("trip", int, rows)]
+    for name, colType in eventColumnTypes():
+        columns.append((name, colType, [getattr(ev, name) for ev in events]))
+    return columns
+
+# *******************************************
+# Build time series table of trips / power cycles.
+# Series columns are joined as typed arrays, so they are not turned into Python objects.
+# Returns list of (name, type code, values) columns.
+# *******************************************
+def seriesTable(logs, controllerID, firmwareVersion, attr, seriesClass):
+    seriesList = [(row, t, getattr(t, attr)) for row, t in enumerate(logs) if len(getattr(t, attr, ())) > 0]
+    controllerIDs = array("q")
+    firmwareVersions = []
+    rows = array("q")
+    signonIds = array("q")
+    for row, t, series in seriesList:
+        cid, fw = tripDetails(t, controllerID, firmwareVersion)
+        controllerIDs.extend(array("q", [cid]) * len(series))
+        firmwareVersions.extend([fw] * len(series))
+        rows.extend(array("q", [row]) * len(series))
+        signonIds.extend(array("q", [t.tripStartId]) * len(series))
+    columns = [("controllerID", "q", controllerIDs), ("firmwareVersion", str, firmwareVersions), ("trip", "q", rows), ("tripStartId", "q", signonIds)]
+
+    for idx, (name, typeCode) in enumerate(seriesClass.columnTypes):
+        values = array(typeCode)
+        for row, t, series in seriesList:
+            col = series.columns[idx]
+            # Series with values out of range have plain list columns, so the table column has to be too.
+            if isinstance(values, array) and (not isinstance(col, array)):
+                values = list(values)
+            values.extend(col)
+        columns.append((name, typeCode, values))
+    return columns
+
+# *******************************************
+# Arrow array of column values.
+# Typed arrays are wrapped without copying; lists are converted, as text if the values don't fit the type.
+# *******************************************
+def arrowArray(values, colType):
+    arrowTypes = {"q" : pyarrow.int64(), "i" : pyarrow.int32(), "d" : pyarrow.float64(),
+                  int : pyarrow.int64(), float : pyarrow.float64(), str : pyarrow.string(), bool : pyarrow.bool_()}
+    if isinstance(values, array) and (values.itemsize == arrowTypes[colType].bit_width // 8):
+        return pyarrow.Array.from_buffers(arrowTypes[colType], len(values), [None, pyarrow.py_buffer(values)])
+    try:
+        return pyarrow.array(values, type=arrowTypes[colType])
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, OverflowError):
+        return pyarrow.array([str(v) for v in values], type=pyarrow.string())
+
+# *******************************************
+# Write table to file, as Parquet or csv.
+# Returns name of file written.
+# *******************************************
+def writeTable(fileName, columns, usePq):
+    if usePq:
+        fileName += ".parquet"
+        table = pyarrow.table({name : arrowArray(values, colType) for name, colType, values in columns})
+        pyarrow.parquet.write_table(table, fileName)
+    else:
+        fileName += ".csv"
+        with open(fileName, "w", newline="") as xf:
+            out = csv.writer(xf)
+            out.writerow([name for name, colType, values in columns])
+            out.writerows(zip(*[values for name, colType, values in columns]))
+    return fileName
+
+# *******************************************
+# Export data of log; events and time series tables.
+# File name is the base name for the tables; e.g. "site/1234" writes "site/1234.events.parquet", etc.
+# Format is "parquet" or "csv"; Parquet if available if not given.
+# Returns list of files written.
+# *******************************************
+def exportData(config, logger, fileName, logData, fmt=None):
+    if fmt is None:
+        fmt = "parquet" if parquetAvailable() else "csv"
+    if (fmt == "parquet") and (not parquetAvailable()):
+        raise ValueError("Parquet export needs pyarrow to be installed.")
+    usePq = (fmt == "parquet")
+
+    # No trips but maybe this is a Zoner, as in the application.
+    if (len(logData["tripLog"]) == 0) and (len(logData["zoneXLog"]) > 0):
+        logs = logData["zoneXLog"]
+    else:
+        logs = logData["tripLog"]
+    controllerID = logData["controllerID"] if logData["controllerID"] is not None else 0
+    firmwareVersion = logData["firmwareVersion"]
+
+    written = [writeTable(fileName + ".events", eventsTable(logs, controllerID, firmwareVersion), usePq)]
+    for name, attr, seriesClass in dataSeries:
+        written.append(writeTable(fileName + "." + name, seriesTable(logs, controllerID, firmwareVersion, attr, seriesClass), usePq))
+
+    logger.info("Exported log data ({0:s}) : {1:s}".format(fmt, fileName))
+    return written
@@ -1,22 +1,34 @@
 #!/usr/bin/env python3
 
-from PyQt5.QtWidgets import QMainWindow, QDialog, QFileDialog, QColorDialog, QLabel, QPushButton, QMessageBox, QTreeWidget, QTreeWidgetItem, QHeaderView, qApp, QApplication
+from PyQt5.QtWidgets import QMainWindow, QDialog, QFileDialog, QColorDialog, QLabel, QPushButton, QProgressBar, QMessageBox, QTreeView, QTreeWidgetItem, QHeaderView, qApp, QApplication
 from PyQt5 import uic
 from PyQt5 import QtCore, QtGui
 import logging
 import logging.handlers
 import json
-import re
+import multiprocessing
 import time
 from datetime import timedelta, datetime
 import os
+import sqlite3
 import sys
 import webbrowser
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 from config import *
 from utils import *
+from patterns import *
 from tripinfo import *
+from logreader import *
+from logsource import *
+from logcache import *
+from fleet import *
+from tripstore import *
+from logworker import *
+from tripmodel import *
+from tripquery import *
+from tripexport import *
+from dataexport import *
 from speedChart import *
 from eventsChart import *
 
@@ -145,6 +157,19 @@ class UI(QMainWindow):
         # Attach to the Load Log File menu item.
         self.actionLoadLog.triggered.connect(self.loadLogFile)
 
+        # Attach to the Load Log Folder menu item, for reading a fleet of log files.
+        self.actionLoadLogFolder.triggered.connect(self.loadLogFolder)
+
+        # Attach to the Query Trip Store menu item.
+        self.actionQueryStore.triggered.connect(self.queryStore)
+
+        # Attach to the Refresh and Follow Log File menu items.
+        # When following, the log file is checked periodically and refreshed if it has changed.
+        self.actionRefreshLog.triggered.connect(self.refreshLogFile)
+        self.actionFollowLog.toggled.connect(self.followLogFile)
+        self.followTimer = QtCore.QTimer(self)
+        self.followTimer.timeout.connect(self.checkLogFile)
+
         # Set up show menu items according to configuration.
         self.actionShowInputEvents.setChecked(config.TripData["ShowInputEvents"])
         self.actionShowOtherEvents.setChecked(config.TripData["ShowOtherEvents"])
@@ -180,6 +205,9 @@ class UI(QMainWindow):
         # Attach to the Export GNSS logs for all filtered trips menu item.
         self.actionAllGnssFilteredTrips.triggered.connect(lambda: self.gnssAllTrips(True))
 
+        # Attach to the Export Data menu item.
+        self.actionExportData.triggered.connect(self.exportLogData)
+
         # Attach to the edit preferences menu item.
         self.actionPreferences.triggered.connect(self.editPreferences)
 
@@ -235,11 +263,39 @@ class UI(QMainWindow):
         # Flags to indicate controller is a Zoner
         self.isZoner = False
 
+        # Loaded log data, and tail of loaded log file for refreshing log file.
+        self.logData = None
+        self.logTail = None
+
+        # Worker thread reading log file.
+        # Stop it if still reading when the application quits.
+        self.logWorker = None
+        app.aboutToQuit.connect(self.stopLogWorker)
+
+        # Worker threads still adding read log files to the trip store.
+        # Wait for them to finish if the application quits.
+        self.storeWorkers = []
+        app.aboutToQuit.connect(self.stopStoreWorkers)
+
+        # Worker thread refreshing log file.
+        self.refreshWorker = None
+        app.aboutToQuit.connect(self.stopRefreshWorker)
+
+        # Fleet dialog, showing summary of many log files.
+        # Stop it reading log files if still reading when the application quits.
+        self.fleetDialog = None
+        app.aboutToQuit.connect(self.stopFleetDialog)
+
+        # Trip store query dialog.
+        self.storeQueryDialog = None
+
         # Initialise flags indicating that event filter is applied.
         # Also initialise the current event filter.
         self.eventFilterApplied = False
         self.currentEventFilter = ""
         self.currentEventAlertFilter = False
+        self.currentEventQuery = ""
+        self.filteredTrips = set()
         self.numFilteredTripsIn = 0
 
         # Disable event filter button.
@@ -256,6 +312,7 @@ class UI(QMainWindow):
         self.actionGnssCurrentTrip.setEnabled(False)
         self.actionAllGnssTrips.setEnabled(False)
         self.actionAllGnssFilteredTrips.setEnabled(False)
+        self.actionExportData.setEnabled(False)
 
         # Disable show events chart window.
         self.actionShowEventsChart.setEnabled(False)
@@ -268,6 +325,9 @@ class UI(QMainWindow):
 
         # Show epoch selection.
         self.showEpochStatus()
+
+        # Set up log file read progress on status bar.
+        self.showLoadProgress()
         
         # Show appliction window.
         self.show()
@@ -287,21 +347,35 @@ class UI(QMainWindow):
     # Overwrite response to accepted dropped file method.
     # *******************************************
     def dropEvent(self, event):
-        # If more than one file selected to load only load the first one.
-        filename = event.mimeData().urls()[0].toLocalFile()
-        # Only process files.
-        if os.path.isfile(filename):
-            logger.debug("File dropped on application: {0:s}".format(filename))
+        filenames = [url.toLocalFile() for url in event.mimeData().urls()]
+        # Single file is loaded; more than one file, a folder, or a zip archive of log files, is read as a fleet of log files.
+        if (len(filenames) == 1) and os.path.isfile(filenames[0]):
+            logger.debug("File dropped on application: {0:s}".format(filenames[0]))
+            self.openLogFile(filenames[0])
+        else:
+            logger.debug("Files dropped on application: {0:d}".format(len(filenames)))
+            self.openFleet(filenames)
 
-            # Open and read log file.
-            with open(filename, encoding='cp1252', errors="surrogateescape") as f:
-                self.logData = f.read()
+    # *******************************************
+    # Open log file, and process it.
+    # A zip archive of more than one log file is read as a fleet of log files.
+    # *******************************************
+    def openLogFile(self, filename):
+        if isArchive(filename):
+            fileNames = archiveLogFiles(filename)
+            if len(fileNames) != 1:
+                self.openFleet([filename])
+                return
+            filename = fileNames[0]
 
-            logger.info("Opened and read log file : {0:s}".format(filename))
-            self.showTempStatusMsg("{0:s}".format(filename), config.TripData["TmpStatusMessagesMsec"])
+        # Log file is read as it is processed; compressed log files are decompressed as they are read.
+        self.logFileName = filename
 
-            # Process the loaded log file.
-            self.processLogFile()
+        logger.info("Opened log file : {0:s}".format(filename))
+        self.showTempStatusMsg("{0:s}".format(filename), config.TripData["TmpStatusMessagesMsec"])
+
+        # Process the loaded log file.
+        self.processLogFile()
 
     # *******************************************
     # Set up various window and widget icons.
@@ -346,42 +420,23 @@ class UI(QMainWindow):
     def tripButtonClicked(self, nxtTrip):
         # Only action if we have a trip.
         if self.haveTrips:
+            tripIndex = self.tripModel.index((self.selectedTrip - 1), 0)
             # If next trip button pressed, so go to next trip if we can.
             if nxtTrip:
-                self.tripDataTree.setCurrentItem(self.tripDataTree.itemBelow(self.tripDataTree.topLevelItem((self.selectedTrip - 1))))
-
-                # Update trip summary data and plot information.
-                self.updateTripSummary(self.selectedTrip)
-                self.plotTripData(self.selectedTrip)
-                self.plotEventsData(self.selectedTrip)
-
-                # Update state of next and previous buttons.
-                if self.tripDataTree.itemBelow(self.tripDataTree.topLevelItem((self.selectedTrip - 1))) == None:
-                    self.NextTripBtn.setEnabled(False)
-                else:
-                    self.NextTripBtn.setEnabled(True)
-                if self.tripDataTree.itemAbove(self.tripDataTree.topLevelItem((self.selectedTrip - 1))) == None:
-                    self.PrevTripBtn.setEnabled(False)
-                else:
-                    self.PrevTripBtn.setEnabled(True)
+                self.tripDataTree.setCurrentIndex(self.tripDataTree.indexBelow(tripIndex))
             else:
                 # Else previous trip button pressed, so go to previous trip if we can.
-                self.tripDataTree.setCurrentItem(self.tripDataTree.itemAbove(self.tripDataTree.topLevelItem((self.selectedTrip - 1))))
+                self.tripDataTree.setCurrentIndex(self.tripDataTree.indexAbove(tripIndex))
 
-                # Update trip summary data and plot information.
-                self.updateTripSummary(self.selectedTrip)
-                self.plotTripData(self.selectedTrip)
-                self.plotEventsData(self.selectedTrip)
+            # Update trip summary data and plot information.
+            self.updateTripSummary(self.selectedTrip)
+            self.plotTripData(self.selectedTrip)
+            self.plotEventsData(self.selectedTrip)
 
-                # Update state of next and previous buttons.
-                if self.tripDataTree.itemBelow(self.tripDataTree.topLevelItem((self.selectedTrip - 1))) == None:
-                    self.NextTripBtn.setEnabled(False)
-                else:
-                    self.NextTripBtn.setEnabled(True)
-                if self.tripDataTree.itemAbove(self.tripDataTree.topLevelItem((self.selectedTrip - 1))) == None:
-                    self.PrevTripBtn.setEnabled(False)
-                else:
-                    self.PrevTripBtn.setEnabled(True)
+            # Update state of next and previous buttons.
+            tripIndex = self.tripModel.index((self.selectedTrip - 1), 0)
+            self.NextTripBtn.setEnabled(self.tripDataTree.indexBelow(tripIndex).isValid())
+            self.PrevTripBtn.setEnabled(self.tripDataTree.indexAbove(tripIndex).isValid())
 
     # *******************************************
     # Update next/prev trip button state.
@@ -402,9 +457,8 @@ class UI(QMainWindow):
     def showHideInputEvents(self):
         logger.debug("User set show Input event menu state: {0:b}".format(self.actionShowInputEvents.isChecked()))
 
-        # If we have trips clear them and add them again.
-        # will lose collapse/expand state though.
-        self.rerenderTripData()
+        # Show or hide events of this type in the trip data.
+        self.updateShownEvents()
 
     # *******************************************
     # Callback function for show/hide other events menu checkbox.
@@ -412,9 +466,8 @@ class UI(QMainWindow):
     def showHideOtherEvents(self):
         logger.debug("User set show Other event menu state: {0:b}".format(self.actionShowOtherEvents.isChecked()))
 
-        # If we have trips clear them and add them again.
-        # will lose collapse/expand state though.
-        self.rerenderTripData()
+        # Show or hide events of this type in the trip data.
+        self.updateShownEvents()
 
     # *******************************************
     # Callback function for show/hide debug events menu checkbox.
@@ -422,9 +475,8 @@ class UI(QMainWindow):
     def showHideDebugEvents(self):
         logger.debug("User set show Debug event menu state: {0:b}".format(self.actionShowDebugEvents.isChecked()))
 
-        # If we have trips clear them and add them again.
-        # will lose collapse/expand state though.
-        self.rerenderTripData()
+        # Show or hide events of this type in the trip data.
+        self.updateShownEvents()
 
     # *******************************************
     # Callback function for show/hide report events menu checkbox.
@@ -432,9 +484,8 @@ class UI(QMainWindow):
     def showHideReportEvents(self):
         logger.debug("User set show Report event menu state: {0:b}".format(self.actionShowDebugEvents.isChecked()))
 
-        # If we have trips clear them and add them again.
-        # will lose collapse/expand state though.
-        self.rerenderTripData()
+        # Show or hide events of this type in the trip data.
+        self.updateShownEvents()
 
     # *******************************************
     # Callback function for show/hide out of trip events menu checkbox.
@@ -442,9 +493,29 @@ class UI(QMainWindow):
     def showHideOutOfTripEvents(self):
         logger.debug("User set show Out of Trip event menu state: {0:b}".format(self.actionShowOutOfTripEvents.isChecked()))
 
-        # If we have trips clear them and add them again.
-        # will lose collapse/expand state though.
-        self.rerenderTripData()
+        # Show or hide events of this type in the trip data.
+        self.updateShownEvents()
+
+    # *******************************************
+    # Event types shown, according to the show menu items.
+    # *******************************************
+    def shownEvents(self):
+        return {
+            "Input" : self.actionShowInputEvents.isChecked(),
+            "Other" : self.actionShowOtherEvents.isChecked(),
+            "Debug" : self.actionShowDebugEvents.isChecked(),
+            "Report" : self.actionShowReportEvents.isChecked(),
+            "OutOfTrip" : self.actionShowOutOfTripEvents.isChecked()
+        }
+
+    # *******************************************
+    # Update event types shown in trip data.
+    # The trip data model filters the events shown, so trips are not added again,
+    # and expanded / selected trips and the event filter are kept.
+    # *******************************************
+    def updateShownEvents(self):
+        if self.haveTrips:
+            self.tripModel.setShowEvents(self.shownEvents())
 
     # *******************************************
     # Re-render trip data.
@@ -506,6 +577,21 @@ class UI(QMainWindow):
             self.fwLbl.setText("[  -  ]")
             self.statusBar().addPermanentWidget(self.fwLbl)
 
+    # *******************************************
+    # Set up log file read progress bar and cancel button on status bar.
+    # Only shown while a log file is being read.
+    # *******************************************
+    def showLoadProgress(self):
+        self.loadProgressBar = QProgressBar()
+        self.loadProgressBar.setRange(0, 100)
+        self.loadProgressBar.setMaximumWidth(200)
+        self.loadProgressBar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.loadProgressBar)
+        self.cancelLoadBtn = QPushButton("Cancel")
+        self.cancelLoadBtn.setVisible(False)
+        self.cancelLoadBtn.clicked.connect(self.cancelLoad)
+        self.statusBar().addPermanentWidget(self.cancelLoadBtn)
+
     # *******************************************
     # Clear loaded trips.
     # *******************************************
@@ -515,6 +601,7 @@ class UI(QMainWindow):
             # Clear trip data.
             self.tripDataTree.setParent(None)
             self.tripDataTree = None
+            self.tripModel = None
             # Clear speed and event plots.
             self.spdFig.clearFigure()
             self.eventsChart.fig.clearFigure()
@@ -542,8 +629,10 @@ class UI(QMainWindow):
         self.actionExpandAllLevels.setEnabled(False)
 
         # Clear event filter applied flag and icon colour.
+        # Event filter is disabled until the whole log file is read.
         self.eventFilterApplied = False
         self.actionEventFilter.setIcon(self.eFilterIconOff)
+        self.actionEventFilter.setEnabled(False)
 
         # Disable the export menu.
         self.actionExportCurrentTrip.setEnabled(False)
@@ -552,174 +641,293 @@ class UI(QMainWindow):
         self.actionGnssCurrentTrip.setEnabled(False)
         self.actionAllGnssTrips.setEnabled(False)
         self.actionAllGnssFilteredTrips.setEnabled(False)
+        self.actionExportData.setEnabled(False)
 
         # Disable show events chart window.
         self.actionShowEventsChart.setEnabled(False)
 
-        # Change to wait cursor as large files may take a while to open and process.
+        # Stop reading any previous log file, and forget the tail of the previous log file until this one is read.
+        self.stopLogWorker()
+        self.stopRefreshWorker()
+        self.logTail = None
+        self.actionRefreshLog.setEnabled(False)
+        self.actionFollowLog.setEnabled(False)
+
+        # Start pattern statistics afresh for this log file.
+        resetPatternStats()
+
+        # Read the log file in a worker thread, showing progress on the status bar.
+        # Log data is passed back when read, so the window stays responsive while large files are read.
+        self.loadProgressBar.setValue(0)
+        self.loadProgressBar.setVisible(True)
+        self.cancelLoadBtn.setVisible(True)
+        # Worker is owned by the window and deleted once its thread has finished.
+        self.logWorker = LogWorker(config, logger, self.logFileName, self)
+        self.logWorker.finished.connect(self.logWorker.deleteLater)
+        self.logWorker.finished.connect(self.logWorkerFinished)
+        self.logWorker.logProgress.connect(self.logLoadProgress)
+        self.logWorker.logBatch.connect(self.logBatchLoaded)
+        self.logWorker.logRead.connect(self.logLoaded)
+        self.logWorker.logCancelled.connect(self.logLoadCancelled)
+        self.logWorker.logFailed.connect(self.logLoadFailed)
+        self.logWorker.start()
+
+    # *******************************************
+    # Stop log file worker thread if still reading, waiting for it to finish.
+    # *******************************************
+    def stopLogWorker(self):
+        if self.logWorker is not None:
+            # Ignore anything the worker signals from now on.
+            worker = self.logWorker
+            self.logWorker = None
+            worker.cancel()
+            worker.wait()
+            self.endLoadProgress()
+
+    # *******************************************
+    # Log file worker thread finished, including adding the log file to the trip store.
+    # *******************************************
+    def logWorkerFinished(self):
+        if self.sender() in self.storeWorkers:
+            self.storeWorkers.remove(self.sender())
+
+    # *******************************************
+    # Wait for worker threads still adding log files to the trip store.
+    # *******************************************
+    def stopStoreWorkers(self):
+        if len(self.storeWorkers) > 0:
+            logger.info("Waiting for log files to be added to trip store.")
+        for worker in self.storeWorkers:
+            worker.wait()
+        self.storeWorkers = []
+
+    # *******************************************
+    # Cancel button on status bar selected while reading log file.
+    # *******************************************
+    def cancelLoad(self):
+        logger.debug("User cancelled reading log file.")
+
+        if self.logWorker is not None:
+            self.logWorker.cancel()
+
+    # *******************************************
+    # Hide log file read progress.
+    # *******************************************
+    def endLoadProgress(self):
+        self.loadProgressBar.setVisible(False)
+        self.cancelLoadBtn.setVisible(False)
+
+    # *******************************************
+    # Log file read progress from worker thread.
+    # *******************************************
+    def logLoadProgress(self, percent, numLogs):
+        if self.sender() is not self.logWorker:
+            return
+        self.loadProgressBar.setValue(percent)
+        self.showTempStatusMsg("Read {0:d} trips / power cycles".format(numLogs))
+
+    # *******************************************
+    # Log file read cancelled in worker thread.
+    # *******************************************
+    def logLoadCancelled(self):
+        if self.sender() is not self.logWorker:
+            return
+        self.logWorker = None
+        self.endLoadProgress()
+        self.showTempStatusMsg("Log file read cancelled.", config.TripData["TmpStatusMessagesMsec"])
+
+        # Need to get plots to starting states.
+        self.eventsChart.fig.resetFigure()
+        self.spdFig.resetFigure()
+
+    # *******************************************
+    # Log file read failed in worker thread.
+    # *******************************************
+    def logLoadFailed(self, msg):
+        if self.sender() is not self.logWorker:
+            return
+        self.logWorker = None
+        self.endLoadProgress()
+        self.statusbar.clearMessage()
+
+        # Show pop-up indicating log file could not be read.
+        showPopup("Log File", "Failed to read log file.", details=msg)
+
+        # Need to get plots to starting states.
+        self.eventsChart.fig.resetFigure()
+        self.spdFig.resetFigure()
+
+    # *******************************************
+    # Batch of trips / power cycles read by worker thread.
+    # The first batch is shown straight away, with the first trip selected; later batches are added to the end.
+    # *******************************************
+    def logBatchLoaded(self, logs, isZoner, firstRow):
+        if self.sender() is not self.logWorker:
+            return
+
+        if (firstRow == 0) or (not self.haveTrips):
+            # Start showing trips / power cycles.
+            # Any power cycles shown are dropped if trips are found.
+            self.clearTrips()
+            self.showTrips(list(logs), isZoner)
+        else:
+            self.appendTrips(logs)
+
+    # *******************************************
+    # Log file read by worker thread.
+    # Show any of the read trips / power cycles not already shown.
+    # *******************************************
+    def logLoaded(self, logData, tail):
+        if self.sender() is not self.logWorker:
+            return
+        # Worker carries on adding the log file to the trip store, so keep it until it has finished.
+        self.storeWorkers.append(self.logWorker)
+        self.logWorker = None
+        self.endLoadProgress()
+        self.statusbar.clearMessage()
+
+        # Change to wait cursor as large files may take a while to show.
         QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
 
         # Look for controller ID.
-        # Only read first instance in log; assume consistant.
-        cntrlId = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?UNIT ([0-9]+)$', re.MULTILINE)
-
-        cid = re.search(cntrlId, self.logData)
-        if cid:
+        # First instance in log; each trip also has the controller ID at its start.
+        if logData["controllerID"] is not None:
             # Save controller ID.
-            self.controllerID = int(cid.group(3))
+            self.controllerID = logData["controllerID"]
             self.ctrlLbl.setText(f'[{self.controllerID}]')
             logger.info("Detected Controller ID : {0:d}".format(self.controllerID))
         else:
             logger.warning("No Controller ID for trip / power cycle.")
 
         # Look for controller firmware version.
-        # Only read first instance in log; assume consistant; eill not be so if firware change mid log.
-        cntrlFirmware = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) SWSTART (.+) ([.0-9]+.+) v(.+)$', re.MULTILINE)
-
-        cfw = re.search(cntrlFirmware, self.logData)
-        if cfw:
+        # First instance in log; each trip also has the firmware version at its start, as it may change mid log.
+        if logData["firmwareVersion"] is not None:
             # Save firmware version.
-            self.firmwareVersion = cfw.group(11)
+            self.firmwareVersion = logData["firmwareVersion"]
             self.fwLbl.setText(f'[{self.firmwareVersion}]')
             logger.info("Detected controller firmware version : {0:s}".format(self.firmwareVersion))
         else:
             logger.warning("No controller firmware version for trip / power cycle.")
 
-        # Look for all trips / power cycles in the log file.
-        self.numTrips = 0
-        self.tripLog = []
-        self.zoneXLog = []
-
-        # Look for all the trip starts and capture individual buffers.
-        patternStart = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT .+ (SIGNON).?')
-        for st in re.finditer(patternStart, self.logData):
-            # Store start and end (actually next start) for buffer for each trip.
-            edge = st.start(0)
-            if (self.numTrips == 0):
-                prevStart = edge
-            else:
-                self.tripLog.append(Trip(config, logger, self.logData[prevStart:edge]))
-                prevStart = edge
-
-            # Increment trip counter.
-            self.numTrips += 1
-        
         # Total trips in file.
-        logger.info("Trips in file : {0:d}".format(self.numTrips))
-
-        # Update last trip to end of file.
-        if (self.numTrips > 0):
-            self.tripLog.append(Trip(config, logger, self.logData[prevStart:len(self.logData)]))
-
-            # Extract data from all trips.
-            for t in self.tripLog:
-                t.extractTripData()
+        logger.info("Trips in file : {0:d}".format(len(logData["tripLog"])))
 
-            # Set flag indicating we have trip data to show.
-            self.haveTrips = True
+        # No trips detected but maybe this is a ZONER (which don't have signon records).
+        # Look for any zone transition events.
+        # Note that could still be a Zoner even if no zone transition events recorded; just don't Know.
+        isZoner = (len(logData["tripLog"]) == 0) and (len(logData["zoneXLog"]) > 0)
+        if isZoner:
+            # Total power cycles (at least ON) in file.
+            logger.info("Zoner power cycles in file : {0:d}".format(len(logData["zoneXLog"])))
+            logs = logData["zoneXLog"]
+        else:
+            logs = logData["tripLog"]
 
-            # Set first trip as selected trip.
-            self.selectedTrip = 1
+        # Note if firmware changes part way through the log.
+        versions = list(dict.fromkeys(t.firmwareVersion for t in logs if t.firmwareVersion is not None))
+        if len(versions) > 1:
+            logger.info("Controller firmware versions in file : {0:s}".format(", ".join(versions)))
 
-            # Update prev/next button states.
-            self.updateTripBtnState()
+        if len(logs) > 0:
+            if self.haveTrips and (self.isZoner == isZoner):
+                # Add trips / power cycles read since the last batch shown.
+                self.appendTrips(logs[self.numTrips:])
+            else:
+                self.clearTrips()
+                self.showTrips(list(logs), isZoner)
 
-            # Enable expand / collapse buttons.
-            self.actionCollapseAllLevels.setEnabled(True)
-            self.actionExpandAllLevels.setEnabled(True)
+            # Loaded log data shares the trips / power cycles shown, so that they are refreshed together.
+            logData["tripLog"] = self.tripLog
+            logData["zoneXLog"] = self.zoneXLog
 
-            # Enable event filter button.
+            # Enable event filter button, now that all the trips / power cycles are read.
             self.actionEventFilter.setEnabled(True)
 
-            # Enable the export menu.
-            self.actionExportCurrentTrip.setEnabled(True)
+            # Enable the export all menus.
             self.actionExportAllTrips.setEnabled(True)
             self.actionExportFilteredTrips.setEnabled(self.eventFilterApplied)
-            self.actionGnssCurrentTrip.setEnabled(True)
             self.actionAllGnssTrips.setEnabled(True)
             self.actionAllGnssFilteredTrips.setEnabled(self.eventFilterApplied)
-
-            # Enable show events chart window.
-            self.actionShowEventsChart.setEnabled(True)
-
-            # Populate trip data.
-            self.populateTrips()
+            self.actionExportData.setEnabled(True)
         else:
-            # No trips detected but maybe this is a ZONER (which don't have signon records).
-            # Look for any zone transition events.
-            # Note that could still be a Zoner even if no zone transition events recorded; just don't Know.
-            patternStart = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT .+ (HARDWARE IGN_ON).?')
-            for st in re.finditer(patternStart, self.logData):
-                edge = st.start(0)
-                if (self.numTrips == 0):
-                    prevStart = edge
-                else:
-                    self.zoneXLog.append(ZoneX(config, logger, self.logData[prevStart:edge]))
-                    prevStart = edge
+            # Revert to the normal cursor.
+            QApplication.restoreOverrideCursor()
 
-                # Increment number of Zoner power cycles.
-                self.numTrips += 1
+            # Show pop-up indicating no trip data found in log file.
+            showPopup("Trip", "Log file contains no trip or power cycle event data.")
 
-            # Total power cycles (at least ON) in file.
-            logger.info("Zoner power cycles in file : {0:d}".format(self.numTrips))
+            # Need to get plots to starting states.
+            self.eventsChart.fig.resetFigure()
+            self.spdFig.resetFigure()
 
-            # Update last power cycle time to end of file.
-            if (self.numTrips > 0):
+            # Clear the controller ID as no longer relevant.
+            self.ctrlLbl.setText("")
 
-                # Indicate that log file is from a Zoner.
-                self.isZoner = True
+        # All trips / power cycles in the log file.
+        self.logData = logData
 
-                self.zoneXLog.append(ZoneX(config, logger, self.logData[prevStart:len(self.logData)]))
+        # Remember where the last trip / power cycle starts (marked by the worker thread), so that the log file can be refreshed.
+        # Compressed log files are archived, so aren't added to, and have no tail.
+        if tail is not None:
+            self.logTail = tail
+            self.actionRefreshLog.setEnabled(True)
+            self.actionFollowLog.setEnabled(True)
 
-                # Extract data from all power cycles.
-                for t in self.zoneXLog:
-                    t.extractZoneData()
+        # Dump pattern statistics for profiling.
+        dumpPatternStats(logger)
 
-                # Set flag indicating we have trip data to show.
-                self.haveTrips = True
+        # Revert to the normal cursor.
+        QApplication.restoreOverrideCursor()                       
 
-                # Set first trip as selected trip.
-                self.selectedTrip = 1
+    # *******************************************
+    # Show trips / power cycles, selecting the first one.
+    # Event filter and export all menus are enabled once the whole log file is read.
+    # *******************************************
+    def showTrips(self, logs, isZoner):
+        # Indicate if log file is from a Zoner.
+        self.isZoner = isZoner
+        if isZoner:
+            self.tripLog = []
+            self.zoneXLog = logs
+        else:
+            self.tripLog = logs
+            self.zoneXLog = []
+        self.numTrips = len(logs)
 
-                # Update prev/next button states.
-                self.updateTripBtnState()
+        # Set flag indicating we have trip data to show.
+        self.haveTrips = True
 
-                # Enable event filter button.
-                self.actionEventFilter.setEnabled(True)
+        # Set first trip as selected trip.
+        self.selectedTrip = 1
 
-                # Enable expand / collapse buttons.
-                self.actionCollapseAllLevels.setEnabled(True)
-                self.actionExpandAllLevels.setEnabled(True)
+        # Update prev/next button states.
+        self.updateTripBtnState()
 
-                # Enable the export menu.
-                self.actionExportCurrentTrip.setEnabled(True)
-                self.actionExportAllTrips.setEnabled(True)
-                self.actionExportFilteredTrips.setEnabled(self.eventFilterApplied)
-                self.actionGnssCurrentTrip.setEnabled(True)
-                self.actionAllGnssTrips.setEnabled(True)
-                self.actionAllGnssFilteredTrips.setEnabled(True)
+        # Enable expand / collapse buttons.
+        self.actionCollapseAllLevels.setEnabled(True)
+        self.actionExpandAllLevels.setEnabled(True)
 
-                # Enable show events chart window.
-                self.actionShowEventsChart.setEnabled(True)
+        # Enable the export current trip menus.
+        self.actionExportCurrentTrip.setEnabled(True)
+        self.actionGnssCurrentTrip.setEnabled(True)
 
-                # Populate trip data.
-                self.populateTrips()
-            else:
-                # Revert to the normal cursor.
-                QApplication.restoreOverrideCursor()
-
-                # Show pop-up indicating no trip data found in log file.
-                showPopup("Trip", "Log file contains no trip or power cycle event data.")
+        # Enable show events chart window.
+        self.actionShowEventsChart.setEnabled(True)
 
-                # Need to get plots to starting states.
-                self.eventsChart.fig.resetFigure()
-                self.spdFig.resetFigure()
+        # Populate trip data.
+        self.populateTrips()
 
-                # Clear the controller ID as no longer relevant.
-                self.ctrlLbl.setText("")
+    # *******************************************
+    # Add trips / power cycles to the end of those shown.
+    # *******************************************
+    def appendTrips(self, logs):
+        if len(logs) > 0:
+            # The trip data model adds to the trip log shown.
+            self.tripModel.replaceTrips(self.numTrips, logs)
+            self.numTrips += len(logs)
 
-        # Revert to the normal cursor.
-        QApplication.restoreOverrideCursor()                       
+            # Update the state of the prev/next trip buttons.
+            self.updateTripBtnState()
 
     # *******************************************
     # Populate trip data.
@@ -728,157 +936,25 @@ class UI(QMainWindow):
         # Change to wait cursor as large files may take a while to populate.
         QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
 
-        # Define a tree widget for trip data.
-        self.tripDataTree = QTreeWidget()
-        if self.isZoner == False:
-            self.tripDataTree.setHeaderLabels(['Trip Data', '', ''])
-        else:
-            self.tripDataTree.setHeaderLabels(['Power Cycle Data', '', ''])
-        self.tripDataTree.header().setMinimumSectionSize(config.TripData["MinColumnWidth"])
-        self.tripDataTree.header().resizeSection(1, config.TripData["DefaultColumn2Width"])
-        self.tripDataTree.header().setSectionResizeMode(QHeaderView.Interactive)
-        self.tripDataTree.setAlternatingRowColors(True)
-
-        fontBold = QtGui.QFont()
-        fontBold.setBold(True)
-        fontPlain = QtGui.QFont()
-        fontPlain.setBold(False)
-
         # Reference appropriate trip or power cycle event log.
         if self.isZoner == False:
             tLog = self.tripLog
         else:
             tLog = self.zoneXLog
 
-        # Populate trip titles.
-        for idx, t in enumerate(tLog):
-
-            # Initialise trip in alert flag.
-            t.tripInAlert = False
-
-            # Add top levels to trees.
-            # Label trips with trip number (including signon ID) and time.
-            if self.isZoner == False:
-                tripNum = "Trip {0:d} [ID {1:d}]".format((idx+1), t.tripStartId)
-            else:
-                tripNum = "Power Cycle {0:d}".format(idx+1)
+        # Define a model of the trip data, showing events according to the show menu items.
+        # Events and their details are only added to the model when needed.
+        self.tripModel = TripTreeModel(config, logger, tLog, self.isZoner, self.getEventDetails, self.shownEvents())
 
-            # Need to check that the trip was ended.
-            if t.tripEnd > 0:
-                tripTime = "{0:s}  to  {1:s}".format(unixTimeString(t.tripStart, config.TimeUTC), unixTimeString(t.tripEnd, config.TimeUTC))
-                logger.debug("Adding trip / power cycle: {0:d}, occurred: {1:s}".format(idx+1, tripTime))
-                tripLevel = QTreeWidgetItem(self.tripDataTree, [tripNum, tripTime])
-            else:
-                tripTime = "{0:s}".format(unixTimeString(t.tripStart, config.TimeUTC))
-                logger.debug("Adding trip / power cycle: {0:d}, occurred: {1:s}".format(idx+1, tripTime))
-                if self.isZoner == False:
-                    tripLevel = QTreeWidgetItem(self.tripDataTree, [tripNum, tripTime, "No trip end."])
-                else:
-                    tripLevel = QTreeWidgetItem(self.tripDataTree, [tripNum, tripTime, "No power cycle end."])
-                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                tripLevel.setForeground(1, QtGui.QBrush(QtGui.QColor(config.TripData["TripColour"])))
-                tripLevel.setForeground(2, QtGui.QBrush(QtGui.QColor(config.TripData["CommentColour"])))
-                tripLevel.setFont(2, fontBold)
-
-            tripLevel.setBackground(0, QtGui.QBrush(QtGui.QColor(config.TripData["TripBackColour"])))
-            tripLevel.setBackground(1, QtGui.QBrush(QtGui.QColor(config.TripData["TripBackColour"])))
-            tripLevel.setFont(0, fontBold)
-            tripLevel.setFont(1, fontBold)
-
-            # Populate event titles.
-            for idx2, ev in enumerate(t.events):
-
-                # Initialise event in alert flag.
-                ev.eventInAlert = False
-
-                # Label events with event type and time.
-                eventType = "{0:s}".format(ev.event)
-                eventTime = "{0:s}".format(unixTimeString(ev.serverTime, config.TimeUTC))
-                logger.debug("Adding event: {0:s}, occurred: {1:s}".format(eventType, eventTime))
-                eventLevel = QTreeWidgetItem(tripLevel, [eventType, eventTime, ev.alertText])
-
-                # Apply specific formatting for normal events.
-                # Apply different formatting if INPUT or 'other' events.
-                if not ev.isOther:
-                    if ev.isInput:
-                        eventLevel.setFont(0, fontPlain)
-                        eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["InputEventColour"])))
-                    elif ev.isDebug:
-                        eventLevel.setFont(0, fontPlain)
-                        eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["DebugEventColour"])))
-                    elif ev.isReport:
-                        eventLevel.setFont(0, fontPlain)
-                        eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["ReportEventColour"])))
-                    else:
-                        eventLevel.setFont(0, fontBold)
-                        eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["EventColour"])))
-                else:
-                    eventLevel.setFont(0, fontPlain)
-                    eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["OtherEventColour"])))
-
-                if ev.alertText != "":
-                    if ev.isInput:
-                        # For INPUT events alert field has the input channel number,
-                        # so colour in trip colour instead of comment/alert colours.
-                        eventLevel.setFont(2, fontPlain)
-                        eventLevel.setForeground(2, QtGui.QBrush(QtGui.QColor(config.TripData["TripColour"])))
-                    else:
-                        # Not an INPUT event so colour in comment colour and in bold.
-                        eventLevel.setFont(2, fontBold)
-                        eventLevel.setForeground(2, QtGui.QBrush(QtGui.QColor(config.TripData["CommentColour"])))
-
-                # Check it see if event is of other type in which case don't have details.
-                # Note 'debug' events are also 'other' events.
-                if not ev.isOther:
-                    # Populate event details.
-                    for idx3, evDetail in enumerate(self.getEventDetails(t, ev)):
-                        # Include event details for all events.
-                        detailLevel = QTreeWidgetItem(eventLevel, [evDetail[0], evDetail[1]])
-                        logger.debug("Adding event detail: {0:s}, value: {1:s}".format(evDetail[0], evDetail[1]))
-                        detailLevel.setTextAlignment(0, QtCore.Qt.AlignRight)
-                        detailLevel.setFont(0, fontBold)
-                        if evDetail[2] == True:
-                            detailLevel.setFont(1, fontBold)
-                            # If detail alert then use alert colour.
-                            detailLevel.setForeground(1, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            # If detail alert then also use alert colour for related event.
-                            eventLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            # Set flag indicating trip and event in alert; used for filtering.
-                            t.tripInAlert = True
-                            ev.eventInAlert = True
-
-                            # If detail alert then also use alert colour for related trip.
-                            # Don't highlight trip if event is hidden.
-                            if (ev.isInput and (self.actionShowInputEvents.isChecked())):
-                                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            elif (ev.isDebug and (self.actionShowDebugEvents.isChecked())):
-                                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            elif (ev.isReport and (self.actionShowReportEvents.isChecked())):
-                                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            elif (ev.isOther and (self.actionShowOtherEvents.isChecked())):
-                                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-                            elif ((not ev.isInput) and (not ev.isOther) and (not ev.isDebug) and (not ev.isReport)):
-                                tripLevel.setForeground(0, QtGui.QBrush(QtGui.QColor(config.TripData["AlertColour"])))
-
-                # Hide input events if not configured to do so.
-                if (ev.isInput and (not self.actionShowInputEvents.isChecked())):
-                    eventLevel.setHidden(True)
-
-                # Hide other events if not configured to do so.
-                if (ev.isOther and (not self.actionShowOtherEvents.isChecked())):
-                    eventLevel.setHidden(True)
-
-                # Hide debug events if not configured to do so.
-                if (ev.isDebug and (not self.actionShowDebugEvents.isChecked())):
-                    eventLevel.setHidden(True)
-
-                # Hide report events if not configured to do so.
-                if (ev.isReport and (not self.actionShowReportEvents.isChecked())):
-                    eventLevel.setHidden(True)
-
-                # Hide out of trip events if not configured to do so.
-                if (ev.isOutOfTrip and (not self.actionShowOutOfTripEvents.isChecked())):
-                    eventLevel.setHidden(True)
+        # Define a tree view for trip data.
+        # Rows are all the same height so that only rows in view need to be looked at.
+        self.tripDataTree = QTreeView()
+        self.tripDataTree.setUniformRowHeights(True)
+        self.tripDataTree.setModel(self.tripModel)
+        self.tripDataTree.header().setMinimumSectionSize(config.TripData["MinColumnWidth"])
+        self.tripDataTree.header().resizeSection(1, config.TripData["DefaultColumn2Width"])
+        self.tripDataTree.header().setSectionResizeMode(QHeaderView.Interactive)
+        self.tripDataTree.setAlternatingRowColors(True)
 
         # Add trip data tree to layout.
         self.verticalLayout.addWidget(self.tripDataTree)
@@ -886,13 +962,13 @@ class UI(QMainWindow):
         # Set the previously designated current trip as the current trip.
         # The selected trip is initialised to 1 when the log file is loaded,
         # there after the selected trip is maintained so that when log file is re-rendered
-        self.tripDataTree.setCurrentItem(self.tripDataTree.topLevelItem(self.selectedTrip - 1))
+        self.tripDataTree.setCurrentIndex(self.tripModel.index(self.selectedTrip - 1, 0))
         self.updateTripSummary(self.selectedTrip)
         self.plotTripData(self.selectedTrip)
         self.plotEventsData(self.selectedTrip)
 
         # Define callback if selection is made to a different trip.
-        self.tripDataTree.itemSelectionChanged.connect(self.tripItemSelected)
+        self.tripDataTree.selectionModel().selectionChanged.connect(lambda selected, deselected: self.tripItemSelected())
 
         # Revert to the normal cursor.
         QApplication.restoreOverrideCursor()                       
@@ -910,29 +986,18 @@ class UI(QMainWindow):
         # Determine trip details selected.
         # Get the currently selected item.
         # If filtering in place then might not be a next trip.
-        try:
-            node = self.tripDataTree.selectedItems()[0]
+        selected = self.tripDataTree.selectionModel().selectedIndexes()
+        if len(selected) > 0:
+            node = selected[0]
             # Look for the top parent (trip) for selected item.
-            while node.parent() != None:
+            while node.parent().isValid():
                 node = node.parent()
-            # Extract the trip number from the column 0 text.
-            trip = node.text(0)
-            if self.isZoner == False:
-                patternTrip = re.compile(r'Trip ([0-9]+) \[')
-            else:
-                patternTrip = re.compile(r'Power Cycle ([0-9]+)')
-            t = re.search(patternTrip, trip)
-            if t:
-                self.selectedTrip = int(t.group(1))
-            else:
-                # Error if trip number not found.
-                # Set selected trip to 0 which will cause a termination.
-                logger.error("No trip or power cycle number found.")
-                self.selectedTrip = 0
-        except:
+            # Trip number from the row of the trip.
+            self.selectedTrip = node.row() + 1
+        else:
             # Return the selection to the original trip, as no other trip.
             self.selectedTrip = originalTrip
-            self.tripDataTree.setCurrentItem(self.tripDataTree.topLevelItem((self.selectedTrip - 1)))
+            self.tripDataTree.setCurrentIndex(self.tripModel.index((self.selectedTrip - 1), 0))
 
         # If trip changed then update the trip summary information.
         if (self.selectedTrip != originalTrip):
@@ -955,6 +1020,12 @@ class UI(QMainWindow):
         else:
             ti = self.zoneXLog[t-1]
 
+        # Controller details at the start of the trip, as firmware may change part way through the log.
+        if ti.controllerID is not None:
+            self.ctrlLbl.setText(f'[{ti.controllerID}]')
+        if ti.firmwareVersion is not None:
+            self.fwLbl.setText(f'[{ti.firmwareVersion}]')
+
         # Trip information.
         self.TripNoLbl.setText("{0:d}".format(t))
         if self.isZoner == False:
@@ -1106,6 +1177,8 @@ class UI(QMainWindow):
                         xf.write(" This export has event filtering applied.\n")
                         xf.write(" Includes trips with event : {0:s}\n".format(filterEvent))
                         xf.write(" For trips in alert : {0}\n".format(self.currentEventAlertFilter))
+                        if self.currentEventQuery != "":
+                            xf.write(" Includes trips matching query : {0:s}\n".format(self.currentEventQuery))
                         xf.write(" Includes {0:d} of {1:d} trips.\n".format(self.numFilteredTripsIn, self.numTrips))
                         xf.write("===================================================\n")
                     else:
@@ -1113,6 +1186,8 @@ class UI(QMainWindow):
                         xf.write(" This export has event filtering applied.\n")
                         xf.write(" Includes power cycles with event : {0:s}\n".format(filterEvent))
                         xf.write(" For power cycles in alert : {0}\n".format(self.currentEventAlertFilter))
+                        if self.currentEventQuery != "":
+                            xf.write(" Includes power cycles matching query : {0:s}\n".format(self.currentEventQuery))
                         xf.write(" Includes {0:d} of {1:d} power cycles.\n".format(self.numFilteredTripsIn, self.numTrips))
                         xf.write("===================================================\n")
         
@@ -1126,8 +1201,8 @@ class UI(QMainWindow):
 
                     # If exporting filtered trips then need to check for anything to filter.
                     if filtered:
-                        # Check if anything to filter.
-                        if not self.tripDataTree.topLevelItem(tidx).isHidden():
+                        # Check if trip included by filter.
+                        if tidx in self.filteredTrips:
                             # Export trip.
                             self.exportTrip(xf, t)
                     else:
@@ -1143,254 +1218,47 @@ class UI(QMainWindow):
                 # Close file after writing.
                 xf.close()
 
+    # *******************************************
+    # Callback function for export data menu selection.
+    # Exports events and time series of all trips / power cycles as tables, for analysis tools.
+    # Tables are Parquet files if pyarrow is installed, otherwise csv files.
+    # *******************************************
+    def exportLogData(self):
+        logger.debug("User selected Export Data menu item.")
+
+        # Configure and launch file selection dialog.
+        # File name is the base name of the table files.
+        dialog = QFileDialog(self)
+        dialog.setFileMode(QFileDialog.AnyFile)
+        dialog.setViewMode(QFileDialog.List)
+        dialog.setAcceptMode(QFileDialog.AcceptSave)
+        dialog.selectFile(logBaseName(self.logFileName))
+
+        # If returned filename then export.
+        if dialog.exec_():
+            filenames = dialog.selectedFiles()
+
+            # If have a filename then export.
+            if filenames[0] != "":
+                # Change to wait cursor as exporting a lot of data may take a while.
+                QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+                try:
+                    written = exportData(config, logger, filenames[0], self.logData)
+                except Exception as e:
+                    QApplication.restoreOverrideCursor()
+                    logger.error("Failed to export log data : {0:s}".format(str(e)))
+                    showPopup("Data Export", "Failed to export log data.", details=str(e))
+                    return
+                QApplication.restoreOverrideCursor()
+
+                logger.info("Wrote log data files : {0:s}".format(", ".join(written)))
+                self.showTempStatusMsg("{0:s} ({1:d} files)".format(filenames[0], len(written)), config.TripData["TmpStatusMessagesMsec"])
+
     # *******************************************
     # Export report for nominated trip.
     # *******************************************
     def exportTrip(self, xf, ti):
-        # Export trip data to file.
-        logger.debug("Exporting trip report for Trip ID: {0:d}".format(ti.tripStartId))
-        xf.write("===================================================\n")
-        if self.isZoner == False:
-            xf.write("              ____  ____  ____  ____ \n")
-            xf.write("             (_  _)(  _ \(_  _)(  _ \\\n")
-            xf.write("               )(   )   / _)(_  )___/\n")
-            xf.write("              (__) (_)\_)(____)(__)  \n")
-            xf.write("                                     \n")
-        else:
-            xf.write("           ____  _____  _  _  ____  ____ \n")
-            xf.write("          (_   )(  _  )( \( )( ___)(  _ \\\n")
-            xf.write("           / /_  )(_)(  )  (  )__)  )   /\n")
-            xf.write("          (____)(_____)(_)\_)(____)(_)\_)\n")
-        xf.write("===================================================\n")
-        xf.write("Controller ID  : {0:d}\n".format(self.controllerID))
-        xf.write("Signon ID      : {0:d}\n".format(ti.tripStartId))
-        xf.write("Start time     : {0:s}\n".format(unixTimeString(ti.tripStart, config.TimeUTC)))
-        xf.write("End time       : {0:s}\n".format(unixTimeString(ti.tripEnd, config.TimeUTC)))
-        xf.write("===================================================\n")
-        xf.write("===================================================\n")
-        xf.write("EVENTS (TOTALS)\n")
-        xf.write("===================================================\n")
-        if self.isZoner == False:
-            xf.write("Vehicle overspeed            : {0:d}\n".format(ti.numOverspeed))
-            xf.write("Zone overspeed               : {0:d}\n".format(ti.numZoneOverspeed))
-            xf.write("Engine overspeed             : {0:d}\n".format(ti.numEngineOverspeed))
-            xf.write("Engine coolant level low     : {0:d}\n".format(ti.numLowCoolant))
-            xf.write("Engine oil pressure low      : {0:d}\n".format(ti.numOilPressure))
-            xf.write("Engine temperature high      : {0:d}\n".format(ti.numEngineTemperature))
-            xf.write("Seatbelt unbuckled operator  : {0:d}\n".format(ti.numUnbuckled_O))
-            xf.write("Seatbelt unbuckled passenger : {0:d}\n".format(ti.numUnbuckled_P))
-            xf.write("Impact Critical              : {0:d}\n".format(ti.numImpact_H))
-            xf.write("Impact High                  : {0:d}\n".format(ti.numImpact_M))
-            xf.write("Impact Low                   : {0:d}\n".format(ti.numImpact_L))
-            xf.write("Zone change                  : {0:d}\n".format(ti.numZoneChange))
-            xf.write("Checklist                    : {0:d}\n".format(ti.numChecklist))
-        else:
-            xf.write("Zone change                  : {0:d}\n".format(ti.numZoneChange))
-            xf.write("Zone transition              : {0:d}\n".format(ti.numTransition))
-        xf.write("===================================================\n")
-        xf.write("===================================================\n")
-        xf.write("EVENTS (DETAILS)\n")
-        xf.write("===================================================\n")
-        for ev in ti.events:
-            xf.write("{0:s}\n".format(ev.event))
-            xf.write("\tTime                 : {0:s}\n".format(unixTimeString(ev.serverTime, config.TimeUTC)))
-            if (ev.event == "SIGNON"):
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDriver ID            : {0:s}\n".format(ev.driverId))
-                xf.write("\tCard ID              : {0:d} (0x{0:0X})\n".format(ev.cardId))
-                xf.write("\tResult               : {0:s}\n".format(ev.result))
-                xf.write("\tBits Read            : {0:d}\n".format(ev.bitsRead))
-                xf.write("\tKeyboard             : {0:s}\n".format(ev.keyboard))
-                xf.write("\tCard Reader          : {0:s}\n".format(ev.cardReader))
-            elif (ev.event == "OVERSPEED"):
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-            elif (ev.event == "ZONEOVERSPEED"):
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-                xf.write("\tMaximum Speed        : {0:d}\n".format(ev.maxSpeed))
-                xf.write("\tZone Output          : {0:d}\n".format(ev.zoneOutput))
-            elif (ev.event == "ENGINEOVERSPEED"):
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-                xf.write("\tMaximum RPM          : {0:d}\n".format(ev.maxRPM))
-            elif ev.event in {"LOWCOOLANT", "OILPRESSURE", "ENGINETEMP"}:
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-            elif ev.event == "UNBUCKLED":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-                if ev.seatOwner == "D":
-                    seatOwner = "Operator"
-                elif ev.seatOwner == "P":
-                    seatOwner = "Passenger"
-                else:
-                    seatOwner = "?"
-                xf.write("\tSeat Owner           : {0:s}\n".format(seatOwner))
-            elif ev.event == "ZONECHANGE":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tFrom Zone            : {0:d}\n".format(ev.fromZone))
-                xf.write("\tTo Zone              : {0:d}\n".format(ev.toZone))
-                xf.write("\tZone Output          : {0:d}\n".format(ev.zoneOutput))
-            elif ev.event == "ZONETRANSITION":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tFrom Zone            : {0:d}\n".format(ev.fromZone))
-                xf.write("\tTo Zone              : {0:d}\n".format(ev.toZone))
-                xf.write("\tTo Zone Output       : {0:d}\n".format(ev.toZoneOutput))
-                xf.write("\tTransition           : {0:s}\n".format(ev.transition))
-            elif ev.event == "IMPACT":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tForward G            : {0:0.1f}\n".format(ev.fwdG))
-                xf.write("\tReverse G            : {0:0.1f}\n".format(ev.revG))
-                xf.write("\tLeft G               : {0:0.1f}\n".format(ev.leftG))
-                xf.write("\tRight G              : {0:0.1f}\n".format(ev.rightG))
-                xf.write("\tVector (magnitude)   : {0:0.1f}\n".format(ev.vectorMag))
-                xf.write("\tVector (direction)   : {0:0.1f}\n".format(ev.vectorDirn))
-                if ev.severity == "C":
-                    severity = "High"
-                elif ev.severity == "W":
-                    severity = "Medium"
-                elif ev.severity == "-":
-                    severity = "Low"
-                xf.write("\tSeverity             : {0:s}\n".format(severity))
-            elif ev.event == "CHECKLIST":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tResult               : {0:s}\n".format(ev.result))
-                xf.write("\tFailed Questions     : {0:d}\n".format(ev.failedQ))
-                xf.write("\tTime Taken           : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
-                xf.write("\tChecklist Version    : {0:d}\n".format(ev.failedQ))
-                if ev.chkType == "F":
-                    chkType = "Full"
-                elif ev.chkType == "P":
-                    chkType = "Operator Change"
-                elif ev.chkType == "B":
-                    chkType = "Bypass"
-                else:
-                    chkType = "?"
-                xf.write("\tChecklist Type       : {0:s}\n".format(chkType))
-            elif ev.event == "CLFAIL":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tFailed Question      : {0:d}\n".format(ev.failedQNo))
-            elif ev.event == "XSIDLESTART":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-            elif ev.event == "XSIDLE":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tMaximum Idle Time    : {0:s}\n".format(str(timedelta(seconds=ev.maxIdle))))
-                xf.write("\tIdle Reason          : {0:d}\n".format(ev.xsidleReason))
-            elif ev.event == "SERVICE":
-                xf.write("\tService ID           : {0:d}\n".format(ev.serviceId))
-            elif ev.event == "REPORT":
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tReport Speed         : {0:d}\n".format(ev.speed))
-                xf.write("\tDirection            : {0:d}\n".format(ev.direction))
-            elif ev.event == "CRITICALOUTPUTSET":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tCritical Output      : {0:d}\n".format(ev.criticalOutput))
-            elif ((ev.event == "OOS PM") or (ev.event == "OOS UPM")):
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tOOS Reason           : {0:d}\n".format(ev.oosReason))
-            elif ev.event == "INPUT":
-                xf.write("\tInput                : {0:d} - {1:s}\n".format(ev.inputNo, config.Channels[ev.inputNo - 1]["Name"]))
-                xf.write("\tState                : {0:d}\n".format(ev.inputState))
-                xf.write("\tActive Time          : {0:s}\n".format(str(timedelta(seconds=ev.activeTime))))
-            elif "SWSTART" in ev.event:
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tFirmware Version     : {0:s}\n".format(ev.firmware))
-            elif ev.event == "POWER":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tBattery State        : {0:s}\n".format(ev.batteryState))
-            elif ev.event == "DEBUG":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tDetails              : {0:s}\n".format(ev.debugInfo))
-            elif ev.event == "TRIP":
-                xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
-                xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
-                xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
-                xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tTime Forward         : {0:s}\n".format(str(timedelta(seconds=ev.timeFwd))))
-                xf.write("\tTime Reverse         : {0:s}\n".format(str(timedelta(seconds=ev.timeRev))))
-                xf.write("\tTime Idle            : {0:s}\n".format(str(timedelta(seconds=ev.timeIdle))))
-                xf.write("\tMax Idle Time        : {0:s}\n".format(str(timedelta(seconds=ev.maxIdle))))
-                xf.write("\tTime on Seat         : {0:s}\n".format(str(timedelta(seconds=ev.timeOnSeat))))
-            elif ev.event == "TRIPSUMMARY":
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-            elif ev.event == "TRIPLOAD":
-                xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
-                xf.write("\tTravel Loaded        : {0:d}\n".format(str(timedelta(seconds=ev.travelLoaded))))
-                xf.write("\tTravel Unloaded      : {0:d}\n".format(str(timedelta(seconds=ev.travelUnloaded))))
-                xf.write("\tIdle Loaded          : {0:d}\n".format(str(timedelta(seconds=ev.idleLoaded))))
-                xf.write("\tIdle Unloaded        : {0:d}\n".format(str(timedelta(seconds=ev.idleUnloaded))))
-                xf.write("\tLift Count           : {0:d}\n".format(ev.liftCount))
-                xf.write("\tCummulative Lift     : {0:d}\n".format(ev.cumWeight))
-        xf.write("===================================================\n\n")
+        exportTrip(config, logger, xf, ti, self.controllerID, self.isZoner)
 
     # *******************************************
     # Callback function for export GNSS logs for all trips menu selection.
@@ -1430,19 +1298,15 @@ class UI(QMainWindow):
 
                     # First check if there are any valid points in the track.
                     # Don't export if nothing in the track.
-                    validData = False
-                    for gd in t.gnssLog:
-                        # Check for null gnss data, i.e. 0,0 in log.
-                        if (gd.latitude != 0.0) and (gd.longitude != 0.0):
-                            validData = True
-                            break
+                    # Check for null gnss data, i.e. 0,0 in log.
+                    validData = t.gnssLog.hasValidPosition()
 
                     # If we have some track data then export.
                     if validData:
                         # If exporting filtered trips then need to check for anything to filter.
                         if filtered:
-                            # Check if anything to filter.
-                            if not self.tripDataTree.topLevelItem(tidx).isHidden():
+                            # Check if trip included by filter.
+                            if tidx in self.filteredTrips:
                             # Export GNSS log for trip.
                                 self.exportGnssLog(xf, t, (tNo+1))
                         else:
@@ -1495,12 +1359,8 @@ class UI(QMainWindow):
 
                 # First check if there are any valid points in the track.
                 # Don't export if nothing in the track.
-                validData = False
-                for gd in tLog[self.selectedTrip - 1].gnssLog:
-                    # Check for null gnss data, i.e. 0,0 in log.
-                    if (gd.latitude != 0.0) and (gd.longitude != 0.0):
-                        validData = True
-                        break
+                # Check for null gnss data, i.e. 0,0 in log.
+                validData = tLog[self.selectedTrip - 1].gnssLog.hasValidPosition()
 
                 # If we have some track data then export.
                 if validData:
@@ -1522,38 +1382,7 @@ class UI(QMainWindow):
     # Export GNSS Log for nominated trip.
     # *******************************************
     def exportGnssLog(self, xf, ti, tNo):
-        # Export GNSS Log for trip to file.
-        logger.debug("Exporting GNSS Log for Trip ID: {0:d}".format(ti.tripStartId))
-
-        # Export GNSS log.
-        # First check if there are any valid points in the trip.
-        validData = False
-        for gd in ti.gnssLog:
-            # Check for null gnss data, i.e. 0,0 in log.
-            if (gd.latitude != 0.0) and (gd.longitude != 0.0):
-                validData = True
-                break
-
-        # If we have a trip with some valid data export it.
-        if validData == True:
-            # Export header row.
-            started = False
-            idx = 1
-            xf.write(f'gv_track_number,trackpoint,type,time,latitude,longitude,name,desc,new_track,symbol,label\n')
-            if self.isZoner == True:
-                usName = f'Zoner: {self.controllerID}'
-            else:
-                usName = f'Trip: {ti.tripStartId}'
-            for gd in ti.gnssLog:
-                # Check for null gnss data, i.e. 0,0 in log.
-                if (gd.latitude != 0.0) and (gd.longitude != 0.0):
-                    if started == False:
-                        xf.write(f'{tNo},{idx},W,{timeTZ(gd.time, config.TimeUTC)},{gd.latitude},{gd.longitude},{usName},,0,pin\n')
-                        xf.write(f'{tNo},{idx},R,{timeTZ(gd.time, config.TimeUTC)},{gd.latitude},{gd.longitude},{usName},,1,,{idx}\n')
-                        started = True
-                    else:
-                        xf.write(f'{tNo},{idx},R,{timeTZ(gd.time, config.TimeUTC)},{gd.latitude},{gd.longitude},{timeTZ(gd.time, config.TimeUTC)},GNSS Error: {gd.error} (m) Speed: {gd.speed} (kph),,circle,{idx}\n')
-                    idx += 1
+        exportGnssLog(config, logger, xf, ti, tNo, self.controllerID, self.isZoner)
 
     # *******************************************
     # Toolbar to collapse all trip data.
@@ -1581,35 +1410,27 @@ class UI(QMainWindow):
         # Reapply if required.
         if (self.eventFilterApplied == False) or (reapply == True):
 
-            # Go through all trips and include trips that include specific event.
-            # Look in both column 0 and column 1 to catch extra events e.g. DEBUG Time1H events.
-            searchList = self.tripDataTree.findItems(self.currentEventFilter, QtCore.Qt.MatchContains | QtCore.Qt.MatchRecursive, 0)
-            searchList += self.tripDataTree.findItems(self.currentEventFilter, QtCore.Qt.MatchContains | QtCore.Qt.MatchRecursive, 1)
+            # Look up trips that include specific event in the event index.
+            # Includes DEBUG sub-types e.g. DEBUG Time1H events.
+            searchList = self.tripModel.findTrips(self.currentEventFilter)
+
+            # Narrow down to trips also matching the filter query, if set.
+            # Query was checked when it was set.
+            if self.currentEventQuery != "":
+                queryList = set(self.tripModel.queryTrips(TripQuery(config, self.currentEventQuery)))
+                searchList = [idx for idx in searchList if idx in queryList]
 
-            # Start with all items hidden.
+            # Check if filter setting to filter if in alert.
+            if self.currentEventAlertFilter:
+                searchList = [idx for idx in searchList if self.tripModel.tripAlert(idx)]
+
+            # Trips matching filter, used for filtered exports.
+            self.filteredTrips = set(searchList)
+            self.numFilteredTripsIn = len(self.filteredTrips)
+
+            # Only show the trips matching filter.
             for idx in range(self.numTrips):
-                self.tripDataTree.topLevelItem((idx)).setHidden(True)
-
-            # Initialise number filtered items 0 (all hidden).
-            self.numFilteredTripsIn = 0
-
-            # Unhide all the items matching filter.
-            for item in searchList:
-                # Find the parent of the item to show.
-                while item.parent() != None:
-                    item = item.parent()
-                # Hide item if not already hidden.
-                # Do this as can be more than one event in a trip that matches filtered
-                if item.isHidden():
-                    # Check if filter setting to filter if in alert.
-                    if self.currentEventAlertFilter:
-                        # Check if trip is in alert state.
-                        if self.tripLog[self.tripDataTree.indexOfTopLevelItem(item)].tripInAlert:
-                            item.setHidden(False)
-                            self.numFilteredTripsIn += 1
-                    else:
-                        item.setHidden(False)
-                        self.numFilteredTripsIn += 1
+                self.tripDataTree.setRowHidden(idx, QtCore.QModelIndex(), (idx not in self.filteredTrips))
 
             # Set filter applied flag and icon colour.
             self.eventFilterApplied = True
@@ -1617,13 +1438,12 @@ class UI(QMainWindow):
             self.actionExportFilteredTrips.setEnabled(True)
 
             # Need to check if the currently selected trip is still visibile (or not).
-            currentItem = self.tripDataTree.currentItem()
-            if currentItem.isHidden():
+            currentTrip = self.tripModel.index((self.selectedTrip - 1), 0)
+            if self.tripDataTree.isRowHidden(currentTrip.row(), QtCore.QModelIndex()):
                 # Trip is not visible in filter, therefore pick the nearest one.
-                self.tripDataTree.scrollToItem(self.tripDataTree.setCurrentItem(self.tripDataTree.itemBelow(currentItem)))
-            else:
-                # Item still visible so just scroll to it.
-                self.tripDataTree.scrollToItem(currentItem)
+                self.tripDataTree.setCurrentIndex(self.tripDataTree.indexBelow(currentTrip))
+            # Scroll to the current item.
+            self.tripDataTree.scrollTo(self.tripDataTree.currentIndex())
 
             # Show the tree widget again.
             self.tripDataTree.show()
@@ -1636,7 +1456,7 @@ class UI(QMainWindow):
             # Need to clear the filter, i.e. show all items.
             # Unhide all items.
             for idx in range(self.numTrips):
-                self.tripDataTree.topLevelItem((idx)).setHidden(False)
+                self.tripDataTree.setRowHidden(idx, QtCore.QModelIndex(), False)
 
             # Clear event filter applied flag and icon colour.
             self.eventFilterApplied = False
@@ -1644,11 +1464,11 @@ class UI(QMainWindow):
             self.actionExportFilteredTrips.setEnabled(False)
 
             # Number of filtered trips in is all as no filtering.
+            self.filteredTrips = set(range(self.numTrips))
             self.numFilteredTripsIn = self.numTrips
 
             # Need to make sure current item is still visible in view, so scroll to it.
-            currentItem = self.tripDataTree.currentItem()
-            self.tripDataTree.scrollToItem(currentItem)
+            self.tripDataTree.scrollTo(self.tripDataTree.currentIndex())
 
             # Show the tree widget again.
             self.tripDataTree.show()
@@ -1868,28 +1688,199 @@ class UI(QMainWindow):
         # Configure and launch file selection dialog.
         dialog = QFileDialog(self)
         dialog.setAcceptMode(QFileDialog.AcceptOpen)
-        dialog.setFileMode(QFileDialog.ExistingFile)
+        dialog.setFileMode(QFileDialog.ExistingFiles)
         dialog.setViewMode(QFileDialog.Detail)
-        dialog.setNameFilters(["Log files (*)"])
+        dialog.setNameFilters(["Log files (*)", "Compressed log files (*.gz *.xz *.bz2 *.zip)"])
         
         # If returned filename then open.
         if dialog.exec_():
             filenames = dialog.selectedFiles()
 
             # If have a filename then open.
-            if filenames[0] != "":
-                # Open and read log file.
-                with open(filenames[0], encoding='cp1252', errors="surrogateescape") as f:
-                    self.logData = f.read()
-
-                logger.info("Opened and read log file : {0:s}".format(filenames[0]))
-                self.showTempStatusMsg("{0:s}".format(filenames[0]), config.TripData["TmpStatusMessagesMsec"])
-
-                # Process the loaded log file.
-                self.processLogFile()
+            # More than one file selected, or a zip archive of log files, is read as a fleet of log files.
+            if len(filenames) > 1:
+                self.openFleet(filenames)
+            elif (len(filenames) == 1) and (filenames[0] != ""):
+                self.openLogFile(filenames[0])
             else:
                 logger.info("No log file selected.")
 
+    # *******************************************
+    # Callback function for load log folder menu selection.
+    # Log files in the folder are read as a fleet of log files.
+    # *******************************************
+    def loadLogFolder(self):
+        logger.debug("User selected Load Log Folder control.")
+
+        folder = QFileDialog.getExistingDirectory(self, "Log Folder")
+        if folder != "":
+            self.openFleet([folder])
+        else:
+            logger.info("No log folder selected.")
+
+    # *******************************************
+    # Read many log files (or folders of log files), showing a summary of them by controller.
+    # Log files can then be opened from the summary.
+    # *******************************************
+    def openFleet(self, paths):
+        fileNames = FleetLog(config, logger).findLogFiles(paths)
+        if len(fileNames) == 0:
+            showPopup("Log Files", "No log files found.")
+            return
+        if len(fileNames) == 1:
+            self.openLogFile(fileNames[0])
+            return
+
+        logger.info("Opened fleet of {0:d} log files.".format(len(fileNames)))
+
+        # Only one fleet is read at a time.
+        self.stopFleetDialog()
+        self.fleetDialog = FleetDialog(config, self, fileNames)
+
+    # *******************************************
+    # Callback function for query trip store menu selection.
+    # Finds events across all log files added to the trip store.
+    # *******************************************
+    def queryStore(self):
+        logger.debug("User selected Query Trip Store menu item.")
+
+        if not os.path.isfile(config.LogParsing["StoreFile"]):
+            showPopup("Trip Store", "No trip store to query.", "(Enable the trip store in the configuration, then load log files.)")
+            return
+
+        # Dialog is kept until closed, so log files can be opened from it.
+        self.storeQueryDialog = StoreQueryDialog(config, self)
+
+    # *******************************************
+    # Stop fleet dialog reading log files, and close it.
+    # *******************************************
+    def stopFleetDialog(self):
+        if self.fleetDialog is not None:
+            dialog = self.fleetDialog
+            self.fleetDialog = None
+            dialog.close()
+
+    # *******************************************
+    # Refresh log file.
+    # If the log file has only been added to then just the last trip / power cycle is read again,
+    # with any new trips / power cycles added to the end of the trip data tree.
+    # Otherwise the whole log file is processed again.
+    # *******************************************
+    def refreshLogFile(self):
+        logger.debug("Refreshing log file.")
+
+        # Only one refresh at a time, and not while the log file is being read.
+        if (self.logTail is None) or (self.refreshWorker is not None) or (self.logWorker is not None):
+            return
+
+        # Check that we have trips to add to.
+        if not self.haveTrips:
+            logger.info("Log file changed, processing whole log file.")
+            self.processLogFile()
+            return
+
+        # Read the new trips / power cycles in a worker thread, as large log files take a while to check and mark.
+        self.refreshWorker = LogRefreshWorker(config, logger, self.logFileName, self.logData, self.logTail, self.isZoner, self)
+        self.refreshWorker.finished.connect(self.refreshWorker.deleteLater)
+        self.refreshWorker.logRefreshed.connect(self.logRefreshed)
+        self.refreshWorker.logChanged.connect(self.logRefreshChanged)
+        self.refreshWorker.logFailed.connect(self.logRefreshFailed)
+        self.refreshWorker.start()
+
+    # *******************************************
+    # Log file refreshed by worker thread.
+    # New trips / power cycles replace the last one, and the log tail is that of the refreshed log file.
+    # *******************************************
+    def logRefreshed(self, newLogs, tail):
+        if self.sender() is not self.refreshWorker:
+            return
+        self.refreshWorker = None
+
+        # Reference appropriate trip or power cycle event log.
+        if self.isZoner == False:
+            tLog = self.tripLog
+        else:
+            tLog = self.zoneXLog
+
+        # Last trip / power cycle (may have been open) is replaced, and new ones added.
+        # The trip data model updates the trip log, which is shared with the loaded log data so it is updated as well.
+        # Selected trip is not changed.
+        firstIdx = len(tLog) - 1
+        self.tripDataTree.selectionModel().blockSignals(True)
+        self.tripModel.replaceTrips(firstIdx, newLogs)
+        self.tripDataTree.setCurrentIndex(self.tripModel.index(self.selectedTrip - 1, 0))
+        self.tripDataTree.selectionModel().blockSignals(False)
+        self.numTrips = len(tLog)
+        logger.info("Trips / power cycles after refresh : {0:d}".format(self.numTrips))
+
+        # Reapply the event filter to include new trips.
+        if self.eventFilterApplied:
+            self.eventFilter(reapply=True)
+
+        # Update the state of the prev/next trip buttons.
+        self.updateTripBtnState()
+
+        # Update selected trip if it was the one read again.
+        if self.selectedTrip > firstIdx:
+            self.updateTripSummary(self.selectedTrip)
+            self.spdFig.clearFigure()
+            self.plotTripData(self.selectedTrip)
+            self.eventsChart.fig.clearFigure()
+            self.plotEventsData(self.selectedTrip)
+
+        # New last trip / power cycle.
+        self.logTail = tail
+
+    # *******************************************
+    # Log file found by refresh worker thread to have changed, not just added to.
+    # *******************************************
+    def logRefreshChanged(self):
+        if self.sender() is not self.refreshWorker:
+            return
+        self.refreshWorker = None
+
+        logger.info("Log file changed, processing whole log file.")
+        self.processLogFile()
+
+    # *******************************************
+    # Log file refresh failed in worker thread.
+    # Following the log file carries on, so the refresh is tried again when the log file next changes.
+    # *******************************************
+    def logRefreshFailed(self, msg):
+        if self.sender() is not self.refreshWorker:
+            return
+        self.refreshWorker = None
+
+        self.showTempStatusMsg("Failed to refresh log file.", config.TripData["TmpStatusMessagesMsec"])
+
+    # *******************************************
+    # Stop log file refresh worker thread if still refreshing, waiting for it to finish.
+    # *******************************************
+    def stopRefreshWorker(self):
+        if self.refreshWorker is not None:
+            # Ignore anything the worker signals from now on.
+            worker = self.refreshWorker
+            self.refreshWorker = None
+            worker.wait()
+
+    # *******************************************
+    # Follow log file menu checkbox.
+    # *******************************************
+    def followLogFile(self, follow):
+        logger.debug("User set follow log file menu state: {0:b}".format(follow))
+
+        if follow:
+            self.followTimer.start(config.LogParsing["FollowIntervalMsec"])
+        else:
+            self.followTimer.stop()
+
+    # *******************************************
+    # Check if followed log file has changed, and refresh if it has.
+    # *******************************************
+    def checkLogFile(self):
+        if (self.logTail is not None) and self.logTail.hasChanged():
+            self.refreshLogFile()
+
     # *******************************************
     # Edit Preferences control selected.
     # Displays an "Edit Preferences" dialog.
@@ -2009,6 +2000,230 @@ class EventsChartDialog(QDialog):
         # Show dialog.
         self.show()
 
+# *******************************************
+# Fleet dialog class.
+# Reads many log files in a worker thread, and shows a summary of them grouped by controller.
+# Double click on a log file to open it.
+# *******************************************
+class FleetDialog(QDialog):
+    def __init__(self, config, app, fileNames):
+        super(FleetDialog, self).__init__()
+        uic.loadUi(res_path("fleet.ui"), self)
+
+        self.config = config
+        self.app = app
+
+        # Controller summaries and their tree items, by controller ID.
+        self.controllers = {}
+        self.controllerItems = {}
+
+        # Trees are sorted by controller; numeric columns sort as numbers.
+        self.fleetTree.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.fleetTree.itemDoubleClicked.connect(self.openLog)
+
+        # Connect buttons.
+        self.CancelBtn.clicked.connect(self.cancelRead)
+        self.CloseBtn.clicked.connect(self.close)
+
+        # Read log files in worker thread; summaries are added to the tree as they are read.
+        self.fleetProgressBar.setMaximum(len(fileNames))
+        self.fleetWorker = FleetWorker(config, logger, fileNames, self)
+        self.fleetWorker.finished.connect(self.fleetWorker.deleteLater)
+        self.fleetWorker.fleetLog.connect(self.logRead)
+        self.fleetWorker.fleetRead.connect(self.fleetRead)
+        self.fleetWorker.fleetCancelled.connect(self.fleetRead)
+        self.fleetWorker.start()
+
+        self.showFleet()
+
+    # *******************************************
+    # Displays a fleet dialog box.
+    # *******************************************
+    def showFleet(self):
+        icon = QtGui.QIcon()
+        icon.addPixmap(QtGui.QPixmap(res_path("./resources/about.png")))
+        self.setWindowIcon(icon)
+
+        # Show dialog.
+        self.show()
+
+    # *******************************************
+    # Log file read by worker thread.
+    # Add it to its controller, updating the controller totals.
+    # *******************************************
+    def logRead(self, summary, numRead, numFiles):
+        if self.sender() is not self.fleetWorker:
+            return
+        self.fleetProgressBar.setValue(numRead)
+
+        controllerID = summary.controllerID
+        if controllerID not in self.controllers:
+            self.controllers[controllerID] = ControllerSummary(controllerID)
+            self.controllerItems[controllerID] = QTreeWidgetItem(self.fleetTree)
+            if controllerID is not None:
+                self.controllerItems[controllerID].setData(0, QtCore.Qt.DisplayRole, controllerID)
+            else:
+                self.controllerItems[controllerID].setText(0, "Unknown")
+        controller = self.controllers[controllerID]
+        controller.logs.append(summary)
+
+        # Log file item.
+        item = QTreeWidgetItem(self.controllerItems[controllerID])
+        item.setText(0, summary.fileName)
+        item.setToolTip(0, summary.fileName)
+        if summary.error is not None:
+            item.setText(1, "Failed : {0:s}".format(summary.error))
+        else:
+            self.setItemColumns(item, ((summary.firmwareVersion or ""), summary.numLogs, summary.numEvents, summary.numOverspeed,
+                summary.numImpacts, summary.numUnbuckled, summary.numChecklist, summary.startTime, summary.endTime))
+
+        # Controller totals.
+        self.setItemColumns(self.controllerItems[controllerID], (", ".join(controller.firmwareVersions()), controller.total("numLogs"),
+            controller.total("numEvents"), controller.total("numOverspeed"), controller.total("numImpacts"),
+            controller.total("numUnbuckled"), controller.total("numChecklist"), controller.startTime(), controller.endTime()))
+
+    # *******************************************
+    # Set columns of tree item after the first.
+    # Values are firmware, totals, and start and end times.
+    # *******************************************
+    def setItemColumns(self, item, values):
+        item.setText(1, values[0])
+        for col, value in enumerate(values[1:-2], 2):
+            item.setData(col, QtCore.Qt.DisplayRole, value)
+        for col, value in enumerate(values[-2:], (len(values) - 1)):
+            if value != 0:
+                item.setText(col, unixTimeString(value, self.config.TimeUTC))
+
+    # *******************************************
+    # Worker thread has finished reading log files (or was cancelled).
+    # *******************************************
+    def fleetRead(self):
+        if self.sender() is not self.fleetWorker:
+            return
+        self.fleetWorker = None
+        self.CancelBtn.setEnabled(False)
+        for col in range(self.fleetTree.columnCount()):
+            self.fleetTree.resizeColumnToContents(col)
+
+    # *******************************************
+    # Cancel button selected while reading log files.
+    # *******************************************
+    def cancelRead(self):
+        logger.debug("User cancelled reading fleet log files.")
+
+        if self.fleetWorker is not None:
+            self.fleetWorker.cancel()
+
+    # *******************************************
+    # Log file double clicked; open it in the application.
+    # Controller items are just expanded / collapsed.
+    # *******************************************
+    def openLog(self, item, column):
+        if item.parent() is not None:
+            self.app.openLogFile(item.text(0))
+
+    # *******************************************
+    # Stop reading log files when dialog is closed, waiting for the worker thread to finish.
+    # *******************************************
+    def closeEvent(self, event):
+        if self.fleetWorker is not None:
+            worker = self.fleetWorker
+            self.fleetWorker = None
+            worker.cancel()
+            worker.wait()
+        if self.app.fleetDialog is self:
+            self.app.fleetDialog = None
+        event.accept()
+
+# *******************************************
+# Trip store query dialog class.
+# Finds events in the trip store across all log files added to it.
+# Double click on an event to open its log file.
+# *******************************************
+class StoreQueryDialog(QDialog):
+    def __init__(self, config, app):
+        super(StoreQueryDialog, self).__init__()
+        uic.loadUi(res_path("storeQuery.ui"), self)
+
+        self.config = config
+        self.app = app
+
+        # Use the event filter query to start with.
+        self.queryEdit.setText(self.app.currentEventQuery)
+
+        self.resultsTree.itemDoubleClicked.connect(self.openLog)
+        self.FindBtn.clicked.connect(self.findEvents)
+        self.queryEdit.returnPressed.connect(self.findEvents)
+        self.CloseBtn.clicked.connect(self.close)
+
+        self.showStoreQuery()
+
+    # *******************************************
+    # Displays a trip store query dialog box.
+    # *******************************************
+    def showStoreQuery(self):
+        icon = QtGui.QIcon()
+        icon.addPixmap(QtGui.QPixmap(res_path("./resources/about.png")))
+        self.setWindowIcon(icon)
+
+        # Show dialog.
+        self.show()
+
+    # *******************************************
+    # Find events matching query, and show them.
+    # *******************************************
+    def findEvents(self):
+        text = self.queryEdit.text().strip()
+        if text == "":
+            return
+        logger.debug("User querying trip store : {0:s}".format(text))
+
+        # Only events in the last number of days, if set.
+        startTime = None
+        if self.daysSpin.value() > 0:
+            startTime = int(time.time()) - (self.daysSpin.value() * 86400)
+
+        try:
+            query = TripQuery(self.config, text)
+            store = TripStore(self.config, logger, self.config.LogParsing["StoreFile"])
+            try:
+                events = store.findEvents(query, startTime)
+            finally:
+                store.close()
+        except QueryError as e:
+            showPopup("Trip Store", "Query is not valid.", str(e))
+            return
+        except sqlite3.Error as e:
+            # e.g. store locked by another process adding log files, or can't be opened.
+            logger.error("Failed to query trip store : {0:s}".format(str(e)))
+            showPopup("Trip Store", "Failed to query trip store.", str(e))
+            return
+
+        # Show events found, in time order.
+        self.resultsTree.clear()
+        for ev in events:
+            item = QTreeWidgetItem(self.resultsTree)
+            item.setText(0, unixTimeString(ev.serverTime, self.config.TimeUTC))
+            if ev.controllerID is not None:
+                item.setData(1, QtCore.Qt.DisplayRole, ev.controllerID)
+            item.setText(2, ev.firmwareVersion or "")
+            item.setData(3, QtCore.Qt.DisplayRole, ev.tripStartId)
+            item.setText(4, ev.event)
+            item.setText(5, " ".join("{0:s}={1}".format(k, v) for k, v in ev.details.items()))
+            item.setText(6, ev.fileName)
+        for col in range(self.resultsTree.columnCount() - 1):
+            self.resultsTree.resizeColumnToContents(col)
+        self.resultsLabel.setText("{0:d} events found.".format(len(events)))
+
+    # *******************************************
+    # Event double clicked; open its log file in the application.
+    # *******************************************
+    def openLog(self, item, column):
+        if os.path.isfile(item.text(6)):
+            self.app.openLogFile(item.text(6))
+        else:
+            showPopup("Trip Store", "Log file not found.", item.text(6))
+
 # *******************************************
 # Preferences dialog class.
 # *******************************************
@@ -2174,7 +2389,9 @@ class PreferencesDialog(QDialog):
         prefChanged = False
 
         # Flag indicating if need to re-render trip data for prefernece to take effect.
+        # And flag indicating if event types shown changed.
         rerender = False
+        showEvents = False
 
         ###########################
         # Debugging
@@ -2328,7 +2545,7 @@ class PreferencesDialog(QDialog):
             # Update menu item.
             self.app.actionShowOtherEvents.setChecked(val)
             prefChanged = True
-            rerender = True
+            showEvents = True
         # Show input events.
         val = self.showInputVal.isChecked()
         if val != self.app.actionShowInputEvents.isChecked():
@@ -2338,7 +2555,7 @@ class PreferencesDialog(QDialog):
             # Update menu item.
             self.app.actionShowInputEvents.setChecked(val)
             prefChanged = True
-            rerender = True
+            showEvents = True
         # Show debug events.
         val = self.showDebugVal.isChecked()
         if val != self.app.actionShowDebugEvents.isChecked():
@@ -2348,7 +2565,7 @@ class PreferencesDialog(QDialog):
             # Update menu item.
             self.app.actionShowDebugEvents.setChecked(val)
             prefChanged = True
-            rerender = True
+            showEvents = True
         # Show report events.
         val = self.showReportVal.isChecked()
         if val != self.app.actionShowReportEvents.isChecked():
@@ -2358,7 +2575,7 @@ class PreferencesDialog(QDialog):
             # Update menu item.
             self.app.actionShowReportEvents.setChecked(val)
             prefChanged = True
-            rerender = True
+            showEvents = True
         # Show out of trip events.
         val = self.showOutOfTripVal.isChecked()
         if val != self.app.actionShowOutOfTripEvents.isChecked():
@@ -2368,7 +2585,7 @@ class PreferencesDialog(QDialog):
             # Update menu item.
             self.app.actionShowOutOfTripEvents.setChecked(val)
             prefChanged = True
-            rerender = True
+            showEvents = True
         # Bad vehicle speed limit.
         val = int(self.speedAlertLimVal.text())
         if val != self.config.TripData["BadSpeedLimit"]:
@@ -2528,8 +2745,11 @@ class PreferencesDialog(QDialog):
             self.config.saveConfig()
 
         # Rerender display if UI preference changed.
+        # If only the event types shown changed then just update the events shown.
         if rerender:
             self.app.rerenderTripData()
+        elif showEvents:
+            self.app.updateShownEvents()
 
         # Close dialog.
         self.close()
@@ -2741,6 +2961,9 @@ class EventFilterSetDialog(QDialog):
         self.eventInAlertCB.setChecked(self.app.currentEventAlertFilter)
         logger.debug("Event Filter trips in alert: {0}".format(self.app.currentEventAlertFilter))
 
+        # Get current filter query.
+        self.queryEdit.setText(self.app.currentEventQuery)
+
         # Connect to SAVE dialog button for processing.
         self.SaveDialogBtn.clicked.connect(self.saveFilterSetting)
 
@@ -2767,9 +2990,20 @@ class EventFilterSetDialog(QDialog):
     def saveFilterSetting(self):
         logger.debug("User saving event filter setting.")
 
+        # Check filter query before saving, and leave dialog open if there is an error.
+        query = self.queryEdit.text().strip()
+        if query != "":
+            try:
+                TripQuery(self.config, query)
+            except QueryError as e:
+                logger.debug("Event filter query error: {0:s}".format(str(e)))
+                showPopup("Filter", "Filter query is not valid.", str(e))
+                return
+
         # Save current event filter selection.
         self.app.currentEventFilter = self.EventCombo.currentText()
         self.app.currentEventAlertFilter = self.eventInAlertCB.isChecked()
+        self.app.currentEventQuery = query
 
         # If not cleared than set flag saved.
         self.app.eventFilterSet = True
@@ -3035,7 +3269,12 @@ class ChangeLogDialog(QDialog):
 
 # *******************************************
 # Create UI
+# Only when run as the application, not when imported by worker processes.
 # *******************************************
-app = QApplication(sys.argv)
-etscrape = UI()
-app.exec_()
+if __name__ == "__main__":
+    # Allow worker processes to start from frozen executable.
+    multiprocessing.freeze_support()
+
+    app = QApplication(sys.argv)
+    etscrape = UI()
+    app.exec_()
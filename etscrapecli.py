@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+
+import argparse
+import calendar
+import csv
+import fnmatch
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import *
+from utils import *
+from logreader import *
+from logsource import *
+from tripexport import *
+from tripstore import *
+from dataexport import *
+
+# *******************************************
+# Command line (batch) version of etscrape.
+# Reads log files and writes the trip report (txt) and GNSS log (csv) of each, as the export menu items do.
+# Doesn't import PyQt5 or matplotlib, so can be run on headless servers.
+#
+# Usage:
+#   python etscrapecli.py [-o OUTDIR] [-j JOBS] [--no-report] [--no-gnss] [--data] [--store] LOG|DIR ...
+#   python etscrapecli.py --query QUERY [--since DATE] [--until DATE] [--controller ID]
+# Directories are processed file by file, across a process pool.
+# Compressed log files (.gz, .xz, .bz2) are read as they are, and zip archives are read as the log files in them.
+# Output files are named from the log files, numbered if log files have the same name (see outputBaseNames).
+# Log files can also be added to the trip store, and events found in the store with an event query (see tripquery).
+# *******************************************
+
+# Logger for command line; messages go to stderr rather than the application log file.
+logger = logging.getLogger('etscrape')
+
+# *******************************************
+# Set up logger for command line.
+# *******************************************
+def setupLogger(level):
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(fmt='[%(name)s] [%(levelname)-8s] %(message)s', style='%'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+# *******************************************
+# Find log files to process.
+# Directories are expanded to the files in them matching the pattern, and zip archives to the log files in them.
+# *******************************************
+def findLogFiles(paths, pattern):
+    fileNames = []
+    for p in paths:
+        if os.path.isdir(p):
+            for name in sorted(os.listdir(p)):
+                fileName = os.path.join(p, name)
+                if os.path.isfile(fileName) and fnmatch.fnmatch(name, pattern):
+                    fileNames.append(fileName)
+        else:
+            fileNames.append(p)
+    return expandLogFiles(fileNames)
+
+# *******************************************
+# Make base names of output files for log files, unique so that outputs don't overwrite each other.
+# Log files in zip archives are prefixed with the archive name, e.g. "site.zip::1234.log" is "site-1234",
+# and any names still the same (e.g. "1234.log" and "1234.log.gz") are numbered, e.g. "1234-2".
+# Returns list of base names in the order of the log files.
+# *******************************************
+def outputBaseNames(fileNames):
+    baseNames = []
+    used = set()
+    for fileName in fileNames:
+        baseName = logBaseName(fileName)
+        archive, member = splitArchiveName(fileName)
+        if member is not None:
+            _, archiveName, _ = getFileParts(archive)
+            baseName = "{0:s}-{1:s}".format(archiveName, baseName)
+
+        # Output files may be on a case insensitive file system.
+        uniqueName = baseName
+        num = 1
+        while uniqueName.lower() in used:
+            num += 1
+            uniqueName = "{0:s}-{1:d}".format(baseName, num)
+        used.add(uniqueName.lower())
+        baseNames.append(uniqueName)
+    return baseNames
+
+# *******************************************
+# Read log file and write its report and GNSS log, and data tables if wanted.
+# Output files are named from the base name, in the output directory.
+# Options are the command line arguments; outdir, report, gnss, data and dataFormat.
+# Returns (log file, trips / power cycles read, if power cycles, error message) tuple.
+# *******************************************
+def processLog(config, fileName, baseName, options):
+    try:
+        reader = LogReader(config, logger, fileName)
+        reader.readLog()
+        logData = {
+            "controllerID" : reader.controllerID,
+            "firmwareVersion" : reader.firmwareVersion,
+            "tripLog" : reader.tripLog,
+            "zoneXLog" : reader.zoneXLog,
+            "contentHash" : reader.contentHash
+        }
+
+        # Add to the trip store, if enabled.
+        storeLog(config, logger, fileName, logData)
+
+        # No trips but maybe this is a Zoner, as in the application.
+        isZoner = (len(reader.tripLog) == 0) and (len(reader.zoneXLog) > 0)
+        if isZoner:
+            logs = reader.zoneXLog
+        else:
+            logs = reader.tripLog
+
+        if reader.controllerID is not None:
+            controllerID = reader.controllerID
+        else:
+            logger.warning("No Controller ID in log file : {0:s}".format(fileName))
+            controllerID = 0
+
+        if options.report:
+            with open(os.path.join(options.outdir, baseName + ".txt"), "w") as xf:
+                for t in logs:
+                    exportTrip(config, logger, xf, t, controllerID, isZoner)
+
+        if options.gnss:
+            # Only trips with valid GNSS data are exported, numbered in order.
+            tNo = 0
+            with open(os.path.join(options.outdir, baseName + ".csv"), "w") as xf:
+                for t in logs:
+                    if t.gnssLog.hasValidPosition():
+                        tNo += 1
+                        exportGnssLog(config, logger, xf, t, tNo, controllerID, isZoner)
+
+        if options.data:
+            exportData(config, logger, os.path.join(options.outdir, baseName), logData, options.dataFormat)
+
+        return (fileName, len(logs), isZoner, None)
+    except Exception as e:
+        logger.error("Failed to process log file : {0:s} : {1:s}".format(fileName, str(e)))
+        return (fileName, 0, False, str(e))
+
+# *******************************************
+# Make configuration, with the trip store enabled if a store file is given.
+# *******************************************
+def makeConfig(storeFile):
+    config = Config()
+    if storeFile is not None:
+        config.LogParsing["StoreLogs"] = 1
+        config.LogParsing["StoreFile"] = storeFile
+    return config
+
+# *******************************************
+# Find events in the trip store, and write them to stdout as csv.
+# Returns process exit status.
+# *******************************************
+def queryStore(storeFile, text, since, until, controllerID):
+    config = Config()
+    try:
+        query = TripQuery(config, text)
+        store = TripStore(config, logger, storeFile)
+        try:
+            events = store.findEvents(query, since, until, controllerID)
+        finally:
+            store.close()
+    except QueryError as e:
+        logger.error("Query error : {0:s}".format(str(e)))
+        return 1
+    except sqlite3.Error as e:
+        logger.error("Failed to query trip store : {0:s} : {1:s}".format(storeFile, str(e)))
+        return 1
+
+    out = csv.writer(sys.stdout)
+    out.writerow(["time", "controller", "firmware", "trip", "event", "details", "file"])
+    for ev in events:
+        details = " ".join("{0:s}={1}".format(k, v) for k, v in ev.details.items())
+        out.writerow([timeTZ(ev.serverTime, config.TimeUTC), ev.controllerID, ev.firmwareVersion, ev.tripStartId, ev.event, details, ev.fileName])
+    logger.info("Events found : {0:d}".format(len(events)))
+    return 0
+
+# *******************************************
+# Convert date (YYYY-MM-DD, UTC) argument to Unix time.
+# *******************************************
+def dateArg(text):
+    try:
+        return calendar.timegm(time.strptime(text, "%Y-%m-%d"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected date as YYYY-MM-DD : {0:s}".format(text))
+
+# *******************************************
+# Pool worker initializer.
+# Each worker process reads the configuration and sets up its logger once.
+# *******************************************
+def initWorker(level, storeFile):
+    global workerConfig
+    setupLogger(level)
+    workerConfig = makeConfig(storeFile)
+    # Log files are already read in parallel, one per worker.
+    workerConfig.LogParsing["ParallelWorkers"] = 0
+
+# *******************************************
+# Pool worker; process log file with worker configuration.
+# *******************************************
+def processLogWorker(fileName, baseName, options):
+    return processLog(workerConfig, fileName, baseName, options)
+
+# *******************************************
+# Command line entry point.
+# Returns process exit status, non zero if any log file failed.
+# *******************************************
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="etscrapecli", description="Write trip reports and GNSS logs of log files, without the GUI.")
+    parser.add_argument("paths", nargs="*", help="log files, or directories of log files")
+    parser.add_argument("-o", "--outdir", default=".", help="directory for reports and GNSS logs (default current directory)")
+    parser.add_argument("-p", "--pattern", default="*", help="pattern of log files in directories (default all files)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="log files to process at once (default number of CPUs)")
+    parser.add_argument("--no-report", dest="report", action="store_false", help="don't write trip reports")
+    parser.add_argument("--no-gnss", dest="gnss", action="store_false", help="don't write GNSS logs")
+    parser.add_argument("--data", action="store_true", help="write events and time series data tables")
+    parser.add_argument("--data-format", dest="dataFormat", choices=("parquet", "csv"), default=None,
+        help="format of data tables (default parquet if pyarrow is installed, otherwise csv)")
+    parser.add_argument("--store", action="store_true", help="add log files to the trip store")
+    parser.add_argument("--store-file", dest="storeFile", default=None, help="trip store file (default from configuration)")
+    parser.add_argument("-q", "--query", default=None, help="find events in the trip store matching query, e.g. 'IMPACT[severity = C]'")
+    parser.add_argument("--since", type=dateArg, default=None, help="only find events from date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=dateArg, default=None, help="only find events before date (YYYY-MM-DD)")
+    parser.add_argument("--controller", type=int, default=None, help="only find events of controller")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress messages")
+    args = parser.parse_args(argv)
+    if (args.dataFormat == "parquet") and (not parquetAvailable()):
+        parser.error("parquet data format needs pyarrow to be installed")
+
+    level = logging.INFO if args.verbose else logging.WARNING
+    setupLogger(level)
+
+    # Trip store file, for adding to or querying the store.
+    storeFile = args.storeFile if args.storeFile is not None else Config().LogParsing["StoreFile"]
+
+    if len(args.paths) == 0:
+        if args.query is None:
+            parser.error("log files or a query are required")
+        return queryStore(storeFile, args.query, args.since, args.until, args.controller)
+
+    fileNames = findLogFiles(args.paths, args.pattern)
+    if len(fileNames) == 0:
+        logger.error("No log files found.")
+        return 1
+    os.makedirs(args.outdir, exist_ok=True)
+    baseNames = outputBaseNames(fileNames)
+
+    # Single log file (or job) is processed here, and can use parallel parsing of the log file itself.
+    if (len(fileNames) == 1) or (args.jobs <= 1):
+        config = makeConfig(storeFile if args.store else None)
+        results = [processLog(config, fileName, baseName, args) for fileName, baseName in zip(fileNames, baseNames)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=initWorker, initargs=(level, (storeFile if args.store else None))) as pool:
+            results = list(pool.map(processLogWorker, fileNames, baseNames, [args] * len(fileNames)))
+
+    failed = 0
+    for fileName, numLogs, isZoner, error in results:
+        if error is None:
+            print("{0:s} : {1:d} {2:s}".format(fileName, numLogs, "power cycles" if isZoner else "trips"))
+        else:
+            print("{0:s} : failed : {1:s}".format(fileName, error))
+            failed += 1
+    if failed > 0:
+        return 1
+
+    # Query the store after adding the log files to it.
+    if args.query is not None:
+        return queryStore(storeFile, args.query, args.since, args.until, args.controller)
+    return 0
+
+if __name__ == "__main__":
+    # Allow worker processes to start from frozen executable.
+    multiprocessing.freeze_support()
+
+    sys.exit(main())
@@ -458,46 +458,34 @@ class EventCanvas(FigureCanvasQTAgg):
                 # Special vehicle event.
                 if t["Event"] == "Vehicle Speed":
                     # Update speed data.
-                    maxSpeed = 0
-                    for sl in tObj.speedLog:
-                        # Format time axis list in the correct timezone for display.
-                        tList.append(timeTZ(sl.time, self.cfg.TimeUTC))
-                        eList.append(sl.speed)
-                        # Get max speed for plot limits.
-                        if sl.speed > maxSpeed:
-                            maxSpeed = sl.speed
+                    series = tObj.speedLog
+                    values = series.column("speed")
+                    # Get max speed for plot limits.
+                    maxSpeed = max(max(values, default=0), 0)
                 elif t["Event"] == "Battery Voltage":
                     # Update battery voltage data.
-                    minBattery = 100.0
-                    maxBattery = 0.0
-                    for bl in tObj.batteryLevel:
-                        # Format time axis list in the correct timezone for display.
-                        tList.append(timeTZ(bl.time, self.cfg.TimeUTC))
-                        eList.append(bl.battery)
-                        # Get battery voltage for plot limits.
-                        if bl.battery > maxBattery:
-                            maxBattery = bl.battery
-                        if bl.battery < minBattery:
-                            minBattery = bl.battery
+                    series = tObj.batteryLevel
+                    values = series.column("battery")
+                    # Get battery voltage for plot limits.
+                    minBattery = min(min(values, default=100.0), 100.0)
+                    maxBattery = max(max(values, default=0.0), 0.0)
                 elif t["Event"] == "RSSI":
                     # Update RSSI data.
-                    for rl in tObj.rssiLog:
-                        # Format time axis list in the correct timezone for display.
-                        tList.append(timeTZ(rl.time, self.cfg.TimeUTC))
-                        eList.append(rl.rssi)
+                    series = tObj.rssiLog
+                    values = series.column("rssi")
                 elif t["Event"] == "GNSS Error":
                     # Update GNSS error data.
-                    minError = 100.0
-                    maxError = 0.0
-                    for gl in tObj.gnssLog:
-                        # Format time axis list in the correct timezone for display.
-                        tList.append(timeTZ(gl.time, self.cfg.TimeUTC))
-                        eList.append(gl.error)
-                        # Get GNSS Error for plot limits.
-                        if gl.error > maxError:
-                            maxError = gl.error
-                        if gl.error < minError:
-                            minError = gl.error
+                    series = tObj.gnssLog
+                    values = series.column("error")
+                    # Get GNSS Error for plot limits.
+                    minError = min(min(values, default=100.0), 100.0)
+                    maxError = max(max(values, default=0.0), 0.0)
+                else:
+                    series = None
+                if series is not None:
+                    # Format time axis list in the correct timezone for display.
+                    tList += [timeTZ(sTime, self.cfg.TimeUTC) for sTime in series.column("time")]
+                    eList += values
 
             # Clear old plot data.
             self.traces[self.numEvCharts - idx][0].set_xdata([])
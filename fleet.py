@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from logreader import *
+from logsource import *
+from logcache import *
+from tripstore import *
+
+# *******************************************
+# Log summary class.
+# Summary of a log file read as part of a fleet, small enough to pass back from worker processes.
+# *******************************************
+class LogSummary():
+    # Initializer / Instance Attributes
+    def __init__(self, fileName):
+
+        self.fileName = fileName
+
+        # Controller details from the log file; None if not found.
+        self.controllerID = None
+        self.firmwareVersion = None
+
+        # Trips, or power cycles if a Zoner.
+        self.isZoner = False
+        self.numLogs = 0
+        self.numEvents = 0
+
+        # Time span of trips / power cycles.
+        self.startTime = 0
+        self.endTime = 0
+
+        # Totals of some events of note.
+        self.numOverspeed = 0
+        self.numImpacts = 0
+        self.numUnbuckled = 0
+        self.numChecklist = 0
+
+        # Error message if log file couldn't be read.
+        self.error = None
+
+    # *******************************************
+    # Add up summary of trips / power cycles read from log file.
+    # *******************************************
+    def summarise(self, logData):
+        self.controllerID = logData["controllerID"]
+        self.firmwareVersion = logData["firmwareVersion"]
+
+        # No trips but maybe this is a Zoner, as in the application.
+        self.isZoner = (len(logData["tripLog"]) == 0) and (len(logData["zoneXLog"]) > 0)
+        if self.isZoner:
+            logs = logData["zoneXLog"]
+        else:
+            logs = logData["tripLog"]
+
+        self.numLogs = len(logs)
+        for t in logs:
+            self.numEvents += len(t.events)
+            if (t.tripStart != 0) and ((self.startTime == 0) or (t.tripStart < self.startTime)):
+                self.startTime = t.tripStart
+            self.endTime = max(self.endTime, t.tripEnd)
+
+            # Power cycles don't have vehicle or operator event totals.
+            self.numOverspeed += getattr(t, "numOverspeed", 0)
+            self.numImpacts += getattr(t, "numImpact_H", 0) + getattr(t, "numImpact_M", 0) + getattr(t, "numImpact_L", 0)
+            self.numUnbuckled += getattr(t, "numUnbuckled_O", 0) + getattr(t, "numUnbuckled_P", 0)
+            self.numChecklist += getattr(t, "numChecklist", 0)
+
+# *******************************************
+# Controller summary class.
+# Log files of a fleet grouped by controller.
+# *******************************************
+class ControllerSummary():
+    # Initializer / Instance Attributes
+    def __init__(self, controllerID):
+
+        self.controllerID = controllerID
+
+        # Log summaries of controller, in order added.
+        self.logs = []
+
+    # *******************************************
+    # Firmware versions of controller's log files, in the order seen.
+    # *******************************************
+    def firmwareVersions(self):
+        versions = []
+        for log in self.logs:
+            if (log.firmwareVersion is not None) and (log.firmwareVersion not in versions):
+                versions.append(log.firmwareVersion)
+        return versions
+
+    # *******************************************
+    # Total of summary attribute over controller's log files.
+    # *******************************************
+    def total(self, name):
+        return sum(getattr(log, name) for log in self.logs)
+
+    # *******************************************
+    # Time span of controller's log files.
+    # *******************************************
+    def startTime(self):
+        return min((log.startTime for log in self.logs if log.startTime != 0), default=0)
+
+    def endTime(self):
+        return max((log.endTime for log in self.logs), default=0)
+
+# *******************************************
+# Read and summarise log file.
+# Uses the log cache if enabled, and saves to it, so opening the log file afterwards is quick.
+# Also added to the trip store if enabled.
+# Runs in fleet worker processes, so errors are returned in the summary rather than raised.
+# *******************************************
+def summariseLog(config, logger, fileName):
+    summary = LogSummary(fileName)
+    try:
+        logData = None
+        if config.LogParsing["CacheLogs"]:
+            cache = LogCache(config, logger)
+            cacheKey = cache.makeKey(fileName)
+            logData = cache.load(cacheKey, fileName)
+
+        if logData is None:
+            reader = LogReader(config, logger, fileName)
+            reader.readLog()
+            logData = {
+                "controllerID" : reader.controllerID,
+                "firmwareVersion" : reader.firmwareVersion,
+                "tripLog" : reader.tripLog,
+                "zoneXLog" : reader.zoneXLog,
+                "contentHash" : reader.contentHash,
+                "tailMark" : reader.tailMark()
+            }
+            if config.LogParsing["CacheLogs"]:
+                cache.save(cacheKey, logData)
+
+        # Add to the trip store, if enabled; already stored log files are skipped.
+        storeLog(config, logger, fileName, logData)
+
+        summary.summarise(logData)
+    except Exception as e:
+        logger.error("Failed to read log file : {0:s} : {1:s}".format(fileName, str(e)))
+        summary.error = str(e)
+    return summary
+
+# *******************************************
+# Fleet log class.
+# Reads many log files (e.g. a site's controllers) concurrently across worker processes,
+# and groups their summaries by controller.
+# *******************************************
+class FleetLog():
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger):
+
+        self.cfg = config
+        self.logger = logger
+
+        self.logger.debug("FleetLog class constructor.")
+
+        # Summaries of log files read, in the order read.
+        self.summaries = []
+
+        # Optional progress callback, called with each log summary as it is read.
+        self.progress = None
+
+        # Set to cancel reading.
+        self.cancelled = False
+
+    # *******************************************
+    # Find log files to read.
+    # Directories are expanded to the files in them (not sub-directories),
+    # and zip archives to the log files in them.
+    # *******************************************
+    def findLogFiles(self, paths):
+        fileNames = []
+        for p in paths:
+            if os.path.isdir(p):
+                for name in sorted(os.listdir(p)):
+                    fileName = os.path.join(p, name)
+                    if os.path.isfile(fileName):
+                        fileNames.append(fileName)
+            elif os.path.isfile(p):
+                fileNames.append(p)
+        return expandLogFiles(fileNames)
+
+    # *******************************************
+    # Read log files, a log file per worker process.
+    # Number of workers is the FleetWorkers setting, or the number of CPUs if 0.
+    # Returns list of log summaries; in the order read, not the order given.
+    # *******************************************
+    def readLogs(self, fileNames):
+        # Each log file is read by a single worker, so don't split log files across more workers.
+        workerConfig = copy.deepcopy(self.cfg)
+        workerConfig.LogParsing["ParallelWorkers"] = 0
+
+        workers = self.cfg.LogParsing["FleetWorkers"]
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(fileNames))
+
+        self.summaries = []
+        if workers <= 1:
+            for fileName in fileNames:
+                if self.cancelled:
+                    break
+                self.addSummary(summariseLog(workerConfig, self.logger, fileName))
+            return self.summaries
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(summariseLog, workerConfig, self.logger, fileName) for fileName in fileNames]
+            for future in as_completed(futures):
+                if self.cancelled:
+                    for f in futures:
+                        f.cancel()
+                    break
+                self.addSummary(future.result())
+        return self.summaries
+
+    # *******************************************
+    # Add log summary, and report progress.
+    # *******************************************
+    def addSummary(self, summary):
+        self.summaries.append(summary)
+        if self.progress is not None:
+            self.progress(summary)
+
+    # *******************************************
+    # Cancel reading of log files.
+    # Log files already being read by workers are finished, but not reported.
+    # *******************************************
+    def cancel(self):
+        self.cancelled = True
+
+    # *******************************************
+    # Group log summaries by controller.
+    # Returns list of controller summaries in controller ID order; log files without a controller ID are last.
+    # *******************************************
+    def controllers(self):
+        controllers = {}
+        for summary in self.summaries:
+            if summary.controllerID not in controllers:
+                controllers[summary.controllerID] = ControllerSummary(summary.controllerID)
+            controllers[summary.controllerID].logs.append(summary)
+        for c in controllers.values():
+            c.logs.sort(key=lambda log: (log.startTime, log.fileName))
+        return sorted(controllers.values(), key=lambda c: (c.controllerID is None, c.controllerID or 0))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import hashlib
+import logging
+import os
+import pickle
+
+from tripinfo import *
+from logsource import *
+
+# *******************************************
+# Hash of log file contents.
+# The file is hashed in chunks, so large logs are not read into memory.
+# Compressed log files are hashed decompressed, so a log file has the same hash however it is archived.
+# *******************************************
+def fileHash(fileName):
+    contentHash = hashlib.sha256()
+    with LogStream(fileName) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            contentHash.update(chunk)
+    return contentHash.hexdigest()
+
+# *******************************************
+# Parsed log file cache class.
+# Saves the extracted trips / power cycles of a log file to disk, so reopening the log doesn't parse it again.
+# Cache entries are keyed by the log file name, size, modification time, the parser version and the configuration
+# the extracted data depends on (e.g. alert limits, which can be changed in preferences), so finding
+# an entry doesn't need the log file to be read; the log data holds the content hash of the log file, which is
+# checked when an entry is found, in case the log file changed without its size or modification time changing.
+# Least recently used entries are removed when the cache exceeds its maximum size.
+# *******************************************
+class LogCache():
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger):
+
+        self.cfg = config
+        self.logger = logger
+
+        self.logger.debug("LogCache class constructor.")
+
+        self.cacheDir = self.cfg.LogParsing["CacheDir"]
+        self.maxSize = self.cfg.LogParsing["CacheMaxSize"]
+
+    # *******************************************
+    # Make cache key for log file.
+    # *******************************************
+    def makeKey(self, fileName):
+        # Log files in zip archives have the size and modification time of the archive.
+        st = os.stat(logDiskFile(fileName))
+        key = "{0:s}-{1:d}-{2:d}-{3:d}-{4:s}".format(os.path.abspath(fileName), st.st_size, st.st_mtime_ns, parserVersion, repr(parserConfig(self.cfg)))
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    # *******************************************
+    # Cache entry file name for key.
+    # *******************************************
+    def entryFile(self, key):
+        return os.path.join(self.cacheDir, key + ".pkl")
+
+    # *******************************************
+    # Load cached log data.
+    # The log file is only hashed if it has a cache entry, to check it is the log file that was cached.
+    # Returns dictionary of log data, or None if log not cached.
+    # *******************************************
+    def load(self, key, fileName):
+        entry = self.entryFile(key)
+        if not os.path.isfile(entry):
+            self.logger.debug("Log file not in cache.")
+            return None
+
+        try:
+            with open(entry, "rb") as f:
+                logData = pickle.load(f)
+        except Exception:
+            # Corrupt or out of date entry, so remove it and parse log again.
+            self.logger.warning("Failed to load cache entry : {0:s}".format(entry))
+            self.removeEntry(entry)
+            return None
+
+        if logData.get("contentHash") != fileHash(fileName):
+            self.logger.info("Log file changed since cached : {0:s}".format(fileName))
+            self.removeEntry(entry)
+            return None
+
+        # Cached trips / power cycles use our configuration and logger.
+        for log in logData["tripLog"] + logData["zoneXLog"]:
+            log.cfg = self.cfg
+            log.logger = self.logger
+
+        # Touch the entry so that it is the most recently used.
+        os.utime(entry)
+
+        self.logger.info("Loaded log file from cache : {0:s}".format(entry))
+        return logData
+
+    # *******************************************
+    # Save log data to cache.
+    # Log data is dictionary of controllerID, firmwareVersion, tripLog, zoneXLog, contentHash and tailMark.
+    # Configuration and logger of trips / power cycles are not cached; reattached when loaded.
+    # *******************************************
+    def save(self, key, logData):
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+
+            # Write to temporary file first, so a failed save doesn't leave a partial entry.
+            entry = self.entryFile(key)
+            tmpEntry = entry + ".tmp"
+            with open(tmpEntry, "wb") as f:
+                pickle.dump(logData, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpEntry, entry)
+            self.logger.info("Saved log file to cache : {0:s}".format(entry))
+        except Exception:
+            self.logger.warning("Failed to save log file to cache.")
+
+        self.evict()
+
+    # *******************************************
+    # Remove least recently used entries until the cache is within its maximum size.
+    # *******************************************
+    def evict(self):
+        try:
+            entries = []
+            for name in os.listdir(self.cacheDir):
+                if name.endswith(".pkl"):
+                    st = os.stat(os.path.join(self.cacheDir, name))
+                    entries.append((st.st_mtime, st.st_size, os.path.join(self.cacheDir, name)))
+        except Exception:
+            return
+
+        # Oldest entries first.
+        entries.sort()
+        totalSize = sum(e[1] for e in entries)
+        for mtime, size, entry in entries:
+            if totalSize <= self.maxSize:
+                break
+            self.logger.debug("Evicting cache entry : {0:s}".format(entry))
+            self.removeEntry(entry)
+            totalSize -= size
+
+    # *******************************************
+    # Remove cache entry.
+    # *******************************************
+    def removeEntry(self, entry):
+        try:
+            os.remove(entry)
+        except Exception:
+            self.logger.warning("Failed to remove cache entry : {0:s}".format(entry))
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+
+import hashlib
+import logging
+import mmap
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from patterns import *
+from tripinfo import *
+from logsource import *
+
+# Logger for worker processes.
+workerLogger = logging.getLogger('etscrape.worker')
+
+# *******************************************
+# Log read cancelled exception.
+# Raised out of readLog when the read is cancelled part way through.
+# *******************************************
+class LogReadCancelled(Exception):
+    pass
+
+# Prescan keywords, and the line pattern of each in a memory mapped log file.
+prescanKeywords = ((b"UNIT ", cntrlIdBytesPattern), (b"SWSTART", cntrlFirmwareBytesPattern),
+                   (b"SIGNON", tripStartBytesPattern), (b"IGN_ON", powerCycleStartBytesPattern))
+
+# *******************************************
+# Change index class.
+# Values (e.g. firmware version) in log order, with the position each one changed at.
+# Looked up by binary search, so any trip can get the value in force at its start.
+# *******************************************
+class ChangeIndex():
+    # Initializer / Instance Attributes
+    def __init__(self):
+
+        # Positions of changes, and the values changed to.
+        self.positions = []
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    # *******************************************
+    # Add value found at position; only kept if it is a change.
+    # *******************************************
+    def add(self, position, value):
+        if (len(self.values) == 0) or (self.values[-1] != value):
+            self.positions.append(position)
+            self.values.append(value)
+
+    # *******************************************
+    # First value, or None if there are none.
+    # *******************************************
+    def first(self):
+        return self.values[0] if len(self.values) > 0 else None
+
+    # *******************************************
+    # Value in force at position.
+    # Before the first change the first value is used, as it will have been in force before the log started.
+    # *******************************************
+    def at(self, position):
+        idx = bisect_right(self.positions, position) - 1
+        if idx < 0:
+            return self.first()
+        return self.values[idx]
+
+# *******************************************
+# Log prescan class.
+# Finds where the log is split into trips / power cycles, and the controller ID and firmware version
+# lines, in a single pass over the log.
+# Positions are byte offsets in a memory mapped log file, or line numbers in a streamed log file;
+# either way they are in log order.
+# *******************************************
+class LogPrescan():
+    # Initializer / Instance Attributes
+    def __init__(self):
+
+        # Starts of trips and Zoner power cycles.
+        self.tripStarts = []
+        self.powerCycleStarts = []
+
+        # Controller ID and firmware version changes.
+        self.controllerIDs = ChangeIndex()
+        self.firmwareVersions = ChangeIndex()
+
+    # *******************************************
+    # Check if log is from a Zoner; i.e. power cycles but no trips.
+    # *******************************************
+    def isZoner(self):
+        return (len(self.tripStarts) == 0) and (len(self.powerCycleStarts) > 0)
+
+    # *******************************************
+    # Starts of trips, or power cycles if a Zoner.
+    # *******************************************
+    def logStarts(self):
+        if self.isZoner():
+            return self.powerCycleStarts
+        return self.tripStarts
+
+    # *******************************************
+    # First controller ID and firmware version in the log, or None if not found.
+    # *******************************************
+    def controllerID(self):
+        return self.controllerIDs.first()
+
+    def firmwareVersion(self):
+        return self.firmwareVersions.first()
+
+    # *******************************************
+    # Scan memory mapped log file from the start offset.
+    # Keywords are found with mmap find, which is much quicker than a regex over the whole file,
+    # and each keyword line is matched once against the patterns of all the keywords in it.
+    # *******************************************
+    def scanMapped(self, mm, startOffset=0):
+        # Next occurrence of each keyword.
+        found = [mm.find(keyword, startOffset) for keyword, pattern in prescanKeywords]
+        while True:
+            pos = min((p for p in found if p >= 0), default=-1)
+            if pos < 0:
+                break
+            lineStart = mm.rfind(b"\n", 0, pos) + 1
+            lineEnd = mm.find(b"\n", pos)
+            if lineEnd < 0:
+                lineEnd = len(mm)
+            line = mm[lineStart:lineEnd]
+
+            for idx, (keyword, pattern) in enumerate(prescanKeywords):
+                if 0 <= found[idx] < lineEnd:
+                    lm = pattern.search(line)
+                    if lm and ((lineStart + lm.start(0)) >= startOffset):
+                        self.addMatch(keyword, lineStart + lm.start(0), lm)
+                    found[idx] = mm.find(keyword, lineEnd)
+
+    # *******************************************
+    # Add match of keyword line pattern (bytes or text) at position.
+    # *******************************************
+    def addMatch(self, keyword, position, lm):
+        if keyword == b"UNIT ":
+            self.controllerIDs.add(position, int(lm.group("id")))
+        elif keyword == b"SWSTART":
+            version = lm.group("version")
+            self.firmwareVersions.add(position, decodeLine(version) if isinstance(version, bytes) else version)
+        elif keyword == b"SIGNON":
+            self.tripStarts.append(position)
+        else:
+            self.powerCycleStarts.append(position)
+
+# *******************************************
+# Log file reader class.
+# Streams the log file bytes line by line, splitting it into trips (or Zoner power cycles) as it goes.
+# Compressed log files, and log files in zip archives, are decompressed as they are streamed.
+# Each trip is extracted as soon as it is complete, so only one trip buffer is held at a time.
+# Alternatively the log file can be memory mapped, with each trip given a view of the mapped file.
+# Trip data can be extracted in parallel by a pool of worker processes, with trips kept in log order.
+# Progress is reported as each trip is added, and the read can be cancelled between trips.
+# *******************************************
+class LogReader():
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, fileName):
+
+        self.cfg = config
+        self.logger = logger
+        self.fileName = fileName
+
+        self.logger.debug("LogReader class constructor.")
+
+        # Controller details; first instance in log.
+        self.controllerID = None
+        self.firmwareVersion = None
+
+        # Trip / power cycle starts and controller details found in the log.
+        self.prescan = LogPrescan()
+
+        # Extracted trips and Zoner power cycles.
+        self.tripLog = []
+        self.zoneXLog = []
+
+        # Indicate if log is from a Zoner.
+        self.isZoner = False
+
+        # Offset in log file to start reading from.
+        self.startOffset = 0
+
+        # Log file size, and offset in log file of the end of the last trip / power cycle read.
+        self.fileSize = 0
+        self.position = 0
+
+        # Hash of the (decompressed) log file contents, as for the log cache and trip store.
+        # Hashed as the log file is read, so only known once the whole log file has been read.
+        self.contentHash = None
+        self.readHash = None
+
+        # Offset in log file of the end of what was read, and the start of the last trip / power cycle read
+        # with the hash state of the log file before it; for marking the log file tail.
+        self.readEnd = 0
+        self.tripTail = None
+        self.zoneTail = None
+        self.lastStart = None
+
+        # Optional progress callback, passed the trips / power cycles added, and the position in the log file.
+        self.progress = None
+
+        # Set (from any thread) to cancel reading.
+        self.cancelled = False
+
+        # Worker processes for parallel extraction, and extraction jobs in progress (in log order).
+        self.workers = 0
+        self.executor = None
+        self.pending = deque()
+
+    # *******************************************
+    # Read log file, extracting all trips / power cycles.
+    # Reading can start part way through the file, at the start of a trip / power cycle, to get only new trips;
+    # the controller details in force at the start offset can be given, as they won't be read again.
+    # The hash state of the log file before the start offset can be given too, to carry on the content hash.
+    # Large log files are extracted in parallel if worker processes are configured.
+    # *******************************************
+    def readLog(self, startOffset=0, controllerID=None, firmwareVersion=None, startHash=None):
+        self.startOffset = startOffset
+        self.prescan = LogPrescan()
+        if controllerID is not None:
+            self.prescan.controllerIDs.add(-1, controllerID)
+        if firmwareVersion is not None:
+            self.prescan.firmwareVersions.add(-1, firmwareVersion)
+        self.setControllerDetails()
+        self.position = startOffset
+        self.fileSize = logFileSize(self.fileName)
+        self.contentHash = None
+        if startHash is not None:
+            self.readHash = startHash.copy()
+        elif startOffset == 0:
+            self.readHash = hashlib.sha256()
+        else:
+            self.readHash = None
+        self.readEnd = startOffset
+        self.tripTail = self.markStart(None, startOffset, b"")
+        self.zoneTail = self.tripTail
+        self.workers = self.cfg.LogParsing["ParallelWorkers"]
+        if (self.workers > 1) and (self.fileSize >= self.cfg.LogParsing["ParallelMinFileSize"]):
+            self.logger.info("Extracting trip data using {0:d} worker processes.".format(self.workers))
+            with ProcessPoolExecutor(max_workers=self.workers) as self.executor:
+                try:
+                    self.readLogFile()
+
+                    # Collect the remaining jobs.
+                    while len(self.pending) > 0:
+                        self.collectJob()
+                except LogReadCancelled:
+                    # Don't wait for jobs not yet started.
+                    self.cancelJobs()
+                    raise
+                finally:
+                    self.executor = None
+        else:
+            self.readLogFile()
+
+        if self.readHash is not None:
+            self.contentHash = self.readHash.hexdigest()
+        self.lastStart = self.zoneTail if self.isZoner else self.tripTail
+
+    # *******************************************
+    # Mark start of trip / power cycle, from the hash state of the log file before its line.
+    # Returns (start offset, hash state of the log file before the start) tuple; hash state is None if not hashing.
+    # *******************************************
+    def markStart(self, lineHash, offset, linePrefix):
+        if self.readHash is None:
+            return (offset, None)
+        if lineHash is None:
+            lineHash = self.readHash.copy()
+        lineHash.update(linePrefix)
+        return (offset, lineHash)
+
+    # *******************************************
+    # Mark of the log file tail; where the last trip / power cycle read starts, the hash of the log file
+    # before it, and the end of what was read. Kept with the log data, so a cached log can be refreshed too.
+    # Returns (start offset, prefix hash, read end) tuple, or None if the log file wasn't hashed.
+    # *******************************************
+    def tailMark(self):
+        if (self.lastStart is None) or (self.lastStart[1] is None):
+            return None
+        return (self.lastStart[0], self.lastStart[1].digest(), self.readEnd)
+
+    # *******************************************
+    # Cancel reading of log file.
+    # Reading stops when the next trip / power cycle is added.
+    # *******************************************
+    def cancel(self):
+        self.cancelled = True
+
+    # *******************************************
+    # Read log file, either memory mapped or streamed.
+    # Compressed log files are always streamed, decompressing them as they are read.
+    # *******************************************
+    def readLogFile(self):
+        if self.cfg.LogParsing["MemoryMapLogs"] and (not isCompressedLog(self.fileName)):
+            self.readMappedLog()
+        else:
+            self.readStreamedLog()
+
+    # *******************************************
+    # Read and split log file, extracting all trips / power cycles.
+    # *******************************************
+    def readStreamedLog(self):
+        # Lines of the trip / power cycle currently being read.
+        # None until the first trip / power cycle start is found.
+        tripLines = None
+        zoneLines = None
+
+        # Zoner power cycles are only wanted if there are no trips in the log.
+        haveTrips = False
+
+        # Lines are kept as bytes; only event lines are decoded, and only in part, when the trip is extracted.
+        with LogStream(self.fileName) as logFile:
+            logFile.seek(self.startOffset)
+            for lineNo, line in enumerate(logFile):
+                # Offset of line in log file, and hash state before it if it may start a trip / power cycle.
+                lineOffset = self.readEnd
+                self.readEnd += len(line)
+                lineHash = None
+                if self.readHash is not None:
+                    if (b"SIGNON" in line) or (b"IGN_ON" in line):
+                        lineHash = self.readHash.copy()
+                    self.readHash.update(line)
+
+                # Look for controller ID.
+                if b"UNIT " in line:
+                    cid = cntrlIdBytesPattern.search(line)
+                    if cid:
+                        self.prescan.addMatch(b"UNIT ", lineNo, cid)
+                        self.setControllerDetails()
+
+                # Look for controller firmware version.
+                if b"SWSTART" in line:
+                    cfw = cntrlFirmwareBytesPattern.search(line)
+                    if cfw:
+                        self.prescan.addMatch(b"SWSTART", lineNo, cfw)
+                        self.setControllerDetails()
+
+                # Look for start of next trip.
+                if b"SIGNON" in line:
+                    st = tripStartBytesPattern.search(line)
+                    if st:
+                        self.prescan.addMatch(b"SIGNON", lineNo, st)
+                        self.tripTail = self.markStart(lineHash, lineOffset + st.start(0), line[:st.start(0)])
+                        # Rest of the line before the start belongs to the previous trip.
+                        if tripLines is not None:
+                            tripLines.append(line[:st.start(0)])
+                            self.position = logFile.position()
+                            self.addTrip(tripLines)
+                        tripLines = [line[st.start(0):]]
+                        if not haveTrips:
+                            # Now know this is not a Zoner log so drop any power cycles.
+                            haveTrips = True
+                            zoneLines = None
+                            self.dropZoneX()
+                        continue
+
+                if tripLines is not None:
+                    tripLines.append(line)
+
+                # Look for start of next Zoner power cycle (only if no trips found yet).
+                if not haveTrips:
+                    if b"IGN_ON" in line:
+                        st = powerCycleStartBytesPattern.search(line)
+                        if st:
+                            self.prescan.addMatch(b"IGN_ON", lineNo, st)
+                            self.zoneTail = self.markStart(lineHash, lineOffset + st.start(0), line[:st.start(0)])
+                            # Rest of the line before the start belongs to the previous power cycle.
+                            if zoneLines is not None:
+                                zoneLines.append(line[:st.start(0)])
+                                self.position = logFile.position()
+                                self.addZoneX(zoneLines)
+                            zoneLines = [line[st.start(0):]]
+                            continue
+
+                    if zoneLines is not None:
+                        zoneLines.append(line)
+
+        # Update last trip / power cycle to end of file.
+        self.position = self.fileSize
+        if tripLines is not None:
+            self.addTrip(tripLines)
+        elif zoneLines is not None:
+            self.addZoneX(zoneLines)
+            self.isZoner = True
+
+    # *******************************************
+    # Memory map log file, extracting all trips / power cycles.
+    # Each trip / power cycle is given a view of its part of the mapped file rather than a copy.
+    # *******************************************
+    def readMappedLog(self):
+        with open(self.fileName, "rb") as f:
+            # Can't map an empty file, and there is nothing in it anyway.
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Find controller details and trip / power cycle starts.
+                self.prescan.scanMapped(mm, self.startOffset)
+                self.setControllerDetails()
+
+                with memoryview(mm) as logView:
+                    isZoner = self.prescan.isZoner()
+                    edges = self.prescan.logStarts() + [len(mm)]
+                    self.readEnd = len(mm)
+                    # Hash the log file up to the first trip / power cycle, then each as it is read.
+                    if self.readHash is not None:
+                        self.readHash.update(logView[self.startOffset:edges[0]])
+                    if len(edges) > 1:
+                        for idx in range(len(edges) - 1):
+                            self.position = edges[idx + 1]
+                            if isZoner:
+                                self.zoneTail = self.markStart(None, edges[idx], b"")
+                            else:
+                                self.tripTail = self.markStart(None, edges[idx], b"")
+                            if self.readHash is not None:
+                                self.readHash.update(logView[edges[idx]:edges[idx + 1]])
+                            if self.executor is None:
+                                self.appendLog(extractLog(self.cfg, self.logger, logView[edges[idx]:edges[idx + 1]], isZoner), isZoner)
+                            else:
+                                # Workers map the file for themselves.
+                                self.submitJob(isZoner, extractMappedLogJob, self.cfg, self.fileName, edges[idx], edges[idx + 1], isZoner)
+                        self.isZoner = isZoner
+
+    # *******************************************
+    # Set controller details of the log from the first found.
+    # *******************************************
+    def setControllerDetails(self):
+        self.controllerID = self.prescan.controllerID()
+        self.firmwareVersion = self.prescan.firmwareVersion()
+
+    # *******************************************
+    # Extract trip data from trip lines and add trip to trip log.
+    # *******************************************
+    def addTrip(self, lines):
+        self.addLog(b"".join(lines), False)
+
+    # *******************************************
+    # Extract power cycle data from power cycle lines and add to Zoner log.
+    # *******************************************
+    def addZoneX(self, lines):
+        self.addLog(b"".join(lines), True)
+
+    # *******************************************
+    # Extract trip / power cycle data from buffer.
+    # Extracted by a worker process if extracting in parallel.
+    # *******************************************
+    def addLog(self, logBuf, isZoner):
+        if self.executor is None:
+            self.appendLog(extractLog(self.cfg, self.logger, logBuf, isZoner), isZoner)
+        else:
+            self.submitJob(isZoner, extractLogJob, self.cfg, logBuf, isZoner)
+
+    # *******************************************
+    # Add extracted trip / power cycle to trip log / Zoner log.
+    # *******************************************
+    def appendLog(self, log, isZoner):
+        # Stop reading if cancelled.
+        if self.cancelled:
+            raise LogReadCancelled()
+
+        # Make sure trips extracted by worker processes use our configuration and logger.
+        log.cfg = self.cfg
+        log.logger = self.logger
+
+        # Controller details in force at the start of the trip / power cycle.
+        # Trips / power cycles are added in log order, so the start is the next one found by the prescan.
+        if isZoner:
+            start = self.prescan.powerCycleStarts[len(self.zoneXLog)]
+        else:
+            start = self.prescan.tripStarts[len(self.tripLog)]
+        log.controllerID = self.prescan.controllerIDs.at(start)
+        log.firmwareVersion = self.prescan.firmwareVersions.at(start)
+
+        if isZoner:
+            self.zoneXLog.append(log)
+        else:
+            self.tripLog.append(log)
+
+        # Report progress.
+        if self.progress is not None:
+            self.progress(len(self.zoneXLog) if isZoner else len(self.tripLog), self.position)
+
+    # *******************************************
+    # Submit extraction job to worker processes.
+    # *******************************************
+    def submitJob(self, isZoner, job, *args):
+        self.pending.append((isZoner, self.position, self.executor.submit(job, *args)))
+
+        # Limit the jobs in progress so that buffers waiting for a worker don't build up.
+        if len(self.pending) > (self.workers * 4):
+            self.collectJob()
+
+    # *******************************************
+    # Wait for oldest extraction job and add its trip / power cycle.
+    # *******************************************
+    def collectJob(self):
+        isZoner, self.position, future = self.pending.popleft()
+        self.appendLog(future.result(), isZoner)
+
+    # *******************************************
+    # Drop Zoner power cycles, including any still being extracted.
+    # *******************************************
+    def dropZoneX(self):
+        self.cancelJobs()
+        self.zoneXLog = []
+
+    # *******************************************
+    # Cancel extraction jobs not yet started, and forget any in progress.
+    # *******************************************
+    def cancelJobs(self):
+        for isZoner, position, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+
+# *******************************************
+# Log file tail class.
+# Remembers where the last (possibly still open) trip / power cycle of a log file starts.
+# If the log file has only been added to since, just the last trip / power cycle and
+# any new ones need to be read again.
+# The tail is marked from the log reader's view of the log file (its tail mark), not by looking at the
+# log file again, as trips / power cycles may have been added to it since it was read.
+# *******************************************
+class LogTail():
+    # Initializer / Instance Attributes
+    def __init__(self, logger, fileName, tailMark, contentHash):
+
+        self.logger = logger
+        self.fileName = fileName
+
+        self.logger.debug("LogTail class constructor.")
+
+        # Start of last trip / power cycle, and hash of the log file before it.
+        self.startOffset = 0
+        self.prefixHash = None
+
+        # Hash state of the log file before the last trip / power cycle, once checked as only added to.
+        # Given to the log reader reading the rest of the log file, to carry on the content hash.
+        self.checkedHash = None
+
+        # Content hash of the whole log file (hex digest) as read.
+        self.contentHash = None
+
+        # Log file size as read, and modification time when marked.
+        self.fileSize = 0
+        self.fileTime = 0
+
+        self.markLog(tailMark, contentHash)
+
+    # *******************************************
+    # Mark start of last trip / power cycle in log file.
+    # Tail mark is (start offset, prefix hash, read end) tuple, as from the log reader.
+    # *******************************************
+    def markLog(self, tailMark, contentHash):
+        self.startOffset, self.prefixHash, self.fileSize = tailMark
+        self.contentHash = contentHash
+        self.checkedHash = None
+
+        # If the log file has been added to since it was read its size won't match, so it is still seen as changed.
+        try:
+            self.fileTime = os.stat(self.fileName).st_mtime_ns
+        except Exception:
+            self.fileTime = 0
+        self.logger.debug("Last trip / power cycle starts at offset : {0:d}".format(self.startOffset))
+
+    # *******************************************
+    # Check if log file has changed since last read.
+    # *******************************************
+    def hasChanged(self):
+        try:
+            st = os.stat(self.fileName)
+        except Exception:
+            return False
+        return (st.st_size != self.fileSize) or (st.st_mtime_ns != self.fileTime)
+
+    # *******************************************
+    # Check if log file has only been added to since last read.
+    # i.e. everything before the last trip / power cycle is unchanged.
+    # If so the hash state is kept, so that reading the rest of the log file carries on from it.
+    # *******************************************
+    def isAppended(self):
+        self.checkedHash = None
+        try:
+            with open(self.fileName, "rb") as f:
+                if os.fstat(f.fileno()).st_size < self.fileSize:
+                    return False
+                prefixHash = hashlib.sha256()
+                remaining = self.startOffset
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        return False
+                    prefixHash.update(chunk)
+                    remaining -= len(chunk)
+        except Exception:
+            return False
+        if prefixHash.digest() != self.prefixHash:
+            return False
+        self.checkedHash = prefixHash
+        return True
+
+# *******************************************
+# Extract trip / power cycle data from buffer.
+# *******************************************
+def extractLog(config, logger, logBuf, isZoner):
+    if isZoner:
+        log = ZoneX(config, logger, logBuf)
+        log.extractZoneData()
+    else:
+        log = Trip(config, logger, logBuf)
+        log.extractTripData()
+    return log
+
+# *******************************************
+# Worker process job to extract trip / power cycle data from buffer.
+# *******************************************
+def extractLogJob(config, logBuf, isZoner):
+    # Configuration and logger are not sent back (not pickled); reader uses its own.
+    return extractLog(config, workerLogger, logBuf, isZoner)
+
+# *******************************************
+# Worker process job to extract trip / power cycle data from part of memory mapped log file.
+# *******************************************
+def extractMappedLogJob(config, fileName, start, end, isZoner):
+    with open(fileName, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as logView:
+                # Configuration and logger are not sent back (not pickled); reader uses its own.
+                return extractLog(config, workerLogger, logView[start:end], isZoner)
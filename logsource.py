@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import bz2
+import gzip
+import lzma
+import os
+import zipfile
+
+from utils import *
+
+# *******************************************
+# Log file sources.
+# Log files can be compressed (gzip, xz or bzip2), or be in zip archives, as controller logs are archived.
+# They are decompressed as they are read, without being extracted to disk first.
+# A log file in a zip archive is named by the archive and the member, e.g. "site.zip::logs/1234.log".
+# *******************************************
+
+# Openers of compressed log files, by extension.
+compressedOpeners = {".gz" : gzip.open, ".xz" : lzma.open, ".bz2" : bz2.open}
+
+# Separator of zip archive and member in log file names.
+archiveSeparator = "::"
+
+# *******************************************
+# Split log file name into zip archive and member.
+# Returns (archive, member) tuple; member is None if the log file is not in a zip archive.
+# *******************************************
+def splitArchiveName(fileName):
+    archive, sep, member = fileName.partition(archiveSeparator)
+    if (sep == "") or (not archive.lower().endswith(".zip")):
+        return (fileName, None)
+    return (archive, member)
+
+# *******************************************
+# Check if file is a zip archive (of log files).
+# *******************************************
+def isArchive(fileName):
+    return fileName.lower().endswith(".zip") and os.path.isfile(fileName)
+
+# *******************************************
+# Check if log file is compressed or in a zip archive, i.e. can't be memory mapped or read from an offset.
+# *******************************************
+def isCompressedLog(fileName):
+    archive, member = splitArchiveName(fileName)
+    if member is not None:
+        return True
+    _, _, ext = getFileParts(fileName)
+    return ext.lower() in compressedOpeners
+
+# *******************************************
+# Get names of the log files in a zip archive, in archive order.
+# *******************************************
+def archiveLogFiles(fileName):
+    with zipfile.ZipFile(fileName) as zf:
+        return [fileName + archiveSeparator + info.filename for info in zf.infolist() if not info.is_dir()]
+
+# *******************************************
+# Expand zip archives in list of log files to the log files in them.
+# *******************************************
+def expandLogFiles(fileNames):
+    expanded = []
+    for fileName in fileNames:
+        if isArchive(fileName):
+            expanded.extend(archiveLogFiles(fileName))
+        else:
+            expanded.append(fileName)
+    return expanded
+
+# *******************************************
+# Get base name of log file, without the compression extension.
+# e.g. "site/1234.log.gz" and "site.zip::logs/1234.log" are both "1234".
+# *******************************************
+def logBaseName(fileName):
+    archive, member = splitArchiveName(fileName)
+    if member is not None:
+        fileName = member
+    _, baseName, ext = getFileParts(fileName)
+    if ext.lower() in compressedOpeners:
+        _, baseName, _ = getFileParts(baseName)
+    return baseName
+
+# *******************************************
+# Log stream class.
+# Binary stream of a log file's lines, decompressing the log file as it is read if it is compressed.
+# Progress through the log file is the position in the file on disk for compressed files (as their
+# decompressed size isn't known), and the position in the decompressed member for zip archive members.
+# *******************************************
+class LogStream():
+    # Initializer / Instance Attributes
+    def __init__(self, fileName):
+
+        self.fileName = fileName
+
+        archive, member = splitArchiveName(fileName)
+        if member is not None:
+            # Member stream keeps the archive file open until it is closed.
+            with zipfile.ZipFile(archive) as zf:
+                info = zf.getinfo(member)
+                self.stream = zf.open(info)
+            self.file = None
+            self.size = info.file_size
+        else:
+            self.file = open(fileName, "rb")
+            self.size = os.fstat(self.file.fileno()).st_size
+            _, _, ext = getFileParts(fileName)
+            opener = compressedOpeners.get(ext.lower())
+            if opener is not None:
+                self.stream = opener(self.file)
+            else:
+                self.stream = self.file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    # *******************************************
+    # Read (decompressed) bytes from log file.
+    # *******************************************
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+    # *******************************************
+    # Skip to offset in (decompressed) log file.
+    # Compressed log files are decompressed up to the offset.
+    # *******************************************
+    def seek(self, offset):
+        if offset > 0:
+            self.stream.seek(offset)
+
+    # *******************************************
+    # Position in log file, for progress; out of the log file size.
+    # *******************************************
+    def position(self):
+        if self.file is None:
+            return self.stream.tell()
+        return self.file.tell()
+
+    # *******************************************
+    # Close log file, and the decompressor.
+    # *******************************************
+    def close(self):
+        self.stream.close()
+        if self.file is not None:
+            self.file.close()
+
+# *******************************************
+# Get size of log file, for progress; as for the log stream.
+# *******************************************
+def logFileSize(fileName):
+    archive, member = splitArchiveName(fileName)
+    if member is not None:
+        with zipfile.ZipFile(archive) as zf:
+            return zf.getinfo(member).file_size
+    return os.path.getsize(fileName)
+
+# *******************************************
+# Get name of file on disk holding log file; the zip archive for archive members.
+# *******************************************
+def logDiskFile(fileName):
+    archive, member = splitArchiveName(fileName)
+    return archive
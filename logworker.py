@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+import copy
+import time
+
+from PyQt5 import QtCore
+
+from logreader import *
+from logsource import *
+from logcache import *
+from fleet import *
+from tripstore import *
+
+# *******************************************
+# Log file worker thread class.
+# Reads (or loads from the cache) a log file away from the GUI thread so that the window stays responsive.
+# Progress is signalled as each trip / power cycle is read, and reading can be cancelled.
+# Trips / power cycles are signalled to the GUI thread in batches as they are read, so they can be shown straight away.
+# Read log data is signalled back to the GUI thread when complete.
+# *******************************************
+class LogWorker(QtCore.QThread):
+    # Signals to GUI thread.
+    # Progress is percentage of log file read and trips / power cycles read.
+    logProgress = QtCore.pyqtSignal(int, int)
+    # Batch is list of trips / power cycles read, if they are power cycles, and row of first in batch.
+    # First row of zero means start again, e.g. Zoner power cycles dropped when trips found.
+    logBatch = QtCore.pyqtSignal(object, bool, int)
+    # Read is log data, and log tail for refreshing the log file (None if it can't be refreshed).
+    logRead = QtCore.pyqtSignal(object, object)
+    logCancelled = QtCore.pyqtSignal()
+    logFailed = QtCore.pyqtSignal(str)
+
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, fileName, parent=None):
+        super(LogWorker, self).__init__(parent)
+
+        self.cfg = config
+        self.logger = logger
+        self.fileName = fileName
+
+        self.logger.debug("LogWorker class constructor.")
+
+        # Log reader, once reading has started.
+        self.reader = None
+
+        # Set to cancel reading.
+        self.cancelled = False
+
+        # Last percentage of log file read signalled.
+        self.percentRead = -1
+
+        # Trips / power cycles signalled so far, if they were power cycles, and when last batch signalled.
+        self.logsSent = 0
+        self.zonerSent = None
+        self.batchTime = 0
+
+    # *******************************************
+    # Read log file in worker thread.
+    # *******************************************
+    def run(self):
+        try:
+            # Use previously parsed log data if the log file is in the cache.
+            logData = None
+            if self.cfg.LogParsing["CacheLogs"]:
+                cache = LogCache(self.cfg, self.logger)
+                cacheKey = cache.makeKey(self.fileName)
+                logData = cache.load(cacheKey, self.fileName)
+
+            if logData is None:
+                # Read the log file, splitting it into trips / power cycles and extracting their data as it goes.
+                self.reader = LogReader(self.cfg, self.logger, self.fileName)
+                self.reader.progress = self.readProgress
+                self.reader.cancelled = self.cancelled
+                self.reader.readLog()
+                logData = {
+                    "controllerID" : self.reader.controllerID,
+                    "firmwareVersion" : self.reader.firmwareVersion,
+                    "tripLog" : self.reader.tripLog,
+                    "zoneXLog" : self.reader.zoneXLog,
+                    "contentHash" : self.reader.contentHash,
+                    "tailMark" : self.reader.tailMark()
+                }
+
+                # Save parsed log data for next time the log file is opened.
+                if self.cfg.LogParsing["CacheLogs"]:
+                    cache.save(cacheKey, logData)
+        except LogReadCancelled:
+            self.logger.info("Log file read cancelled : {0:s}".format(self.fileName))
+            self.logCancelled.emit()
+            return
+        except Exception as e:
+            self.logger.error("Failed to read log file : {0:s} : {1:s}".format(self.fileName, str(e)))
+            self.logFailed.emit(str(e))
+            return
+
+        # Mark the tail of the log file as read, so it can be refreshed; compressed log files are archived, so aren't added to.
+        tail = None
+        if (not isCompressedLog(self.fileName)) and (logData.get("tailMark") is not None):
+            try:
+                tail = LogTail(self.logger, self.fileName, logData["tailMark"], logData["contentHash"])
+            except Exception as e:
+                self.logger.warning("Failed to mark log file tail : {0:s} : {1:s}".format(self.fileName, str(e)))
+
+        storeData = {**logData, "tripLog" : list(logData["tripLog"]), "zoneXLog" : list(logData["zoneXLog"])}
+        self.logRead.emit(logData, tail)
+
+        # Add to the trip store, if enabled, once the log data has been shown.
+        # Already stored log files are skipped.
+        # The GUI thread replaces (and refreshes) the trip lists of the log data, so the store is given its own.
+        storeLog(self.cfg, self.logger, self.fileName, storeData)
+
+    # *******************************************
+    # Cancel reading of log file.
+    # Can be called from the GUI thread.
+    # *******************************************
+    def cancel(self):
+        self.cancelled = True
+        if self.reader is not None:
+            self.reader.cancel()
+
+    # *******************************************
+    # Log reader progress callback.
+    # Only signals when the percentage read changes, so the GUI thread isn't flooded with signals.
+    # First trip / power cycle is signalled straight away, then the rest in batches.
+    # *******************************************
+    def readProgress(self, numLogs, position):
+        if self.reader.fileSize > 0:
+            percent = min(100, int(position * 100 / self.reader.fileSize))
+        else:
+            percent = 100
+        if percent != self.percentRead:
+            self.percentRead = percent
+            self.logProgress.emit(percent, numLogs)
+
+        now = time.monotonic()
+        if (self.logsSent == 0) or (((now - self.batchTime) * 1000) >= self.cfg.LogParsing["DisplayBatchMsec"]):
+            self.batchTime = now
+            self.sendBatch()
+
+    # *******************************************
+    # Signal trips / power cycles read since the last batch.
+    # Power cycles are only read until the first trip is found, so start again if trips found.
+    # *******************************************
+    def sendBatch(self):
+        isZoner = (len(self.reader.tripLog) == 0)
+        if isZoner != self.zonerSent:
+            self.logsSent = 0
+            self.zonerSent = isZoner
+        if isZoner:
+            logs = self.reader.zoneXLog
+        else:
+            logs = self.reader.tripLog
+        if len(logs) > self.logsSent:
+            self.logBatch.emit(logs[self.logsSent:], isZoner, self.logsSent)
+            self.logsSent = len(logs)
+
+# *******************************************
+# Log file refresh worker thread class.
+# Reads the trips / power cycles added to a log file since it was last read, away from the GUI thread.
+# If the log file has only been added to, just the last trip / power cycle (which may have been open)
+# and any new ones are read; otherwise that the whole log file has to be read again is signalled.
+# Refreshed log data is also saved to the cache here, as saving large logs takes a while.
+# *******************************************
+class LogRefreshWorker(QtCore.QThread):
+    # Signals to GUI thread.
+    # Refreshed is the trips / power cycles replacing the last one, and the new log tail.
+    logRefreshed = QtCore.pyqtSignal(object, object)
+    logChanged = QtCore.pyqtSignal()
+    logFailed = QtCore.pyqtSignal(str)
+
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, fileName, logData, tail, isZoner, parent=None):
+        super(LogRefreshWorker, self).__init__(parent)
+
+        self.cfg = config
+        self.logger = logger
+        self.fileName = fileName
+        self.isZoner = isZoner
+
+        self.logger.debug("LogRefreshWorker class constructor.")
+
+        # Own copies of the log data and tail, as the GUI thread keeps using its own until the refresh is done.
+        self.logData = {**logData, "tripLog" : list(logData["tripLog"]), "zoneXLog" : list(logData["zoneXLog"])}
+        self.tail = copy.copy(tail)
+
+    # *******************************************
+    # Refresh log file in worker thread.
+    # *******************************************
+    def run(self):
+        try:
+            if not self.tail.isAppended():
+                self.logChanged.emit()
+                return
+
+            # Read the log file from the start of the last trip / power cycle.
+            # Controller details before then aren't read again, so start with those of the last trip / power cycle.
+            if self.isZoner:
+                logs = self.logData["zoneXLog"]
+            else:
+                logs = self.logData["tripLog"]
+            reader = LogReader(self.cfg, self.logger, self.fileName)
+            reader.readLog(self.tail.startOffset, logs[-1].controllerID, logs[-1].firmwareVersion, self.tail.checkedHash)
+            if reader.isZoner:
+                newLogs = reader.zoneXLog
+            else:
+                newLogs = reader.tripLog
+
+            # If log file is no longer the same type (i.e. a Zoner log now with trips) then need to read whole log file.
+            if (reader.isZoner != self.isZoner) or (len(newLogs) == 0):
+                self.logChanged.emit()
+                return
+
+            # Mark new last trip / power cycle, as read.
+            self.tail.markLog(reader.tailMark(), reader.contentHash)
+
+            # Save updated log data for next time the log file is opened.
+            if self.cfg.LogParsing["CacheLogs"]:
+                logs[-1:] = newLogs
+                self.logData["contentHash"] = reader.contentHash
+                self.logData["tailMark"] = reader.tailMark()
+                cache = LogCache(self.cfg, self.logger)
+                cache.save(cache.makeKey(self.fileName), self.logData)
+        except Exception as e:
+            self.logger.error("Failed to refresh log file : {0:s} : {1:s}".format(self.fileName, str(e)))
+            self.logFailed.emit(str(e))
+            return
+
+        self.logRefreshed.emit(newLogs, self.tail)
+
+# *******************************************
+# Fleet worker thread class.
+# Reads many log files across worker processes, away from the GUI thread.
+# Each log file summary is signalled to the GUI thread as it is read.
+# *******************************************
+class FleetWorker(QtCore.QThread):
+    # Signals to GUI thread.
+    # Summary of each log file read, and number of log files read so far of total.
+    fleetLog = QtCore.pyqtSignal(object, int, int)
+    fleetRead = QtCore.pyqtSignal()
+    fleetCancelled = QtCore.pyqtSignal()
+
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, fileNames, parent=None):
+        super(FleetWorker, self).__init__(parent)
+
+        self.cfg = config
+        self.logger = logger
+        self.fileNames = fileNames
+
+        self.logger.debug("FleetWorker class constructor.")
+
+        self.fleet = FleetLog(self.cfg, self.logger)
+        self.fleet.progress = self.readProgress
+
+    # *******************************************
+    # Read log files in worker thread.
+    # *******************************************
+    def run(self):
+        self.fleet.readLogs(self.fileNames)
+        if self.fleet.cancelled:
+            self.logger.info("Fleet log files read cancelled.")
+            self.fleetCancelled.emit()
+        else:
+            self.fleetRead.emit()
+
+    # *******************************************
+    # Cancel reading of log files.
+    # Can be called from the GUI thread.
+    # *******************************************
+    def cancel(self):
+        self.fleet.cancel()
+
+    # *******************************************
+    # Fleet log progress callback.
+    # *******************************************
+    def readProgress(self, summary):
+        self.fleetLog.emit(summary, len(self.fleet.summaries), len(self.fileNames))
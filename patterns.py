@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+import logging
+import re
+
+# *******************************************
+# Compiled pattern class.
+# Wraps a compiled regular expression and counts the matches (hits) and failed matches (misses).
+# *******************************************
+class Pattern():
+    # Initializer / Instance Attributes
+    def __init__(self, name, regex, flags=0):
+        self.name = name
+        self.regex = re.compile(regex, flags)
+
+        # Match statistics.
+        self.hits = 0
+        self.misses = 0
+
+    # *******************************************
+    # Search for first match of pattern.
+    # *******************************************
+    def search(self, text):
+        m = self.regex.search(text)
+        if m:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return m
+
+    # *******************************************
+    # Match pattern at start of text, or at position in text.
+    # *******************************************
+    def match(self, text, pos=0):
+        m = self.regex.match(text, pos)
+        if m:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return m
+
+    # *******************************************
+    # Iterate over all matches of pattern.
+    # Each match is a hit; finding no matches at all is a miss.
+    # *******************************************
+    def finditer(self, text):
+        found = False
+        for m in self.regex.finditer(text):
+            found = True
+            self.hits += 1
+            yield m
+        if not found:
+            self.misses += 1
+
+# *******************************************
+# Line pattern class.
+# Pattern of a log line starting with the date and time stamp.
+# The pattern is only tried at the first stamp on each line, anchored there, so a line that doesn't match
+# is rejected in time linear in its length, rather than the pattern being retried at every later position.
+# *******************************************
+class LinePattern(Pattern):
+    # Initializer / Instance Attributes
+    def __init__(self, name, regex, flags=0):
+        super().__init__(name, regex, flags)
+
+        # Stamp at start of the pattern, and line end, as text or bytes to suit the pattern.
+        if isinstance(regex, bytes):
+            self.stamp = re.compile(lineStampRegex.encode())
+            self.newline = b"\n"
+        else:
+            self.stamp = re.compile(lineStampRegex)
+            self.newline = "\n"
+
+    # *******************************************
+    # Find matches of pattern, at most one per line.
+    # Yields match, or None, for each line with a stamp.
+    # *******************************************
+    def matchLines(self, text):
+        pos = 0
+        while True:
+            ds = self.stamp.search(text, pos)
+            if not ds:
+                break
+            yield self.regex.match(text, ds.start())
+
+            # Carry on from the next line.
+            pos = text.find(self.newline, ds.start())
+            if pos < 0:
+                break
+            pos += 1
+
+    # *******************************************
+    # Search for first line matching pattern.
+    # *******************************************
+    def search(self, text):
+        for m in self.matchLines(text):
+            if m:
+                self.hits += 1
+                return m
+        self.misses += 1
+        return None
+
+    # *******************************************
+    # Iterate over all lines matching pattern.
+    # Each match is a hit; finding no matches at all is a miss.
+    # *******************************************
+    def finditer(self, text):
+        found = False
+        for m in self.matchLines(text):
+            if m:
+                found = True
+                self.hits += 1
+                yield m
+        if not found:
+            self.misses += 1
+
+# *******************************************
+# Pattern registry.
+# All patterns are compiled once here and shared by all modules.
+# *******************************************
+patternRegistry = {}
+
+# *******************************************
+# Compile and register a pattern.
+# *******************************************
+def registerPattern(name, regex, flags=0, patternClass=Pattern):
+    pattern = patternClass(name, regex, flags)
+    patternRegistry[name] = pattern
+    return pattern
+
+# *******************************************
+# Compile and register a log line pattern.
+# The pattern is the date and time stamp, the text up to the first keyword after it, and the rest of the line.
+# *******************************************
+def registerLinePattern(name, keyword, rest, flags=0):
+    regex = lineStampRegex + r'(?:(?!{0:s}).)*{0:s}'.format(keyword)
+    if isinstance(rest, bytes):
+        regex = regex.encode()
+    return registerPattern(name, regex + rest, flags, LinePattern)
+
+# *******************************************
+# Reset pattern statistics.
+# *******************************************
+def resetPatternStats():
+    for p in patternRegistry.values():
+        p.hits = 0
+        p.misses = 0
+
+# *******************************************
+# Get pattern statistics as list of (name, hits, misses).
+# *******************************************
+def patternStats():
+    return [(p.name, p.hits, p.misses) for p in patternRegistry.values()]
+
+# *******************************************
+# Dump pattern statistics to the log.
+# Only patterns that have been used are dumped.
+# *******************************************
+def dumpPatternStats(logger, level=logging.DEBUG):
+    for name, hits, misses in patternStats():
+        if (hits + misses) > 0:
+            logger.log(level, "Pattern {0:s} : hits {1:d}, misses {2:d}".format(name, hits, misses))
+
+# *******************************************
+# Log file patterns.
+# Line patterns start at the first date and time stamp of the line, and the first keyword (UNIT / EVENT) after it.
+# Parts of the patterns can't overlap, so lines that don't match fail without backtracking.
+# *******************************************
+# Date and time stamp at the start of log lines.
+lineStampRegex = r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) '
+
+# Controller ID.
+cntrlIdPattern = registerLinePattern("cntrlId", "UNIT ", r'(?P<id>[0-9]+)$', re.MULTILINE)
+
+# Controller firmware version, e.g. "SWSTART ET 4.2.1 (b12) v:130".
+# Position / diagnostics are anything up to the rssi and speed before the event.
+# Firmware name is the words before the first one starting with a number, which starts the version up to the last " v".
+firmwareRegex = r'[0-9]+ [0-9]+ (?:(?!/[-0-9]+/[0-9]+ SWSTART ).)*/[-0-9]+/[0-9]+ SWSTART +(?P<name>[^ \r\n]+(?: +[^ .0-9\r\n][^ \r\n]*)*) +(?P<version>[.0-9].*) v(?P<volt>.+?)\r?$'
+cntrlFirmwarePattern = registerLinePattern("cntrlFirmware", "EVENT ", firmwareRegex, re.MULTILINE)
+
+# Start of trip.
+tripStartPattern = registerLinePattern("tripStart", "EVENT ", r'.+ (SIGNON).?')
+
+# Start of Zoner power cycle.
+powerCycleStartPattern = registerLinePattern("powerCycleStart", "EVENT ", r'.+ (HARDWARE IGN_ON).?')
+
+# *******************************************
+# Memory mapped log file patterns.
+# These match against the raw log file bytes, which may have Windows line endings.
+# *******************************************
+cntrlIdBytesPattern = registerLinePattern("cntrlIdBytes", "UNIT ", rb'(?P<id>[0-9]+)\r?$', re.MULTILINE)
+cntrlFirmwareBytesPattern = registerLinePattern("cntrlFirmwareBytes", "EVENT ", firmwareRegex.encode(), re.MULTILINE)
+tripStartBytesPattern = registerLinePattern("tripStartBytes", "EVENT ", rb'.+ (SIGNON).?')
+powerCycleStartBytesPattern = registerLinePattern("powerCycleStartBytes", "EVENT ", rb'.+ (HARDWARE IGN_ON).?')
+
+# *******************************************
+# Event header patterns.
+# *******************************************
+# Sign-on ID and event time, and the end of the position / diagnostics (rssi and speed) and event type,
+# for event headers not in the usual form.
+eventIdsPattern = registerPattern("eventIds", r'([0-9]+) ([0-9]+) ')
+eventTailPattern = registerPattern("eventTail", r'/([-0-9]+)/([0-9]+) ([ _a-zA-Z]+) (?=.)')
+
+# Date and time stamp that must precede the EVENT keyword on the line.
+eventStampPattern = registerPattern("eventStamp", r'[0-9]{1,2}/[0-9]{2}/[0-9]{4} [0-9]{1,2}:[0-9]{2}:[0-9]{2} ')
+
+# Event type names are made up of letters, underscores and spaces.
+eventTypePattern = registerPattern("eventType", r'[ _a-zA-Z]+')
+
+# Event header patterns for the raw log file bytes.
+eventIdsBytesPattern = registerPattern("eventIdsBytes", eventIdsPattern.regex.pattern.encode())
+eventTailBytesPattern = registerPattern("eventTailBytes", eventTailPattern.regex.pattern.encode())
+eventStampBytesPattern = registerPattern("eventStampBytes", eventStampPattern.regex.pattern.encode())
+eventTypeBytesPattern = registerPattern("eventTypeBytes", eventTypePattern.regex.pattern.encode())
+
+# *******************************************
+# Event specifics patterns.
+# *******************************************
+voltPattern = registerPattern("volt", r'v:([0-9]+)$')
+voltPatternST = registerPattern("voltST", r'v:([.0-9]+)$')
+signonPattern = registerPattern("signon", r'([-\*\+0-9]+) ([0-9a-fA-F]+) (.+?) ([0-9]+) ([0-9]+) ([0-9]+) (.+?)$')
+ignOnPattern = registerPattern("ignOn", r'(.+?)$')
+overspeedPattern = registerPattern("overspeed", r'([0-9]+) ([0-9]+)(.*)$')
+zoneOverspeedPattern = registerPattern("zoneOverspeed", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+engineOverspeedPattern = registerPattern("engineOverspeed", r'([0-9]+) ([0-9]+) ([0-9]+) v:([0-9]+)$')
+durationPattern = registerPattern("duration", r'([0-9]+) ([0-9]+)(.*)$')
+unbuckledPattern = registerPattern("unbuckled", r'([0-9]+) ([0-9]+) ([DP])(.*)$')
+unbuckledPatternST = registerPattern("unbuckledST", r'([0-9]+) (.*)$')
+zoneChangePattern = registerPattern("zoneChange", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+zoneTransitionPattern = registerPattern("zoneTransition", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) (ENTRY|EXIT) (.*)$')
+impactPattern = registerPattern("impact", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([\-a-zA-Z]+)(.*)$')
+checklistPattern = registerPattern("checklist", r'([0-9]+) (OK|CANCEL|NOFILE) ([0-9]+) ([0-9]+) ([0-9]+) ([\-a-zA-Z]+)(.*)$')
+clfailPattern = registerPattern("clfail", r'([0-9]+) ([0-9]+)(.*)$')
+xsidleStartPattern = registerPattern("xsidleStart", r'([0-9]+)(.*)$')
+xsidlePatternReason = registerPattern("xsidleReason", r'([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+xsidlePattern = registerPattern("xsidle", r'([0-9]+) ([0-9]+)(.*)$')
+serviceIdPattern = registerPattern("serviceId", r'([0-9]+)')
+swstartPattern = registerPattern("swstart", r'([.0-9]+)(.*) (v.*)$')
+reportPattern = registerPattern("report", r'(\*|[0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+criticalOutputPattern = registerPattern("criticalOutput", r'([0-9]+) ([0-9]+)(.*)$')
+oosPattern = registerPattern("oos", r'([0-9]+) ([0-9]+)(.*)$')
+inputPattern = registerPattern("input", r'([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+debugPattern = registerPattern("debug", r'(.+)$')
+powerPattern = registerPattern("power", r'([0-9]+) ([ _A-Z]+) ([0-9]+)(.*)$')
+tripPatternOnSeat = registerPattern("tripOnSeat", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+tripPattern = registerPattern("trip", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
+tripSummaryPattern = registerPattern("tripSummary", r'([0-9]+)')
+tripLoadPattern = registerPattern("tripLoad", r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)')
@@ -80,20 +80,16 @@ class SpeedCanvas(FigureCanvasQTAgg):
         else:
             self.axes.set_title("Ignition Cycle {0:d}".format(No), fontsize=self.cfg.SpdPlot["PlotTitleFontSize"])
 
-        tList = []
-        sList = []
-
         # Update speed data.
         if self.data.isZoner == False:
-            for sl in self.data.tripLog[No-1].speedLog:
-                # Format time axis list in the correct timezone for display.
-                tList.append(timeTZ(sl.time, self.cfg.TimeUTC))
-                sList.append(sl.speed)
+            speedLog = self.data.tripLog[No-1].speedLog
         else:
-            for sl in self.data.zoneXLog[No-1].speedLog:
-                # Format time axis list in the correct timezone for display.
-                tList.append(timeTZ(sl.time, self.cfg.TimeUTC))
-                sList.append(sl.speed)
+            speedLog = self.data.zoneXLog[No-1].speedLog
+
+        # Format time axis list in the correct timezone for display.
+        # Speeds are plotted straight from the speed column.
+        tList = [timeTZ(sTime, self.cfg.TimeUTC) for sTime in speedLog.column("time")]
+        sList = speedLog.column("speed")
 
         # Clear old plot data.
         self.line.set_xdata([])
@@ -123,13 +119,13 @@ class SpeedCanvas(FigureCanvasQTAgg):
             tObj = self.data.zoneXLog[No-1]
 
         # Add zone crossings.
-        for zl in tObj.zoneXings:
+        for zTime, zOutput in zip(tObj.zoneXings.column("time"), tObj.zoneXings.column("zoneOutput")):
             # Format time axis list in the correct timezone for display.
-            tList.append(timeTZ(zl.time, self.cfg.TimeUTC))
+            tList.append(timeTZ(zTime, self.cfg.TimeUTC))
             # Plot the zone change trace.
             # There are 4 speed zones plus one open speed zone (at the start).
             # Speed zone 0 is the open speed zone, followed by the 4 speed zones.
-            zList.append(self.cfg.SpdPlot["zoneSpeed"][zl.zoneOutput])
+            zList.append(self.cfg.SpdPlot["zoneSpeed"][zOutput])
 
         # Clear old zone data.
         self.zone.set_xdata([])
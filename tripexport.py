@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+from datetime import timedelta
+
+from utils import *
+
+# *******************************************
+# Trip / power cycle exports.
+# Writes the text report and GNSS log (csv) of a trip / power cycle.
+# Doesn't need the GUI, so used by both the application and the command line.
+# *******************************************
+
+# *******************************************
+# Export report for nominated trip.
+# *******************************************
+def exportTrip(config, logger, xf, ti, controllerID, isZoner):
+    # Export trip data to file.
+    logger.debug("Exporting trip report for Trip ID: {0:d}".format(ti.tripStartId))
+    xf.write("===================================================\n")
+    if isZoner == False:
+        xf.write("              ____  ____  ____  ____ \n")
+        xf.write("             (_  _)(  _ \(_  _)(  _ \\\n")
+        xf.write("               )(   )   / _)(_  )___/\n")
+        xf.write("              (__) (_)\_)(____)(__)  \n")
+        xf.write("                                     \n")
+    else:
+        xf.write("           ____  _____  _  _  ____  ____ \n")
+        xf.write("          (_   )(  _  )( \( )( ___)(  _ \\\n")
+        xf.write("           / /_  )(_)(  )  (  )__)  )   /\n")
+        xf.write("          (____)(_____)(_)\_)(____)(_)\_)\n")
+    xf.write("===================================================\n")
+    # Controller details at the start of the trip, if known, rather than of the log.
+    if ti.controllerID is not None:
+        controllerID = ti.controllerID
+    xf.write("Controller ID  : {0:d}\n".format(controllerID))
+    if ti.firmwareVersion is not None:
+        xf.write("Firmware       : {0:s}\n".format(ti.firmwareVersion))
+    xf.write("Signon ID      : {0:d}\n".format(ti.tripStartId))
+    xf.write("Start time     : {0:s}\n".format(unixTimeString(ti.tripStart, config.TimeUTC)))
+    xf.write("End time       : {0:s}\n".format(unixTimeString(ti.tripEnd, config.TimeUTC)))
+    xf.write("===================================================\n")
+    xf.write("===================================================\n")
+    xf.write("EVENTS (TOTALS)\n")
+    xf.write("===================================================\n")
+    if isZoner == False:
+        xf.write("Vehicle overspeed            : {0:d}\n".format(ti.numOverspeed))
+        xf.write("Zone overspeed               : {0:d}\n".format(ti.numZoneOverspeed))
+        xf.write("Engine overspeed             : {0:d}\n".format(ti.numEngineOverspeed))
+        xf.write("Engine coolant level low     : {0:d}\n".format(ti.numLowCoolant))
+        xf.write("Engine oil pressure low      : {0:d}\n".format(ti.numOilPressure))
+        xf.write("Engine temperature high      : {0:d}\n".format(ti.numEngineTemperature))
+        xf.write("Seatbelt unbuckled operator  : {0:d}\n".format(ti.numUnbuckled_O))
+        xf.write("Seatbelt unbuckled passenger : {0:d}\n".format(ti.numUnbuckled_P))
+        xf.write("Impact Critical              : {0:d}\n".format(ti.numImpact_H))
+        xf.write("Impact High                  : {0:d}\n".format(ti.numImpact_M))
+        xf.write("Impact Low                   : {0:d}\n".format(ti.numImpact_L))
+        xf.write("Zone change                  : {0:d}\n".format(ti.numZoneChange))
+        xf.write("Checklist                    : {0:d}\n".format(ti.numChecklist))
+    else:
+        xf.write("Zone change                  : {0:d}\n".format(ti.numZoneChange))
+        xf.write("Zone transition              : {0:d}\n".format(ti.numTransition))
+    xf.write("===================================================\n")
+    xf.write("===================================================\n")
+    xf.write("EVENTS (DETAILS)\n")
+    xf.write("===================================================\n")
+    for ev in ti.events:
+        xf.write("{0:s}\n".format(ev.event))
+        xf.write("\tTime                 : {0:s}\n".format(unixTimeString(ev.serverTime, config.TimeUTC)))
+        if (ev.event == "SIGNON"):
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDriver ID            : {0:s}\n".format(ev.driverId))
+            xf.write("\tCard ID              : {0:d} (0x{0:0X})\n".format(ev.cardId))
+            xf.write("\tResult               : {0:s}\n".format(ev.result))
+            xf.write("\tBits Read            : {0:d}\n".format(ev.bitsRead))
+            xf.write("\tKeyboard             : {0:s}\n".format(ev.keyboard))
+            xf.write("\tCard Reader          : {0:s}\n".format(ev.cardReader))
+        elif (ev.event == "OVERSPEED"):
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+        elif (ev.event == "ZONEOVERSPEED"):
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+            xf.write("\tMaximum Speed        : {0:d}\n".format(ev.maxSpeed))
+            xf.write("\tZone Output          : {0:d}\n".format(ev.zoneOutput))
+        elif (ev.event == "ENGINEOVERSPEED"):
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+            xf.write("\tMaximum RPM          : {0:d}\n".format(ev.maxRPM))
+        elif ev.event in {"LOWCOOLANT", "OILPRESSURE", "ENGINETEMP"}:
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+        elif ev.event == "UNBUCKLED":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tDuration             : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+            if ev.seatOwner == "D":
+                seatOwner = "Operator"
+            elif ev.seatOwner == "P":
+                seatOwner = "Passenger"
+            else:
+                seatOwner = "?"
+            xf.write("\tSeat Owner           : {0:s}\n".format(seatOwner))
+        elif ev.event == "ZONECHANGE":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tFrom Zone            : {0:d}\n".format(ev.fromZone))
+            xf.write("\tTo Zone              : {0:d}\n".format(ev.toZone))
+            xf.write("\tZone Output          : {0:d}\n".format(ev.zoneOutput))
+        elif ev.event == "ZONETRANSITION":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tFrom Zone            : {0:d}\n".format(ev.fromZone))
+            xf.write("\tTo Zone              : {0:d}\n".format(ev.toZone))
+            xf.write("\tTo Zone Output       : {0:d}\n".format(ev.toZoneOutput))
+            xf.write("\tTransition           : {0:s}\n".format(ev.transition))
+        elif ev.event == "IMPACT":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tForward G            : {0:0.1f}\n".format(ev.fwdG))
+            xf.write("\tReverse G            : {0:0.1f}\n".format(ev.revG))
+            xf.write("\tLeft G               : {0:0.1f}\n".format(ev.leftG))
+            xf.write("\tRight G              : {0:0.1f}\n".format(ev.rightG))
+            xf.write("\tVector (magnitude)   : {0:0.1f}\n".format(ev.vectorMag))
+            xf.write("\tVector (direction)   : {0:0.1f}\n".format(ev.vectorDirn))
+            if ev.severity == "C":
+                severity = "High"
+            elif ev.severity == "W":
+                severity = "Medium"
+            elif ev.severity == "-":
+                severity = "Low"
+            else:
+                severity = "?"
+            xf.write("\tSeverity             : {0:s}\n".format(severity))
+        elif ev.event == "CHECKLIST":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tResult               : {0:s}\n".format(ev.result))
+            xf.write("\tFailed Questions     : {0:d}\n".format(ev.failedQ))
+            xf.write("\tTime Taken           : {0:s}\n".format(str(timedelta(seconds=ev.duration))))
+            xf.write("\tChecklist Version    : {0:d}\n".format(ev.failedQ))
+            if ev.chkType == "F":
+                chkType = "Full"
+            elif ev.chkType == "P":
+                chkType = "Operator Change"
+            elif ev.chkType == "B":
+                chkType = "Bypass"
+            else:
+                chkType = "?"
+            xf.write("\tChecklist Type       : {0:s}\n".format(chkType))
+        elif ev.event == "CLFAIL":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tFailed Question      : {0:d}\n".format(ev.failedQNo))
+        elif ev.event == "XSIDLESTART":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+        elif ev.event == "XSIDLE":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tMaximum Idle Time    : {0:s}\n".format(str(timedelta(seconds=ev.maxIdle))))
+            xf.write("\tIdle Reason          : {0:d}\n".format(ev.xsidleReason))
+        elif ev.event == "SERVICE":
+            xf.write("\tService ID           : {0:d}\n".format(ev.serviceId))
+        elif ev.event == "REPORT":
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tReport Speed         : {0:d}\n".format(ev.speed))
+            xf.write("\tDirection            : {0:d}\n".format(ev.direction))
+        elif ev.event == "CRITICALOUTPUTSET":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tCritical Output      : {0:d}\n".format(ev.criticalOutput))
+        elif ((ev.event == "OOS PM") or (ev.event == "OOS UPM")):
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tOOS Reason           : {0:d}\n".format(ev.oosReason))
+        elif ev.event == "INPUT":
+            xf.write("\tInput                : {0:d} - {1:s}\n".format(ev.inputNo, config.Channels[ev.inputNo - 1]["Name"]))
+            xf.write("\tState                : {0:d}\n".format(ev.inputState))
+            xf.write("\tActive Time          : {0:s}\n".format(str(timedelta(seconds=ev.activeTime))))
+        elif "SWSTART" in ev.event:
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tFirmware Version     : {0:s}\n".format(ev.firmware))
+        elif ev.event == "POWER":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tBattery State        : {0:s}\n".format(ev.batteryState))
+        elif ev.event == "DEBUG":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tDetails              : {0:s}\n".format(ev.debugInfo))
+        elif ev.event == "TRIP":
+            xf.write("\tBattery Voltage      : {0:0.1f}\n".format(ev.battery))
+            xf.write("\tLat/Long/Error       : {0:.5f} / {1:.5f} / {2:.2f} m\n".format(ev.lat, ev.long, ev.posErr))
+            xf.write("\tRSSI                 : {0:d}\n".format(ev.rssi))
+            xf.write("\tCurrent Speed        : {0:d}\n".format(ev.speed))
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tTime Forward         : {0:s}\n".format(str(timedelta(seconds=ev.timeFwd))))
+            xf.write("\tTime Reverse         : {0:s}\n".format(str(timedelta(seconds=ev.timeRev))))
+            xf.write("\tTime Idle            : {0:s}\n".format(str(timedelta(seconds=ev.timeIdle))))
+            xf.write("\tMax Idle Time        : {0:s}\n".format(str(timedelta(seconds=ev.maxIdle))))
+            xf.write("\tTime on Seat         : {0:s}\n".format(str(timedelta(seconds=ev.timeOnSeat))))
+        elif ev.event == "TRIPSUMMARY":
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+        elif ev.event == "TRIPLOAD":
+            xf.write("\tSign-on ID           : {0:d}\n".format(ev.tripStartId))
+            xf.write("\tTravel Loaded        : {0:s}\n".format(str(timedelta(seconds=ev.travelLoaded))))
+            xf.write("\tTravel Unloaded      : {0:s}\n".format(str(timedelta(seconds=ev.travelUnloaded))))
+            xf.write("\tIdle Loaded          : {0:s}\n".format(str(timedelta(seconds=ev.idleLoaded))))
+            xf.write("\tIdle Unloaded        : {0:s}\n".format(str(timedelta(seconds=ev.idleUnloaded))))
+            xf.write("\tLift Count           : {0:d}\n".format(ev.liftCount))
+            xf.write("\tCummulative Lift     : {0:d}\n".format(ev.cumWeight))
+    xf.write("===================================================\n\n")
+
+# *******************************************
+# Export GNSS Log for nominated trip.
+# *******************************************
+def exportGnssLog(config, logger, xf, ti, tNo, controllerID, isZoner):
+    # Export GNSS Log for trip to file.
+    logger.debug("Exporting GNSS Log for Trip ID: {0:d}".format(ti.tripStartId))
+
+    # Export GNSS log.
+    # First check if there are any valid points in the trip.
+    # Check for null gnss data, i.e. 0,0 in log.
+    validData = ti.gnssLog.hasValidPosition()
+
+    # If we have a trip with some valid data export it.
+    if validData == True:
+        # Export header row.
+        started = False
+        idx = 1
+        xf.write(f'gv_track_number,trackpoint,type,time,latitude,longitude,name,desc,new_track,symbol,label\n')
+        if isZoner == True:
+            usName = f'Zoner: {controllerID}'
+        else:
+            usName = f'Trip: {ti.tripStartId}'
+        # Work through the GNSS log columns together.
+        gl = ti.gnssLog
+        for gTime, lat, lon, err, spd in zip(gl.column("time"), gl.column("latitude"), gl.column("longitude"), gl.column("error"), gl.column("speed")):
+            # Check for null gnss data, i.e. 0,0 in log.
+            if (lat != 0.0) and (lon != 0.0):
+                if started == False:
+                    xf.write(f'{tNo},{idx},W,{timeTZ(gTime, config.TimeUTC)},{lat},{lon},{usName},,0,pin\n')
+                    xf.write(f'{tNo},{idx},R,{timeTZ(gTime, config.TimeUTC)},{lat},{lon},{usName},,1,,{idx}\n')
+                    started = True
+                else:
+                    xf.write(f'{tNo},{idx},R,{timeTZ(gTime, config.TimeUTC)},{lat},{lon},{timeTZ(gTime, config.TimeUTC)},GNSS Error: {err} (m) Speed: {spd} (kph),,circle,{idx}\n')
+                idx += 1
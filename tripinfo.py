@@ -1,13 +1,86 @@
 #!/usr/bin/env python3
 
 import logging
-import re
+from array import array
+from collections import namedtuple
 from datetime import datetime
 
+from patterns import *
+
+# Version of extracted trip data.
+# Change whenever parsing changes the extracted data, so that cached logs are parsed again.
+parserVersion = 5
+
+# *******************************************
+# Configuration that extracted trip data depends on, i.e. alert limits and event filter types.
+# Cached logs are parsed again when it changes.
+# *******************************************
+def parserConfig(config):
+    return (config.TripData["RssiErrorLimit"], config.TripData["GnssErrorLimit"], tuple(config.filterEvents))
+
 # *******************************************
 # Event class.
+# Variables common to all events are kept in slots.
+# Event specific variables default to the class values below, and are only stored
+# (in the instance dictionary) by the events that set them, to keep events small.
 # *******************************************
 class Event():
+    __slots__ = ("event", "serverTime", "alertText", "isOther", "isInput", "isDebug", "isReport", "isOutOfTrip",
+                 "eventInAlert", "tripStartId", "battery", "rssi", "lat", "long", "posErr", "__dict__")
+
+    # Event specific variables.
+    driverId = ""
+    cardId = 0
+    result = ""
+    bitsRead = 0
+    keyboard = ""
+    cardReader = ""
+
+    maxSpeed = 0
+    duration = 0
+    zoneOutput = 0
+    maxRPM = 0
+    seatOwner = ""
+    fromZone = 0
+    toZone = 0
+    fwdG = 0.0
+    revG = 0.0
+    leftG = 0.0
+    rightG = 0.0
+    vectorMag = 0.0
+    vectorDirn = 0.0
+    severity = ""
+    failedQ = 0
+    failedQNo = 0
+    chkVersion = 0
+    chkType = ""
+    maxIdle = 0
+    xsidleReason = 0
+    timeFwd = 0
+    timeRev = 0
+    timeIdle = 0
+    timeOnSeat = 0
+    speed = 0
+    direction = 0
+    inputNo = 0
+    inputState = 0
+    activeTime = 0
+    serviceId = 0
+    debugInfo = ""
+    criticalOutput = 0
+    travelLoaded = 0
+    travelUnloaded = 0
+    idleLoaded = 0
+    idleUnloaded = 0
+    liftCount = 0
+    cumWeight = 0
+    voltage = 0.0
+    oosReason = 0
+    batteryState = ""
+    toZoneOutput = 0
+    transition = ""
+    firmware = ""
+
     # Initializer / Instance Attributes
     def __init__(self, eType, eTime):
         # All event variables.
@@ -30,60 +103,9 @@ class Event():
         # Used by trip data display.
         self.eventInAlert = False
 
-        # Additional event variables.
-        self.driverId = ""
-        self.cardId = 0
-        self.result = ""
-        self.bitsRead = 0
-        self.keyboard = ""
-        self.cardReader = ""
-
+        # Trip the event belongs to, and battery voltage (if event has it).
         self.tripStartId = 0
-        self.maxSpeed = 0
-        self.duration = 0
-        self.zoneOutput = 0
-        self.maxRPM = 0
-        self.seatOwner = ""
-        self.fromZone = 0
-        self.toZone = 0
-        self.fwdG = 0.0
-        self.revG = 0.0
-        self.leftG = 0.0
-        self.rightG = 0.0
-        self.vectorMag = 0.0
-        self.vectorDirn = 0.0
-        self.severity = ""
-        self.failedQ = 0
-        self.failedQNo = 0
-        self.chkVersion = 0
-        self.chkType = ""
-        self.maxIdle = 0
-        self.xsidleReason = 0
-        self.timeFwd = 0
-        self.timeRev = 0
-        self.timeIdle = 0
-        self.timeOnSeat = 0
-        self.speed = 0
-        self.direction = 0
-        self.inputNo = 0
-        self.inputState = 0
-        self.activeTime = 0
-        self.serviceId = 0
-        self.debugInfo = ""
-        self.criticalOutput = 0
-        self.travelLoaded = 0
-        self.travelUnloaded = 0
-        self.idleLoaded = 0
-        self.idleUnloaded = 0
-        self.liftCount = 0
-        self.cumWeight = 0
         self.battery = 0.0
-        self.voltage = 0.0
-        self.oosReason = 0
-        self.batteryState = ""
-        self.toZoneOutput = 0
-        self.transition = ""
-        self.firmware = ""
 
         # Add RSSI for diagnostics.
         self.rssi = 0
@@ -149,6 +171,349 @@ class ZoneInfo():
         self.toZone = toZ
         self.zoneOutput = zOut
 
+# *******************************************
+# Time series class.
+# Points are stored in growable typed columns rather than as a list of info objects.
+# Iterating or indexing the series gives info objects (views of the points) as before.
+# Whole columns can be used directly, e.g. for plotting.
+# *******************************************
+class TimeSeries():
+    # Info class of points, and the names and array type codes of its columns.
+    pointClass = None
+    columnTypes = ()
+
+    # Initializer / Instance Attributes
+    def __init__(self):
+        self.columns = [array(typeCode) for name, typeCode in self.columnTypes]
+        self.length = 0
+
+    # *******************************************
+    # Column of the series, by name.
+    # *******************************************
+    def column(self, name):
+        for (colName, typeCode), col in zip(self.columnTypes, self.columns):
+            if colName == name:
+                return col
+        raise KeyError(name)
+
+    # *******************************************
+    # Add point to end of series.
+    # *******************************************
+    def append(self, *values):
+        try:
+            for col, value in zip(self.columns, values):
+                col.append(value)
+        except (OverflowError, TypeError):
+            # Value doesn't fit the column type, so fall back to plain lists.
+            self.widen()
+            for col, value in zip(self.columns, values):
+                col.append(value)
+        self.length += 1
+
+    # *******************************************
+    # Insert point into series before index.
+    # *******************************************
+    def insert(self, idx, *values):
+        inserted = 0
+        try:
+            for col, value in zip(self.columns, values):
+                col.insert(idx, value)
+                inserted += 1
+        except (OverflowError, TypeError):
+            # Remove the part inserted point before falling back to plain lists.
+            pos = min(max((idx + self.length) if idx < 0 else idx, 0), self.length)
+            for col in self.columns[:inserted]:
+                del col[pos]
+            self.widen()
+            for col, value in zip(self.columns, values):
+                col.insert(idx, value)
+        self.length += 1
+
+    # *******************************************
+    # Change columns to plain lists, dropping any part appended point.
+    # Only needed for values out of range, e.g. from a corrupt log.
+    # *******************************************
+    def widen(self):
+        self.columns = [list(col[:self.length]) for col in self.columns]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for values in zip(*self.columns):
+            yield self.pointClass(*values)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.pointClass(*values) for values in zip(*[col[idx] for col in self.columns])]
+        return self.pointClass(*[col[idx] for col in self.columns])
+
+# *******************************************
+# GNSS position time series.
+# *******************************************
+class GnssSeries(TimeSeries):
+    pointClass = GnssInfo
+    columnTypes = (("time", "q"), ("latitude", "d"), ("longitude", "d"), ("error", "d"), ("speed", "i"))
+
+    # *******************************************
+    # Check if there are any valid positions, i.e. not 0,0.
+    # *******************************************
+    def hasValidPosition(self):
+        return any(((lat != 0.0) and (lon != 0.0)) for lat, lon in zip(self.column("latitude"), self.column("longitude")))
+
+# *******************************************
+# Speed time series.
+# *******************************************
+class SpeedSeries(TimeSeries):
+    pointClass = SpeedInfo
+    columnTypes = (("time", "q"), ("speed", "i"))
+
+# *******************************************
+# Battery voltage time series.
+# *******************************************
+class BatterySeries(TimeSeries):
+    pointClass = BatteryInfo
+    columnTypes = (("time", "q"), ("battery", "d"))
+
+# *******************************************
+# RSSI time series.
+# *******************************************
+class RssiSeries(TimeSeries):
+    pointClass = RssiInfo
+    columnTypes = (("time", "q"), ("rssi", "i"))
+
+# *******************************************
+# Zone crossing time series.
+# *******************************************
+class ZoneSeries(TimeSeries):
+    pointClass = ZoneInfo
+    columnTypes = (("time", "q"), ("fromZone", "i"), ("toZone", "i"), ("zoneOutput", "i"))
+
+# *******************************************
+# Event header tokenizer.
+# *******************************************
+# Header fields common to all EVENT lines.
+# Event is the event type name and specifics is the rest of the line after it.
+EventHeader = namedtuple("EventHeader", ["signonId", "time", "lat", "long", "posErr", "rssi", "speed", "event", "specifics"])
+
+# Event header grammar of text lines and raw log file bytes lines; keyword, separators and header patterns.
+EventGrammar = namedtuple("EventGrammar", ["keyword", "space", "slash", "minus", "stamp", "ids", "tail", "type"])
+textGrammar = EventGrammar("EVENT ", " ", "/", "-", eventStampPattern, eventIdsPattern, eventTailPattern, eventTypePattern)
+bytesGrammar = EventGrammar(b"EVENT ", b" ", b"/", b"-", eventStampBytesPattern, eventIdsBytesPattern, eventTailBytesPattern, eventTypeBytesPattern)
+
+# *******************************************
+# Split an EVENT line into its header fields.
+# The line is either text, or bytes from the log file; numbers are read straight from the bytes,
+# and only the event type and specifics are decoded.
+# Returns None if the line is not a (well formed) event.
+# *******************************************
+def tokenizeEvent(line):
+    g = bytesGrammar if isinstance(line, bytes) else textGrammar
+
+    # Quick check for event lines before doing any other work.
+    idx = line.find(g.keyword)
+    if idx < 0:
+        return None
+
+    # Event keyword must follow a date and time stamp.
+    ds = g.stamp.search(line)
+    if not ds:
+        return None
+    if ds.end() > idx:
+        idx = line.find(g.keyword, ds.end())
+        if idx < 0:
+            return None
+
+    # Split the usual form of the event header.
+    # If that fails fall back to the looser form which allows for unusual position / diagnostics fields etc.
+    header = line[idx + 6:]
+    hdr = splitEventHeader(header, g)
+    if hdr is None:
+        hdr = matchEventHeader(header, g)
+    return hdr
+
+# *******************************************
+# Split event header in the usual form, i.e. single spaces between fields.
+# Returns None if the header is not in the usual form.
+# *******************************************
+def splitEventHeader(header, g=textGrammar):
+    # Fields are sign-on ID, event time, position / diagnostics, and the event itself.
+    fields = header.split(g.space, 3)
+    if len(fields) != 4:
+        return None
+    signonId, eTime, position, body = fields
+    if not (isNumber(signonId, None) and isNumber(eTime, None)):
+        return None
+
+    # Position / diagnostics are lat/long/error/rssi/speed.
+    pos = position.split(g.slash)
+    if len(pos) != 5:
+        return None
+    lat, lon, err, rssi, speed = pos
+    if not (isNumber(lat, g.minus) and isNumber(lon, g.minus) and isNumber(err, g.minus) and isNumber(rssi, g.minus) and isNumber(speed, None)):
+        return None
+
+    # Event type is the longest run of name characters that is followed by a space and the event specifics.
+    # For example "HARDWARE IGN_ON v:125" is event "HARDWARE IGN_ON" with specifics "v:125".
+    nm = g.type.match(body)
+    if not nm:
+        return None
+    sep = body.rfind(g.space, 0, nm.end())
+    while sep == (len(body) - 1):
+        sep = body.rfind(g.space, 0, sep)
+    if sep < 1:
+        return None
+
+    return EventHeader(int(signonId), int(eTime), int(lat), int(lon), int(err), int(rssi), int(speed),
+        decodeField(body[:sep]), decodeField(body[sep + 1:]))
+
+# *******************************************
+# Match event header not in the usual form.
+# Position / diagnostics fields are split at the last slashes followed by rssi, speed and an event type,
+# so any extra slashes are left in the latitude; fields that are not numbers are returned as None.
+# Each slash is tried at most once, so time is linear in the length of the header however malformed.
+# *******************************************
+def matchEventHeader(header, g=textGrammar):
+    # Header starts with the sign-on ID and event time, or they follow a later EVENT keyword.
+    pos = 0
+    ids = g.ids.match(header)
+    while not ids:
+        pos = header.find(g.keyword, pos)
+        if pos < 0:
+            return None
+        pos += 6
+        ids = g.ids.match(header, pos)
+    position = header[ids.end():]
+
+    end = len(position)
+    while True:
+        # Slash before rssi.
+        rssiSep = position.rfind(g.slash, 0, end)
+        if rssiSep < 0:
+            return None
+        tail = g.tail.match(position, rssiSep)
+        if tail:
+            # Slashes before error and longitude; latitude and longitude can't be empty.
+            errSep = position.rfind(g.slash, 0, rssiSep - 1)
+            longSep = position.rfind(g.slash, 0, errSep - 1) if errSep > 1 else -1
+            if longSep < 1:
+                return None
+            return EventHeader(int(ids.group(1)), int(ids.group(2)), readNumber(position[:longSep]), readNumber(position[longSep + 1:errSep]),
+                readNumber(position[errSep + 1:rssiSep]), readNumber(tail.group(1)), int(tail.group(2)),
+                decodeField(tail.group(3)), decodeField(position[tail.end():]))
+        end = rssiSep
+
+# *******************************************
+# Read number from field, or None if not a number.
+# *******************************************
+def readNumber(field):
+    try:
+        return int(field)
+    except ValueError:
+        return None
+
+# *******************************************
+# Check if field (text or bytes) is a plain decimal number, with optional leading minus sign if given.
+# *******************************************
+def isNumber(field, minus):
+    if (minus is not None) and field.startswith(minus):
+        field = field[1:]
+    return field.isascii() and field.isdigit()
+
+# *******************************************
+# Get the lines of a trip / power cycle buffer.
+# The buffer is either text, or bytes from the log file (or a view of the memory mapped file).
+# Bytes lines are left as bytes for the tokenizer; \r, \n and \r\n all end lines, as when reading text.
+# *******************************************
+def bufferLines(logBuf):
+    if isinstance(logBuf, str):
+        return logBuf.split("\n")
+    return bytes(logBuf).splitlines()
+
+# *******************************************
+# Decode log file line bytes, dropping any Windows line ending.
+# *******************************************
+def decodeLine(lineBytes):
+    if lineBytes.endswith(b"\r"):
+        lineBytes = lineBytes[:-1]
+    return decodeField(lineBytes)
+
+# *******************************************
+# Decode event header field from log file bytes; text fields are returned as they are.
+# Most fields are plain ASCII, which decodes the same as cp1252 but much quicker.
+# *******************************************
+def decodeField(field):
+    if isinstance(field, str):
+        return field
+    if field.isascii():
+        return field.decode("ascii")
+    return field.decode("cp1252", errors="surrogateescape")
+
+# *******************************************
+# Get the specifics of a trip / power cycle start event.
+# Returns None if the event is not the nominated start event.
+# *******************************************
+def startSpecifics(hdr, startEvent):
+    if hdr.event == startEvent:
+        return hdr.specifics
+    # Start event followed by specifics that look like part of the event name.
+    if hdr.event.startswith(startEvent + " "):
+        return "{0:s} {1:s}".format(hdr.event[len(startEvent) + 1:], hdr.specifics)
+    return None
+
+# *******************************************
+# Get event types of events, for event filtering.
+# Includes the filter events found in the details of DEBUG events, i.e. debug sub-types such as Time1H INV.
+# *******************************************
+def eventTypes(config, events):
+    types = set()
+    for ev in events:
+        types.add(ev.event)
+        if ev.isDebug:
+            for filterEvent in config.filterEvents:
+                if filterEvent in ev.debugInfo:
+                    types.add(filterEvent)
+    return frozenset(types)
+
+# *******************************************
+# Event index class.
+# Maps event types (see eventTypes) to the rows of the trips / power cycles that have them,
+# so trips can be filtered by event without looking through their events.
+# *******************************************
+class EventIndex():
+    # Initializer / Instance Attributes
+    def __init__(self):
+        # Rows of trips for each event type.
+        self.typeRows = {}
+
+        # Event types of each trip row.
+        self.rowTypes = []
+
+    # *******************************************
+    # Replace trips from first row to the end with new trips.
+    # *******************************************
+    def replaceTrips(self, firstRow, trips):
+        for row in range(firstRow, len(self.rowTypes)):
+            for eType in self.rowTypes[row]:
+                self.typeRows[eType].discard(row)
+        del self.rowTypes[firstRow:]
+
+        for row, t in enumerate(trips, firstRow):
+            for eType in t.eventTypes:
+                self.typeRows.setdefault(eType, set()).add(row)
+            self.rowTypes.append(t.eventTypes)
+
+    # *******************************************
+    # Find rows of trips with an event type containing the filter text.
+    # Returns set of trip rows.
+    # *******************************************
+    def findTrips(self, text):
+        rows = set()
+        for eType, eRows in self.typeRows.items():
+            if text in eType:
+                rows |= eRows
+        return rows
+
 # *******************************************
 # Trip class.
 # *******************************************
@@ -164,23 +529,39 @@ class Trip():
         # Buffer snippet for trip.
         self.logBuf = logBuf
 
+        # Controller details at the start of the trip, set by the log reader; None if not known.
+        self.controllerID = None
+        self.firmwareVersion = None
+
         # Event data.
         self.events = []
     
         # Speed data.
-        self.speedLog = []
+        # Times already in the speed log are also kept in a set, for quick duplicate checks while extracting.
+        self.speedLog = SpeedSeries()
+        self.speedTimes = set()
 
         # GNSS data.
-        self.gnssLog = []
+        self.gnssLog = GnssSeries()
 
         # RSSI data.
-        self.rssiLog = []
+        self.rssiLog = RssiSeries()
 
         # Zone crossings.
-        self.zoneXings = []
+        self.zoneXings = ZoneSeries()
 
         # Battery level.
-        self.batteryLevel = []
+        self.batteryLevel = BatterySeries()
+
+    # *******************************************
+    # State of trip for pickling (cache and worker processes).
+    # Configuration and logger are not pickled; they are attached again when loaded.
+    # *******************************************
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cfg"] = None
+        state["logger"] = None
+        return state
 
     # *******************************************
     # Extract trip data from buffer snippet.
@@ -231,1040 +612,141 @@ class Trip():
         # Initialise flag to stop collecting extra data past end of trip.
         self.stopExtraData = False
 
-        # ******************************
-        # Look for SIGNON event.
-        # ******************************
-        patternStart = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) (SIGNON) (.+)$', re.MULTILINE)
-
-        su = re.search(patternStart, self.logBuf)
-        if su:
-            # Break out some of the event data explicitly.
-            eventSpecifics = su.group(11)
-            specPattern = re.compile(r'([-\*\+0-9]+) ([0-9a-fA-F]+) (.+?) ([0-9]+) ([0-9]+) ([0-9]+) (.+?)$')
-            sp = re.search(specPattern, eventSpecifics)
-            if sp:
-                # Create event object.
-                # Initialised with event type and time as in all events.
-                event = Event(su.group(10), int(su.group(4)))
-                self.tripStart = int(su.group(4))
-                self.logger.debug("Detected trip at {0:s}".format(datetime.fromtimestamp(self.tripStart).strftime('%d/%m/%Y %H:%M:%S')))
-
-                # Initialise last time to start of trip.
-                self.lastTime = self.tripStart
-
-                # Save sign-on ID at sign-on event for checking against other events; they should be the same.
-                self.tripStartId = int(su.group(3))
-
-                # Add additional event data.
-                event.tripStartId = int(su.group(3))
-                event.driverId = sp.group(1)
-                event.cardId = int(sp.group(2), base=16)
-                event.result = sp.group(3)
-                event.bitsRead = int(sp.group(4))
-                event.keyboard = sp.group(5)
-                event.cardReader = sp.group(6)
-
-                # Diagnostics to indicate sign-on ID. Useful for reference to log file.
-                self.logger.debug("Trip SIGNON ID {0:d}".format(event.tripStartId))
-
-                # Check for Bypass condition; indicated by driver ID of -12.
-                if event.driverId == "-12":
-                    event.alertText = appendAlertText(event.alertText, "Bypass detected.")
-
-                # Get speed data from event header.
-                event.speed = int(su.group(9))
-
-                # Read battery voltage from event header.
-                # But only if still collecting extra data, i.e. trip has not ended.
-                if not self.stopExtraData:
-                    # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                    voltPattern = re.compile(r'v:([0-9]+)$')
-                    vp = re.search(voltPattern, sp.group(7))
-                    if vp:
-                        # Extract battery voltage.
-                        event.battery = int(vp.group(1)) / 10.0
-
-                        # And add to battery level list.
-                        self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                        # Check for negative battery voltage condition.
-                        if event.battery < 0:
-                            event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                # Add RSSI diagnostics.
-                event.rssi = int(su.group(8))
-                if (event.rssi > 0) and (event.rssi < self.cfg.TripData["RssiErrorLimit"]):
-                    event.alertText = appendAlertText(event.alertText, "RSSI below threshold.")
-                else:
-                    self.rssiLog.append(RssiInfo(int(su.group(4)), event.rssi))
-
-                # Add GNSS location.
-                event.lat = int(su.group(5)) / 1e7
-                event.long = int(su.group(6)) / 1e7
-                event.posErr = int(su.group(7)) / 1e3
-                self.gnssLog.append(GnssInfo(int(su.group(4)), event.lat, event.long, event.posErr, event.speed))
-                if event.posErr > self.cfg.TripData["GnssErrorLimit"]:
-                    event.alertText = appendAlertText(event.alertText, "GNSS error greater than threshold.")
-
-                # Increment event counters.
-                self.numTripEvents += 1
-
-                # Add event to list of events.
-                self.events.append(event)
-
-                # Initialise trip not ended, in TRIP event not reached.
-                self.tripTrip = False
-
-            # **************************************************************
-            # Look for specific events other than the SIGNON event.
-            # **************************************************************
-            patternData = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) ([ _a-zA-Z]+) (.+)$', re.MULTILINE)
-            for su in re.finditer(patternData, self.logBuf):
-
-                # Found event.
-                event = Event(su.group(10), int(su.group(4)))
-                self.logger.debug("Detected event: {0:s}, at: {1:s}".format(su.group(10), datetime.fromtimestamp(int(su.group(4))).strftime('%d/%m/%Y %H:%M:%S')))
-
-                # Check for event time in the past, except if event is POWERDOWN as this is always in the past.
-                if su.group(10) != "POWERDOWN":
-                    if int(su.group(4)) < self.lastTime:
-                        event.alertText = appendAlertText(event.alertText, "Event time reversal.")
-                    self.lastTime = int(su.group(4))
-
-                # Get speed data from event header.
-                # But only if still collecting extra data, i.e. trip has not ended.
-                if not self.stopExtraData:
-                    event.speed = int(su.group(9))
-                    # Don't get speed from POWERDOWN event as these events occur out of order.
-                    if su.group(10) != "POWERDOWN": 
-                        # If speedlog already has speed for this time then skip, else append to list.
-                        # If event is REPORT then don't log speed as speed in other field (with direction).
-                        if su.group(10) != "REPORT":
-                            if self.checkForSpeedTime(int(su.group(4))) == False:
-                                self.speedLog.append(SpeedInfo(int(su.group(4)), int(su.group(9))))
-                                self.logger.debug("Logged speed: {0:d}, at {1:s}".format(int(su.group(9)), datetime.fromtimestamp(int(su.group(4))).strftime('%d/%m/%Y %H:%M:%S')))
-
-                # Add RSSI diagnostics.
-                event.rssi = int(su.group(8))
-                if (event.rssi > 0) and (event.rssi < self.cfg.TripData["RssiErrorLimit"]):
-                    event.alertText = appendAlertText(event.alertText, "RSSI below threshold.")
-                else:
-                    self.rssiLog.append(RssiInfo(int(su.group(4)), event.rssi))
-
-                # Add GNSS location.
-                event.lat = int(su.group(5)) / 1e7
-                event.long = int(su.group(6)) / 1e7
-                event.posErr = int(su.group(7)) / 1e3
-                self.gnssLog.append(GnssInfo(int(su.group(4)), event.lat, event.long, event.posErr, event.speed))
-                if event.posErr > self.cfg.TripData["GnssErrorLimit"]:
-                    event.alertText = appendAlertText(event.alertText, "GNSS error greater than threshold.")
-
-                # Check if out of trip event, i.e. end trip time > 0.
-                if self.tripEnd > 0:
-                    event.isOutOfTrip = True
-
-                # Break out some of the event data explicitly.
-                eventSpecifics = su.group(11)
-                # =============================================================================
-                # OVERSPEED event
-                # =============================================================================
-                if event.event == "OVERSPEED":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.duration = int(sp.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-                        self.numOverspeed += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # ZONEOVERSPEED event
-                # =============================================================================
-                elif event.event == "ZONEOVERSPEED":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.duration = int(sp.group(2))
-                        event.maxSpeed = int(sp.group(3))
-                        event.zoneOutput = int(sp.group(4))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(5))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-                        self.numZoneOverspeed += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # ENGINEOVERSPEED event
-                # =============================================================================
-                elif event.event == "ENGINEOVERSPEED":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) v:([0-9]+)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.duration = int(sp.group(2))
-                        event.maxRPM = int(sp.group(3))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-                        self.numEngineOverspeed += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # LOWCOOLANT, OILPRESSURE, ENGINETEMP, OFFSEAT, OVERLOAD event (all the same format)
-                # =============================================================================
-                elif event.event in {"LOWCOOLANT", "OILPRESSURE", "ENGINETEMP", "OFFSEAT", "OVERLOAD"}:
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.duration = int(sp.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-                        if su.group(10) == "LOWCOOLANT":
-                            self.numLowCoolant += 1
-                        elif su.group(10) == "OILPRESSURE":
-                            self.numOilPressure += 1
-                        elif su.group(10) == "ENGINETEMP":
-                            self.numEngineTemperature += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # UNBUCKLED event
-                # =============================================================================
-                elif event.event == "UNBUCKLED":
-                    # Need to cater for Smartrack UNBUCKLED events, which have the same name but different format.
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([DP])(.*)$')
-                    specPatternST = re.compile(r'([0-9]+) (.*)$')
-
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.duration = int(sp.group(2))
-                        event.seatOwner = sp.group(3)
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numOperatorEvents += 1
-                        if (sp.group(3) == "D"):
-                            self.numUnbuckled_O += 1
-                        else:
-                            self.numUnbuckled_P += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                    else:
-                        sp = re.search(specPatternST, eventSpecifics)
-                        if sp:
-                            event.tripStartId = int(sp.group(1))
-
-                            # Read battery voltage from event header.
-                            # But only if still collecting extra data, i.e. trip has not ended.
-                            if not self.stopExtraData:
-                                # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                                # Note that Smartrack has floats instead of integers for battery voltage.
-                                voltPattern = re.compile(r'.*v:([.0-9]+)$')
-                                vp = re.search(voltPattern, sp.group(2))
-                                if vp:
-                                    event.battery = float(vp.group(1))
-                                    # And add to battery level list.
-                                    self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                    # Check for negative battery voltage condition.
-                                    if event.battery < 0:
-                                        event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                            # Smartrack unbuckled event so assume Operator (Driver) is the owner.
-                            event.seatOwner = "D"
-
-                            # Increment event counters.
-                            self.numUnbuckled_O += 1
-
-                            # Add event to list of events.
-                            self.events.append(event)
-                # =============================================================================
-                # ZONECHANGE event
-                # =============================================================================
-                elif event.event == "ZONECHANGE":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.fromZone = int(sp.group(2))
-                        event.toZone = int(sp.group(3))
-                        event.zoneOutput = int(sp.group(4))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(5))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numOperatorEvents += 1
-                        self.numZoneChange += 1
-
-                        # Record the zone change event in the zone change log.
-                        # This can be used if we plot zone speed limits on speed plot.
-                        # Record the previous zone change at this time so that we can get a step function.
-                        if len(self.zoneXings) > 0:
-                            self.zoneXings.append(ZoneInfo(int(su.group(4)), self.zoneXings[-1].fromZone, self.zoneXings[-1].toZone, self.zoneXings[-1].zoneOutput))
-                        else:
-                            # Record first from zone so that we can possibly do step at first zonechange.
-                            self.firstFromZone = event.fromZone
-
-                        self.zoneXings.append(ZoneInfo(int(su.group(4)), event.fromZone, event.toZone, event.zoneOutput))
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # IMPACT event
-                # =============================================================================
-                elif event.event == "IMPACT":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([\-a-zA-Z]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.fwdG = int(sp.group(2)) / 10.0
-                        event.revG = int(sp.group(3)) / 10.0
-                        event.leftG = int(sp.group(4)) / 10.0
-                        event.rightG = int(sp.group(5)) / 10.0
-                        event.vectorMag = int(sp.group(6)) / 10.0
-                        event.vectorDirn = int(sp.group(7)) / 10.0
-                        event.severity = sp.group(8)
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(9))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-                        if event.severity == "C":
-                            self.numImpact_H += 1
-                        elif event.severity == "W":
-                            self.numImpact_M += 1
-                        elif event.severity == "-":
-                            self.numImpact_L += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # CHECKLIST event
-                # =============================================================================
-                elif event.event == "CHECKLIST":
-                    specPattern = re.compile(r'([0-9]+) (OK|CANCEL|NOFILE) ([0-9]+) ([0-9]+) ([0-9]+) ([\-a-zA-Z]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.result = sp.group(2)
-                        event.failedQ = int(sp.group(3))
-                        event.duration = int(sp.group(4))
-                        event.chkVersion = int(sp.group(5))
-                        event.chkType = sp.group(6)
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(7))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numOperatorEvents += 1
-                        self.numChecklist += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # CLFAIL event
-                # =============================================================================
-                elif event.event == "CLFAIL":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.failedQNo = int(sp.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # XSIDLESTART event
-                # =============================================================================
-                elif event.event == "XSIDLESTART":
-                    specPattern = re.compile(r'([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(2))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # XSIDLE event
-                # (variation with XSIDLE reason)
-                # Need to check for longest search string first.
-                # =============================================================================
-                elif event.event == "XSIDLE":
-                    specPattern1 = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    specPattern2 = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp1 = re.search(specPattern1, eventSpecifics)
-                    sp2 = re.search(specPattern2, eventSpecifics)
-                    # Check for extended XSIDLE event with added event reason.
-                    if sp1:
-                        event.tripStartId = int(sp1.group(1))
-                        event.maxIdle = int(sp1.group(2))
-                        event.xsidleReason = int(sp1.group(3))
-
-                        # For charting of XSIDLE like other duration based events copy the max idle time to event duration.
-                        event.duration = event.maxIdle
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp1.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                    # Check for basic XSIDLE event.
-                    elif sp2:
-                        event.tripStartId = int(sp2.group(1))
-                        event.maxIdle = int(sp2.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp2.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # CONFIG event
-                # =============================================================================
-                elif event.event == "CONFIG":
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # SERVICE event
-                # =============================================================================
-                elif event.event == "SERVICE":
-
-                    specPattern = re.compile(r'([0-9]+)')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.serviceId = int(sp.group(1))
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # POWERDOWN event
-                # =============================================================================
-                elif event.event == "POWERDOWN":
-
-                        # Indicate that event is OTHER event.
-                        # The event is supported, but still considered other.
-                        event.isOther = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # SWSTART event.
-                # *********************************************************************************************************************************************
-                elif "SWSTART" in event.event:   
-
-                    specPattern = re.compile(r'([.0-9]+)(.*) (v.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        # Save the software version.
-                        event.firmware = f'{sp.group(1)} {sp.group(2)}'
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Indicate event is Other event.
-                        event.isOther = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # REPORT event.
-                # *********************************************************************************************************************************************
-                elif event.event == "REPORT":   
-                    specPattern = re.compile(r'(\*|[0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        # Check for bad sign-on ID, i.e. "*".
-                        if (sp.group(1) == "*"):
-                            event.tripStartId = -1
-                        else:
-                            event.tripStartId = int(sp.group(1))
-                        event.speed = int(sp.group(2))
-                        event.direction = int(sp.group(3))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Indicate event is Report event to control presentation format.
-                        event.isReport = True
-                        self.numReportEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # CRITICALOUTPUTSET event.
-                # *********************************************************************************************************************************************
-                elif event.event == "CRITICALOUTPUTSET":   
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.speed = int(sp.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # OOS PM/UPM event
-                # =============================================================================
-                elif ((event.event == "OOS PM") or (event.event == "OOS UPM")):
-
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.oosReason = int(sp.group(2))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(3))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numVehicleEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # INPUT event.
-                # *********************************************************************************************************************************************
-                elif event.event == "INPUT":   
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.inputNo = int(sp.group(1))
-                        event.inputState = int(sp.group(2))
-                        event.activeTime = int(sp.group(3))
-                        # Note that activeTime refers to time in the active state.
-                        # That is, if inputState is inactive state (0) then active time will always be 0.
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # For input events add the input number to the alert field.
-                        # This is useful for looking for particular inputs when the events column is collapsed.
-                        event.alertText = appendAlertText(event.alertText, "Input : {0:d}".format(event.inputNo))
-
-                        # Indicate event is Input event to control presentation format.
-                        event.isInput = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # DEBUG event.
-                # *********************************************************************************************************************************************
-                elif event.event == "DEBUG":   
-
-                    specPattern = re.compile(r'(.+)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-
-                        # Debug information.
-                        event.debugInfo = sp.group(1)
-
-                        # Check and alert for known critical debug issues.
-                        if "Time1H:" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "Time correction.")
-
-                        elif "Time1H INV:" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "Invalid time detected.")
-
-                        elif "Time(BAD)" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "BAD time detected.")
-                        elif "v:" in event.debugInfo:
-                            # Read battery voltage from event header.
-                            # But only if still collecting extra data, i.e. trip has not ended.
-                            if not self.stopExtraData:
-                                # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                                voltPattern = re.compile(r'.*v:([0-9]+)$')
-                                vp = re.search(voltPattern, event.debugInfo)
-                                if vp:
-                                    event.battery = int(vp.group(1)) / 10.0
-                                    # And add to battery level list.
-                                    self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                    # Check for negative battery voltage condition.
-                                    if event.battery < 0:
-                                        event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Indicate event is Debug event to control presentation format.
-                        event.isDebug = True
-                        self.numDebugEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # POWER event.
-                # *********************************************************************************************************************************************
-                elif event.event == "POWER":
-                    specPattern = re.compile(r'([0-9]+) ([ _A-Z]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(3))
-                        event.voltage = int(sp.group(1)) / 10.0
-                        event.batteryState = sp.group(2)
-
-                        # If battery voltage not okay set alert text.
-                        if event.batteryState != "OK":
-                            event.alertText = appendAlertText(event.alertText, "Battery not OK.")
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # TRIP event
-                # (variation with no On Seat time)
-                # Need to check for longest search string first.
-                # *********************************************************************************************************************************************
-                elif event.event == "TRIP":   
-
-                    self.tripEnd = int(su.group(4))
-                    self.logger.debug("Detected trip end at {0:s}".format(datetime.fromtimestamp(self.tripEnd).strftime('%d/%m/%Y %H:%M:%S')))
-
-                    specPattern1 = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    specPattern2 = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp1 = re.search(specPattern1, eventSpecifics)
-                    sp2 = re.search(specPattern2, eventSpecifics)
-                    # Check TRIP event with on seat time.
-                    if sp1:
-                        event.tripStartId = int(sp1.group(1))
-                        event.timeFwd = int(sp1.group(2))
-                        event.timeRev = int(sp1.group(3))
-                        event.timeIdle = int(sp1.group(4))
-                        event.maxIdle = int(sp1.group(5))
-                        event.timeOnSeat = int(sp1.group(6))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp1.group(7))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numTripEvents += 1
-
-                    # Check TRIP event without on seat time.
-                    elif sp2:
-                        event.tripStartId = int(sp2.group(1))
-                        event.timeFwd = int(sp2.group(2))
-                        event.timeRev = int(sp2.group(3))
-                        event.timeIdle = int(sp2.group(4))
-                        event.maxIdle = int(sp2.group(5))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp2.group(6))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numTripEvents += 1
-
-                    # If either type of TRIP event then do end of trip processing.
-                    if sp1 or sp2:
-                        # At end of trip can extend last zone to end of trip.
-                        if len(self.zoneXings) > 0:
-                            self.zoneXings.append(ZoneInfo(int(su.group(4)), self.zoneXings[-1].fromZone, self.zoneXings[-1].toZone, self.zoneXings[-1].zoneOutput))
-
-                        # Can also check if we can extend the zone at the beginning of the trip.
-                        # Can only do this if we have revisited the first zone during the trip.
-                        for z in self.zoneXings[1:]:
-                            # See if we visited first zone later in the trip.
-                            if self.firstFromZone == z.toZone:
-                                fz1 = ZoneInfo(self.tripStart, 0, 0, z.zoneOutput)
-                                fz2 = ZoneInfo(self.zoneXings[0].time, 0, 0, z.zoneOutput)
-                                # Have been in zone before, so add step at start of speed plot.
-                                self.zoneXings.insert(0, fz2)
-                                self.zoneXings.insert(0, fz1)
-                                break
-
-                        # Can do a check if time in traction / idle adds up to trip duration.
-                        totalTimes = event.timeFwd + event.timeRev + event.timeIdle
-                        tripTime = self.tripEnd - self.tripStart
-                        diff = tripTime - totalTimes
-                        if diff != 0:
-                            event.alertText = appendAlertText(event.alertText, "Trip time inconsistent.")
-
-                        # Don't want to collect any more extra data as not useful for trip plots.
-                        self.stopExtraData = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-
-                        # Set TRIP event reached flag. Used so that we can look for TRIPSUMMARY and/or TRIPLOAD events.
-                        self.tripTrip = True
-                # *********************************************************************************************************************************************
-                # Other events
-                # Only event names checked, parameter details ignored.
-                # *********************************************************************************************************************************************
-                else:
-                    # Don't include SIGNON, TRIP, TRIPSUMMARY, and TRIPLOAD as they are detected separately.
-                    if event.event not in ["SIGNON", "TRIP", "TRIPSUMMARY", "TRIPLOAD"]:
-
-                        # Indicate that event is OTHER event, i.e. not supported (yet).
-                        event.isOther = True
-
-                        # Increment event counters.
-                        self.numOtherEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # Look for trip summary type events. These occurs after the TRIP event but are only generated if events occurred during the trip.
-                # Doing these events separately as they are different format to the OTHER event messages.
-                # *********************************************************************************************************************************************
-                if self.tripTrip == True:
-                    if event.event == "TRIPSUMMARY":
-                        specPattern = re.compile(r'([0-9]+)')
-                        sp = re.search(specPattern, eventSpecifics)
-                        if sp:
-                            event.tripStartId = int(sp.group(1))
-
-                            # Increment event counters.
-                            self.numTripEvents += 1
-
-                            # Normally this event would be tagged "out of trip" as occurred after TRIP event.
-                            # Treat it specially as part of the trip, really.
-                            event.isOutOfTrip = False
-
-                            # Add event to list of events.
-                            self.events.append(event)
-                    elif event.event == "TRIPLOAD":
-                        specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)')
-                        sp = re.search(specPattern, eventSpecifics)
-                        if sp:
-                            event.tripStartId = int(sp.group(1))
-                            event.travelLoaded = int(sp.group(2))
-                            event.travelUnloaded = int(sp.group(3))
-                            event.idleLoaded = int(sp.group(4))
-                            event.idleUnloaded = int(sp.group(5))
-                            event.liftCount = int(sp.group(6))
-                            event.cumWeight = int(sp.group(7))
-
-                            # Increment event counters.
-                            self.numTripEvents += 1
-
-                            # Normally this event would be tagged "out of trip" as occurred after TRIP event.
-                            # Treat it specially as part of the trip, really.
-                            event.isOutOfTrip = False
-
-                            # Add event to list of events.
-                            self.events.append(event)
-
-                            # At end of trip can extend last zone to end of trip.
-                            if len(self.zoneXings) > 0:
-                                self.zoneXings.append(ZoneInfo(int(su.group(4)), self.zoneXings[-1].fromZone, self.zoneXings[-1].toZone, self.zoneXings[-1].zoneOutput))
-
-                            # Can also check if we can extend the zone at the beginning of the trip.
-                            # Can only do this if we have revisited the first zone during the trip.
-                            for z in self.zoneXings[1:]:
-                                # See if we visited first zone later in the trip.
-                                if self.firstFromZone == z.toZone:
-                                    fz1 = ZoneInfo(self.tripStart, 0, 0, z.zoneOutput)
-                                    fz2 = ZoneInfo(self.zoneXings[0].time, 0, 0, z.zoneOutput)
-                                    # Have been in zone before, so add step at start of speed plot.
-                                    self.zoneXings.insert(0, fz2)
-                                    self.zoneXings.insert(0, fz1)
-                                    break
-
-                            # Don't want to collect any more extra data as not useful for trip plots.
-                            self.stopExtraData = True
-
-                            # Add event to list of events.
-                            self.events.append(event)
-
-                            # Set TRIP event reached flag.
-                            self.tripTrip = True
+        # Only format per event debug messages if they are going to be logged.
+        self.logDebug = self.logger.isEnabledFor(logging.DEBUG)
+
+        # **************************************************************
+        # Single pass through the buffer, tokenizing each event line once.
+        # Events before the SIGNON event are held until the SIGNON event is found,
+        # as all events are relative to the start of the trip.
+        # **************************************************************
+        pending = []
+        for line in bufferLines(self.logBuf):
+            hdr = tokenizeEvent(line)
+            if hdr is None:
+                continue
+
+            if pending is not None:
+                # Look for SIGNON event.
+                specifics = startSpecifics(hdr, "SIGNON")
+                if specifics is None:
+                    pending.append(hdr)
+                    continue
+                self.extractSignon(hdr, specifics)
+
+                # Now have start of trip so catch up on any earlier events.
+                for ph in pending:
+                    self.extractEvent(ph)
+                pending = None
+
+            self.extractEvent(hdr)
+
+        # Buffer no longer needed now that data has been extracted.
+        self.logBuf = None
+        # Speed times only needed while extracting.
+        self.speedTimes = None
+
+        # Event types in log, for event filtering.
+        self.eventTypes = eventTypes(self.cfg, self.events)
+
+    # *******************************************
+    # Extract SIGNON event data.
+    # *******************************************
+    def extractSignon(self, hdr, eventSpecifics):
+        # Break out some of the event data explicitly.
+        sp = signonPattern.search(eventSpecifics)
+        if sp:
+            # Create event object.
+            # Initialised with event type and time as in all events.
+            event = Event("SIGNON", hdr.time)
+            self.tripStart = hdr.time
+            self.logger.debug("Detected trip at {0:s}".format(datetime.fromtimestamp(self.tripStart).strftime('%d/%m/%Y %H:%M:%S')))
+
+            # Initialise last time to start of trip.
+            self.lastTime = self.tripStart
+
+            # Save sign-on ID at sign-on event for checking against other events; they should be the same.
+            self.tripStartId = hdr.signonId
+
+            # Add additional event data.
+            event.tripStartId = hdr.signonId
+            event.driverId = sp.group(1)
+            event.cardId = int(sp.group(2), base=16)
+            event.result = sp.group(3)
+            event.bitsRead = int(sp.group(4))
+            event.keyboard = sp.group(5)
+            event.cardReader = sp.group(6)
+
+            # Diagnostics to indicate sign-on ID. Useful for reference to log file.
+            self.logger.debug("Trip SIGNON ID {0:d}".format(event.tripStartId))
+
+            # Check for Bypass condition; indicated by driver ID of -12.
+            if event.driverId == "-12":
+                event.alertText = appendAlertText(event.alertText, "Bypass detected.")
+
+            # Get speed data from event header.
+            event.speed = hdr.speed
+
+            # Read battery voltage from event header.
+            readBatteryVoltage(self, event, hdr.time, sp.group(7))
+
+            # Add RSSI diagnostics and GNSS location.
+            addDiagnostics(self, event, hdr)
+
+            # Increment event counters.
+            self.numTripEvents += 1
+
+            # Add event to list of events.
+            self.events.append(event)
+
+            # Initialise trip not ended, in TRIP event not reached.
+            self.tripTrip = False
+
+    # *******************************************
+    # Extract event data for an event in the trip.
+    # *******************************************
+    def extractEvent(self, hdr):
+        # Found event.
+        event = Event(hdr.event, hdr.time)
+        if self.logDebug:
+            self.logger.debug("Detected event: {0:s}, at: {1:s}".format(hdr.event, datetime.fromtimestamp(hdr.time).strftime('%d/%m/%Y %H:%M:%S')))
+
+        # Check for event time in the past, except if event is POWERDOWN as this is always in the past.
+        if hdr.event != "POWERDOWN":
+            if hdr.time < self.lastTime:
+                event.alertText = appendAlertText(event.alertText, "Event time reversal.")
+            self.lastTime = hdr.time
+
+        # Get speed data from event header.
+        # But only if still collecting extra data, i.e. trip has not ended.
+        if not self.stopExtraData:
+            event.speed = hdr.speed
+            # Don't get speed from POWERDOWN event as these events occur out of order.
+            # If event is REPORT then don't log speed as speed in other field (with direction).
+            if (hdr.event != "POWERDOWN") and (hdr.event != "REPORT"):
+                logSpeed(self, hdr)
+
+        # Add RSSI diagnostics and GNSS location.
+        addDiagnostics(self, event, hdr)
+
+        # Check if out of trip event, i.e. end trip time > 0.
+        if self.tripEnd > 0:
+            event.isOutOfTrip = True
+
+        # Break out the rest of the event data according to event type.
+        parser = tripEventParsers.get(hdr.event)
+        if parser is None:
+            if "SWSTART" in hdr.event:
+                parser = parseSwStart
+            else:
+                parser = parseOther
+        parser(self, event, hdr)
 
     # *******************************************
     # Check if speed time already in speed log.
     # *******************************************
     def checkForSpeedTime(self, spdTime):
-        # Initialise time found flag.
-        timeFound = False
-        # Go through speed log looking for a match.
-        for sd in self.speedLog:
-            if sd.time == spdTime:
-                timeFound = True
-        return timeFound
+        return spdTime in self.speedTimes
 
 # *******************************************
 # Zone Transition class.
@@ -1281,23 +763,39 @@ class ZoneX():
         # Buffer snippet for zone change / transition.
         self.logBuf = logBuf
 
+        # Controller details at the start of the power cycle, set by the log reader; None if not known.
+        self.controllerID = None
+        self.firmwareVersion = None
+
         # Event data.
         self.events = []
     
         # Speed data.
-        self.speedLog = []
+        # Times already in the speed log are also kept in a set, for quick duplicate checks while extracting.
+        self.speedLog = SpeedSeries()
+        self.speedTimes = set()
 
         # GNSS data.
-        self.gnssLog = []
+        self.gnssLog = GnssSeries()
 
         # RSSI data.
-        self.rssiLog = []
+        self.rssiLog = RssiSeries()
 
         # Zone crossings.
-        self.zoneXings = []
+        self.zoneXings = ZoneSeries()
 
         # Battery level.
-        self.batteryLevel = []
+        self.batteryLevel = BatterySeries()
+
+    # *******************************************
+    # State of power cycle for pickling (cache and worker processes).
+    # Configuration and logger are not pickled; they are attached again when loaded.
+    # *******************************************
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cfg"] = None
+        state["logger"] = None
+        return state
 
     # *******************************************
     # Extract power cycle data from buffer snippet.
@@ -1337,411 +835,824 @@ class ZoneX():
         # Initialise flag to stop collecting extra data past end of trip.
         self.stopExtraData = False
 
-        # ******************************
-        # Look for IGN_ON event.
-        # ******************************
-        patternStart = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) (HARDWARE IGN_ON) (.+)$', re.MULTILINE)
-
-        su = re.search(patternStart, self.logBuf)
-        if su:
-            # Break out some of the event data explicitly.
-            eventSpecifics = su.group(11)
-            specPattern = re.compile(r'(.+?)$')
-            sp = re.search(specPattern, eventSpecifics)
-            if sp:
-                # Create event object.
-                # Initialised with event type and time as in all events.
-                event = Event(su.group(10), int(su.group(4)))
-                self.tripStart = int(su.group(4))
-                self.logger.debug("Detected power ON at: {0:s}".format(datetime.fromtimestamp(self.tripStart).strftime('%d/%m/%Y %H:%M:%S')))
-
-                # Initialise last time to start of trip.
-                self.lastTime = self.tripStart
-
-                # Get speed data from event header.
-                event.speed = int(su.group(9))
-
-                # Read battery voltage from event header.
-                # But only if still collecting extra data, i.e. trip has not ended.
-                if not self.stopExtraData:
-                    # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                    voltPattern = re.compile(r'v:([0-9]+)$')
-                    vp = re.search(voltPattern, sp.group(1))
-                    if vp:
-                        # Extract battery voltage.
-                        event.battery = int(vp.group(1)) / 10.0
-
-                        # And add to battery level list.
-                        self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                        # Check for negative battery voltage condition.
-                        if event.battery < 0:
-                            event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                # Add RSSI diagnostics.
-                event.rssi = int(su.group(8))
-                if (event.rssi > 0) and (event.rssi < self.cfg.TripData["RssiErrorLimit"]):
-                    event.alertText = appendAlertText(event.alertText, "RSSI below threshold.")
-                else:
-                    self.rssiLog.append(RssiInfo(int(su.group(4)), event.rssi))
-
-                # Add GNSS location.
-                event.lat = int(su.group(5)) / 1e7
-                event.long = int(su.group(6)) / 1e7
-                event.posErr = int(su.group(7)) / 1e3
-                self.gnssLog.append(GnssInfo(int(su.group(4)), event.lat, event.long, event.posErr, event.speed))
-                if event.posErr > self.cfg.TripData["GnssErrorLimit"]:
-                    event.alertText = appendAlertText(event.alertText, "GNSS error greater than threshold.")
-
-                # Increment event counters.
-                self.numTripEvents += 1
-
-                # Add event to list of events.
-                self.events.append(event)
-
-                # Initialise power cycle not ended.
-                self.ignCycleOpen = False
-
-            # **************************************************************
-            # Look for specific events other than the hardware power cycle event.
-            # **************************************************************
-            patternData = re.compile(r'([0-9]{1,2}/[0-9]{2}/[0-9]{4}) ([0-9]{1,2}:[0-9]{2}:[0-9]{2}) .*?\,*?EVENT ([0-9]+) ([0-9]+) (.+)/(.+)/(.+)/([-0-9]+)/([0-9]+) ([ _a-zA-Z]+) (.+)$', re.MULTILINE)
-            for su in re.finditer(patternData, self.logBuf):
-
-                # Found event.
-                event = Event(su.group(10), int(su.group(4)))
-                self.logger.debug("Detected event: {0:s}, at: {1:s}".format(su.group(10), datetime.fromtimestamp(int(su.group(4))).strftime('%d/%m/%Y %H:%M:%S')))
-
-                # Check for event time in the past, except if event is POWERDOWN as this is always in the past.
-                if su.group(10) != "POWERDOWN":
-                    if int(su.group(4)) < self.lastTime:
-                        event.alertText = appendAlertText(event.alertText, "Event time reversal.")
-                    self.lastTime = int(su.group(4))
-
-                # Get speed data from event header.
-                # But only if still collecting extra data, i.e. trip has not ended.
-                if not self.stopExtraData:
-                    event.speed = int(su.group(9))
-                    # Don't get speed from POWERDOWN event as these events occur out of order.
-                    if su.group(10) != "POWERDOWN": 
-                        # If speedlog already has speed for this time then skip, else append to list.
-                        # If event is REPORT then don't log speed as speed in other field (with direction).
-                        if su.group(10) != "REPORT":
-                            if self.checkForSpeedTime(int(su.group(4))) == False:
-                                self.speedLog.append(SpeedInfo(int(su.group(4)), int(su.group(9))))
-                                self.logger.debug("Logged speed: {0:d}, at {1:s}".format(int(su.group(9)), datetime.fromtimestamp(int(su.group(4))).strftime('%d/%m/%Y %H:%M:%S')))
-
-                        # Add RSSI diagnostics.
-                        event.rssi = int(su.group(8))
-                        if (event.rssi > 0) and (event.rssi < self.cfg.TripData["RssiErrorLimit"]):
-                            event.alertText = appendAlertText(event.alertText, "RSSI below threshold.")
-                        else:
-                            self.rssiLog.append(RssiInfo(int(su.group(4)), event.rssi))
-
-                        # Add GNSS location.
-                        event.lat = int(su.group(5)) / 1e7
-                        event.long = int(su.group(6)) / 1e7
-                        event.posErr = int(su.group(7)) / 1e3
-                        self.gnssLog.append(GnssInfo(int(su.group(4)), event.lat, event.long, event.posErr, event.speed))
-                        if event.posErr > self.cfg.TripData["GnssErrorLimit"]:
-                            event.alertText = appendAlertText(event.alertText, "GNSS error greater than threshold.")
-    
-                # Break out some of the event data explicitly.
-                eventSpecifics = su.group(11)
-
-                # =============================================================================
-                # ZONECHANGE event
-                # =============================================================================
-                if event.event == "ZONECHANGE":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.fromZone = int(sp.group(2))
-                        event.toZone = int(sp.group(3))
-                        event.zoneOutput = int(sp.group(4))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(5))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numOperatorEvents += 1
-                        self.numZoneChange += 1
-
-                        # Record the zone change event in the zone change log.
-                        # This can be used if we plot zone speed limits on speed plot.
-                        # Record the previous zone change at this time so that we can get a step function.
-                        if len(self.zoneXings) > 0:
-                            self.zoneXings.append(ZoneInfo(int(su.group(4)), self.zoneXings[-1].fromZone, self.zoneXings[-1].toZone, self.zoneXings[-1].zoneOutput))
-                        else:
-                            # Record first from zone so that we can possibly do step at first zonechange.
-                            self.firstFromZone = event.fromZone
-
-                        self.zoneXings.append(ZoneInfo(int(su.group(4)), event.fromZone, event.toZone, event.zoneOutput))
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # ZONETRANSITION event
-                # =============================================================================
-                elif event.event == "ZONETRANSITION":
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+) ([0-9]+) (ENTRY|EXIT) (.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(1))
-                        event.fromZone = int(sp.group(2))
-                        event.toZone = int(sp.group(3))
-                        event.toZoneOutput = int(sp.group(4))
-                        event.transition = sp.group(5)
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(6))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numTransition += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # =============================================================================
-                # POWERDOWN event
-                # =============================================================================
-                elif event.event == "POWERDOWN":
-
-                        # Indicate that event is OTHER event.
-                        # The event is supported, but still considered other.
-                        event.isOther = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # REPORT event.
-                # *********************************************************************************************************************************************
-                elif event.event == "REPORT":   
-                    specPattern = re.compile(r'(\*|[0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        # Check for bad sign-on ID, i.e. "*".
-                        if (sp.group(1) == "*"):
-                            event.tripStartId = -1
-                        else:
-                            event.tripStartId = int(sp.group(1))
-                        event.speed = int(sp.group(2))
-                        event.direction = int(sp.group(3))
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Indicate event is Report event to control presentation format.
-                        event.isReport = True
-                        self.numReportEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # INPUT event.
-                # *********************************************************************************************************************************************
-                elif event.event == "INPUT":   
-                    specPattern = re.compile(r'([0-9]+) ([0-9]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.inputNo = int(sp.group(1))
-                        event.inputState = int(sp.group(2))
-                        event.activeTime = int(sp.group(3))
-                        # Note that activeTime refers to time in the active state.
-                        # That is, if inputState is inactive state (0) then active time will always be 0.
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # For input events add the input number to the alert field.
-                        # This is useful for looking for particular inputs when the events column is collapsed.
-                        event.alertText = appendAlertText(event.alertText, "Input : {0:d}".format(event.inputNo))
-
-                        # Indicate event is Input event to control presentation format.
-                        event.isInput = True
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # DEBUG event.
-                # *********************************************************************************************************************************************
-                elif event.event == "DEBUG":   
-
-                    specPattern = re.compile(r'(.+)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-
-                        # Debug information.
-                        event.debugInfo = sp.group(1)
-
-                        # Check and alert for known critical debug issues.
-                        if "Time1H:" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "Time correction.")
-
-                        elif "Time1H INV:" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "Invalid time detected.")
-
-                        elif "Time(BAD)" in event.debugInfo:
-                            event.alertText = appendAlertText(event.alertText, "BAD time detected.")
-                        elif "v:" in event.debugInfo:
-                            # Read battery voltage from event header.
-                            # But only if still collecting extra data, i.e. trip has not ended.
-                            if not self.stopExtraData:
-                                # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                                voltPattern = re.compile(r'.*v:([0-9]+)$')
-                                vp = re.search(voltPattern, event.debugInfo)
-                                if vp:
-                                    event.battery = int(vp.group(1)) / 10.0
-                                    # And add to battery level list.
-                                    self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                    # Check for negative battery voltage condition.
-                                    if event.battery < 0:
-                                        event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Indicate event is Debug event to control presentation format.
-                        event.isDebug = True
-                        self.numDebugEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # POWER event.
-                # *********************************************************************************************************************************************
-                elif event.event == "POWER":
-                    specPattern = re.compile(r'([0-9]+) ([ _A-Z]+) ([0-9]+)(.*)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    if sp:
-                        event.tripStartId = int(sp.group(3))
-                        event.voltage = int(sp.group(1)) / 10.0
-                        event.batteryState = sp.group(2)
-
-                        # If battery voltage not okay set alert text.
-                        if event.batteryState != "OK":
-                            event.alertText = appendAlertText(event.alertText, "Battery not OK.")
-
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(4))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Add event to list of events.
-                        self.events.append(event)
-                # *********************************************************************************************************************************************
-                # Power off event
-                # *********************************************************************************************************************************************
-                elif event.event == "HARDWARE IGN_OFF":   
-
-                    self.tripEnd = int(su.group(4))
-                    self.logger.debug("Detected power OFF at: {0:s}".format(datetime.fromtimestamp(self.tripEnd).strftime('%d/%m/%Y %H:%M:%S')))
-
-                    specPattern = re.compile(r'(.+?)$')
-                    sp = re.search(specPattern, eventSpecifics)
-                    # Check TRIP event with on seat time.
-                    if sp:
-                        # Read battery voltage from event header.
-                        # But only if still collecting extra data, i.e. trip has not ended.
-                        if not self.stopExtraData:
-                            # The voltage at end of event strings appears to be optional, so need to check if it exists.
-                            voltPattern = re.compile(r'.*v:([0-9]+)$')
-                            vp = re.search(voltPattern, sp.group(1))
-                            if vp:
-                                event.battery = int(vp.group(1)) / 10.0
-                                # And add to battery level list.
-                                self.batteryLevel.append(BatteryInfo(int(su.group(4)), event.battery))
-
-                                # Check for negative battery voltage condition.
-                                if event.battery < 0:
-                                    event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
-
-                        # Increment event counters.
-                        self.numTripEvents += 1
-                # *********************************************************************************************************************************************
-                # Other events
-                # Only event names checked, parameter details ignored.
-                # *********************************************************************************************************************************************
-                else:
-                    # Don't include SIGNON, TRIP, TRIPSUMMARY, and TRIPLOAD as they are detected separately.
-                    if event.event not in ["HARDWARE IGN_ON", "HARDWARE IGN_OFF"]:
-
-                        # Indicate that event is OTHER event, i.e. not supported (yet).
-                        event.isOther = True
-
-                        # Increment event counters.
-                        self.numOtherEvents += 1
-
-                        # Add event to list of events.
-                        self.events.append(event)
+        # Only format per event debug messages if they are going to be logged.
+        self.logDebug = self.logger.isEnabledFor(logging.DEBUG)
+
+        # **************************************************************
+        # Single pass through the buffer, tokenizing each event line once.
+        # Events before the IGN_ON event are held until the IGN_ON event is found.
+        # **************************************************************
+        pending = []
+        for line in bufferLines(self.logBuf):
+            hdr = tokenizeEvent(line)
+            if hdr is None:
+                continue
+
+            if pending is not None:
+                # Look for IGN_ON event.
+                specifics = startSpecifics(hdr, "HARDWARE IGN_ON")
+                if specifics is None:
+                    pending.append(hdr)
+                    continue
+                self.extractIgnOn(hdr, specifics)
+
+                # Now have start of power cycle so catch up on any earlier events.
+                for ph in pending:
+                    self.extractEvent(ph)
+                pending = None
+
+            self.extractEvent(hdr)
+
+        # Buffer no longer needed now that data has been extracted.
+        self.logBuf = None
+        # Speed times only needed while extracting.
+        self.speedTimes = None
+
+        # Event types in log, for event filtering.
+        self.eventTypes = eventTypes(self.cfg, self.events)
+
+    # *******************************************
+    # Extract IGN_ON event data.
+    # *******************************************
+    def extractIgnOn(self, hdr, eventSpecifics):
+        # Break out some of the event data explicitly.
+        sp = ignOnPattern.search(eventSpecifics)
+        if sp:
+            # Create event object.
+            # Initialised with event type and time as in all events.
+            event = Event("HARDWARE IGN_ON", hdr.time)
+            self.tripStart = hdr.time
+            self.logger.debug("Detected power ON at: {0:s}".format(datetime.fromtimestamp(self.tripStart).strftime('%d/%m/%Y %H:%M:%S')))
+
+            # Initialise last time to start of trip.
+            self.lastTime = self.tripStart
+
+            # Get speed data from event header.
+            event.speed = hdr.speed
+
+            # Read battery voltage from event header.
+            readBatteryVoltage(self, event, hdr.time, sp.group(1))
+
+            # Add RSSI diagnostics and GNSS location.
+            addDiagnostics(self, event, hdr)
+
+            # Increment event counters.
+            self.numTripEvents += 1
+
+            # Add event to list of events.
+            self.events.append(event)
+
+            # Initialise power cycle not ended.
+            self.ignCycleOpen = False
+
+    # *******************************************
+    # Extract event data for an event in the power cycle.
+    # *******************************************
+    def extractEvent(self, hdr):
+        # Found event.
+        event = Event(hdr.event, hdr.time)
+        if self.logDebug:
+            self.logger.debug("Detected event: {0:s}, at: {1:s}".format(hdr.event, datetime.fromtimestamp(hdr.time).strftime('%d/%m/%Y %H:%M:%S')))
+
+        # Check for event time in the past, except if event is POWERDOWN as this is always in the past.
+        if hdr.event != "POWERDOWN":
+            if hdr.time < self.lastTime:
+                event.alertText = appendAlertText(event.alertText, "Event time reversal.")
+            self.lastTime = hdr.time
+
+        # Get speed data from event header.
+        # But only if still collecting extra data, i.e. trip has not ended.
+        if not self.stopExtraData:
+            event.speed = hdr.speed
+            # Don't get speed from POWERDOWN event as these events occur out of order.
+            if hdr.event != "POWERDOWN":
+                # If event is REPORT then don't log speed as speed in other field (with direction).
+                if hdr.event != "REPORT":
+                    logSpeed(self, hdr)
+
+                # Add RSSI diagnostics and GNSS location.
+                addDiagnostics(self, event, hdr)
+
+        # Break out the rest of the event data according to event type.
+        parser = zoneEventParsers.get(hdr.event, parseOtherZone)
+        parser(self, event, hdr)
 
     # *******************************************
     # Check if speed time already in speed log.
     # *******************************************
     def checkForSpeedTime(self, spdTime):
-        # Initialise time found flag.
-        timeFound = False
-        # Go through speed log looking for a match.
-        for sd in self.speedLog:
-            if sd.time == spdTime:
-                timeFound = True
-        return timeFound
+        return spdTime in self.speedTimes
+
+# *******************************************
+# Log speed from event header if not already logged for this time.
+# *******************************************
+def logSpeed(log, hdr):
+    # If speedlog already has speed for this time then skip, else append to list.
+    if log.checkForSpeedTime(hdr.time) == False:
+        log.speedLog.append(hdr.time, hdr.speed)
+        log.speedTimes.add(hdr.time)
+        if log.logDebug:
+            log.logger.debug("Logged speed: {0:d}, at {1:s}".format(hdr.speed, datetime.fromtimestamp(hdr.time).strftime('%d/%m/%Y %H:%M:%S')))
+
+# *******************************************
+# Add RSSI diagnostics and GNSS location from event header.
+# *******************************************
+def addDiagnostics(log, event, hdr):
+    # Skip diagnostics that could not be read.
+    if None in (hdr.lat, hdr.long, hdr.posErr, hdr.rssi):
+        return
+
+    # Add RSSI diagnostics.
+    event.rssi = hdr.rssi
+    if (event.rssi > 0) and (event.rssi < log.cfg.TripData["RssiErrorLimit"]):
+        event.alertText = appendAlertText(event.alertText, "RSSI below threshold.")
+    else:
+        log.rssiLog.append(hdr.time, event.rssi)
+
+    # Add GNSS location.
+    event.lat = hdr.lat / 1e7
+    event.long = hdr.long / 1e7
+    event.posErr = hdr.posErr / 1e3
+    log.gnssLog.append(hdr.time, event.lat, event.long, event.posErr, event.speed)
+    if event.posErr > log.cfg.TripData["GnssErrorLimit"]:
+        event.alertText = appendAlertText(event.alertText, "GNSS error greater than threshold.")
+
+# *******************************************
+# Read battery voltage from end of event specifics.
+# But only if still collecting extra data, i.e. trip has not ended.
+# *******************************************
+def readBatteryVoltage(log, event, eTime, text):
+    if not log.stopExtraData:
+        # The voltage at end of event strings appears to be optional, so need to check if it exists.
+        vp = voltPattern.search(text)
+        if vp:
+            addBatteryLevel(log, event, eTime, int(vp.group(1)) / 10.0)
+
+# *******************************************
+# Add battery voltage to event and battery level list.
+# *******************************************
+def addBatteryLevel(log, event, eTime, battery):
+    event.battery = battery
+    # And add to battery level list.
+    log.batteryLevel.append(eTime, event.battery)
+
+    # Check for negative battery voltage condition.
+    if event.battery < 0:
+        event.alertText = appendAlertText(event.alertText, "Battery voltage negative.")
+
+# *******************************************
+# Close off zone crossings at end of trip.
+# *******************************************
+def closeZoneXings(log, eTime):
+    # At end of trip can extend last zone to end of trip.
+    if len(log.zoneXings) > 0:
+        lastXing = log.zoneXings[-1]
+        log.zoneXings.append(eTime, lastXing.fromZone, lastXing.toZone, lastXing.zoneOutput)
+
+    # Can also check if we can extend the zone at the beginning of the trip.
+    # Can only do this if we have revisited the first zone during the trip.
+    for z in log.zoneXings[1:]:
+        # See if we visited first zone later in the trip.
+        if log.firstFromZone == z.toZone:
+            firstTime = log.zoneXings[0].time
+            # Have been in zone before, so add step at start of speed plot.
+            log.zoneXings.insert(0, firstTime, 0, 0, z.zoneOutput)
+            log.zoneXings.insert(0, log.tripStart, 0, 0, z.zoneOutput)
+            break
+
+# =============================================================================
+# OVERSPEED event
+# =============================================================================
+def parseOverspeed(log, event, hdr):
+    sp = overspeedPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.duration = int(sp.group(2))
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+        log.numOverspeed += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# ZONEOVERSPEED event
+# =============================================================================
+def parseZoneOverspeed(log, event, hdr):
+    sp = zoneOverspeedPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.duration = int(sp.group(2))
+        event.maxSpeed = int(sp.group(3))
+        event.zoneOutput = int(sp.group(4))
+        readBatteryVoltage(log, event, hdr.time, sp.group(5))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+        log.numZoneOverspeed += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# ENGINEOVERSPEED event
+# =============================================================================
+def parseEngineOverspeed(log, event, hdr):
+    sp = engineOverspeedPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.duration = int(sp.group(2))
+        event.maxRPM = int(sp.group(3))
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+        log.numEngineOverspeed += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# LOWCOOLANT, OILPRESSURE, ENGINETEMP, OFFSEAT, OVERLOAD event (all the same format)
+# =============================================================================
+def parseDurationEvent(log, event, hdr):
+    sp = durationPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.duration = int(sp.group(2))
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+        if event.event == "LOWCOOLANT":
+            log.numLowCoolant += 1
+        elif event.event == "OILPRESSURE":
+            log.numOilPressure += 1
+        elif event.event == "ENGINETEMP":
+            log.numEngineTemperature += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# UNBUCKLED event
+# Need to cater for Smartrack UNBUCKLED events, which have the same name but different format.
+# =============================================================================
+def parseUnbuckled(log, event, hdr):
+    sp = unbuckledPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.duration = int(sp.group(2))
+        event.seatOwner = sp.group(3)
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+
+        # Increment event counters.
+        log.numOperatorEvents += 1
+        if (sp.group(3) == "D"):
+            log.numUnbuckled_O += 1
+        else:
+            log.numUnbuckled_P += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+    else:
+        sp = unbuckledPatternST.search(hdr.specifics)
+        if sp:
+            event.tripStartId = int(sp.group(1))
+
+            # Read battery voltage from event header.
+            # But only if still collecting extra data, i.e. trip has not ended.
+            if not log.stopExtraData:
+                # Note that Smartrack has floats instead of integers for battery voltage.
+                vp = voltPatternST.search(sp.group(2))
+                if vp:
+                    addBatteryLevel(log, event, hdr.time, float(vp.group(1)))
+
+            # Smartrack unbuckled event so assume Operator (Driver) is the owner.
+            event.seatOwner = "D"
+
+            # Increment event counters.
+            log.numUnbuckled_O += 1
+
+            # Add event to list of events.
+            log.events.append(event)
+
+# =============================================================================
+# ZONECHANGE event
+# =============================================================================
+def parseZoneChange(log, event, hdr):
+    sp = zoneChangePattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.fromZone = int(sp.group(2))
+        event.toZone = int(sp.group(3))
+        event.zoneOutput = int(sp.group(4))
+        readBatteryVoltage(log, event, hdr.time, sp.group(5))
+
+        # Increment event counters.
+        log.numOperatorEvents += 1
+        log.numZoneChange += 1
+
+        # Record the zone change event in the zone change log.
+        # This can be used if we plot zone speed limits on speed plot.
+        # Record the previous zone change at this time so that we can get a step function.
+        if len(log.zoneXings) > 0:
+            lastXing = log.zoneXings[-1]
+            log.zoneXings.append(hdr.time, lastXing.fromZone, lastXing.toZone, lastXing.zoneOutput)
+        else:
+            # Record first from zone so that we can possibly do step at first zonechange.
+            log.firstFromZone = event.fromZone
+
+        log.zoneXings.append(hdr.time, event.fromZone, event.toZone, event.zoneOutput)
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# ZONETRANSITION event
+# =============================================================================
+def parseZoneTransition(log, event, hdr):
+    sp = zoneTransitionPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.fromZone = int(sp.group(2))
+        event.toZone = int(sp.group(3))
+        event.toZoneOutput = int(sp.group(4))
+        event.transition = sp.group(5)
+        readBatteryVoltage(log, event, hdr.time, sp.group(6))
+
+        # Increment event counters.
+        log.numTransition += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# IMPACT event
+# =============================================================================
+def parseImpact(log, event, hdr):
+    sp = impactPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.fwdG = int(sp.group(2)) / 10.0
+        event.revG = int(sp.group(3)) / 10.0
+        event.leftG = int(sp.group(4)) / 10.0
+        event.rightG = int(sp.group(5)) / 10.0
+        event.vectorMag = int(sp.group(6)) / 10.0
+        event.vectorDirn = int(sp.group(7)) / 10.0
+        event.severity = sp.group(8)
+        readBatteryVoltage(log, event, hdr.time, sp.group(9))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+        if event.severity == "C":
+            log.numImpact_H += 1
+        elif event.severity == "W":
+            log.numImpact_M += 1
+        elif event.severity == "-":
+            log.numImpact_L += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# CHECKLIST event
+# =============================================================================
+def parseChecklist(log, event, hdr):
+    sp = checklistPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.result = sp.group(2)
+        event.failedQ = int(sp.group(3))
+        event.duration = int(sp.group(4))
+        event.chkVersion = int(sp.group(5))
+        event.chkType = sp.group(6)
+        readBatteryVoltage(log, event, hdr.time, sp.group(7))
+
+        # Increment event counters.
+        log.numOperatorEvents += 1
+        log.numChecklist += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# CLFAIL event
+# =============================================================================
+def parseClfail(log, event, hdr):
+    sp = clfailPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.failedQNo = int(sp.group(2))
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# XSIDLESTART event
+# =============================================================================
+def parseXsidleStart(log, event, hdr):
+    sp = xsidleStartPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        readBatteryVoltage(log, event, hdr.time, sp.group(2))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# XSIDLE event
+# (variation with XSIDLE reason)
+# Need to check for longest search string first.
+# =============================================================================
+def parseXsidle(log, event, hdr):
+    # Check for extended XSIDLE event with added event reason.
+    sp = xsidlePatternReason.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.maxIdle = int(sp.group(2))
+        event.xsidleReason = int(sp.group(3))
+
+        # For charting of XSIDLE like other duration based events copy the max idle time to event duration.
+        event.duration = event.maxIdle
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+    else:
+        # Check for basic XSIDLE event.
+        sp = xsidlePattern.search(hdr.specifics)
+        if sp:
+            event.tripStartId = int(sp.group(1))
+            event.maxIdle = int(sp.group(2))
+            readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+    if sp:
+        # Increment event counters.
+        log.numVehicleEvents += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# CONFIG event
+# =============================================================================
+def parseConfig(log, event, hdr):
+    # Add event to list of events.
+    log.events.append(event)
+
+# =============================================================================
+# SERVICE event
+# =============================================================================
+def parseService(log, event, hdr):
+    sp = serviceIdPattern.search(hdr.specifics)
+    if sp:
+        event.serviceId = int(sp.group(1))
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# POWERDOWN event
+# =============================================================================
+def parsePowerdown(log, event, hdr):
+    # Indicate that event is OTHER event.
+    # The event is supported, but still considered other.
+    event.isOther = True
+
+    # Add event to list of events.
+    log.events.append(event)
+
+# =============================================================================
+# SWSTART event.
+# =============================================================================
+def parseSwStart(log, event, hdr):
+    sp = swstartPattern.search(hdr.specifics)
+    if sp:
+        # Save the software version.
+        event.firmware = f'{sp.group(1)} {sp.group(2)}'
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Indicate event is Other event.
+        event.isOther = True
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# REPORT event.
+# =============================================================================
+def parseReport(log, event, hdr):
+    sp = reportPattern.search(hdr.specifics)
+    if sp:
+        # Check for bad sign-on ID, i.e. "*".
+        if (sp.group(1) == "*"):
+            event.tripStartId = -1
+        else:
+            event.tripStartId = int(sp.group(1))
+        event.speed = int(sp.group(2))
+        event.direction = int(sp.group(3))
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+
+        # Indicate event is Report event to control presentation format.
+        event.isReport = True
+        log.numReportEvents += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# CRITICALOUTPUTSET event.
+# =============================================================================
+def parseCriticalOutputSet(log, event, hdr):
+    sp = criticalOutputPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.speed = int(sp.group(2))
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# OOS PM/UPM event
+# =============================================================================
+def parseOos(log, event, hdr):
+    sp = oosPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.oosReason = int(sp.group(2))
+        readBatteryVoltage(log, event, hdr.time, sp.group(3))
+
+        # Increment event counters.
+        log.numVehicleEvents += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# INPUT event.
+# =============================================================================
+def parseInput(log, event, hdr):
+    sp = inputPattern.search(hdr.specifics)
+    if sp:
+        event.inputNo = int(sp.group(1))
+        event.inputState = int(sp.group(2))
+        event.activeTime = int(sp.group(3))
+        # Note that activeTime refers to time in the active state.
+        # That is, if inputState is inactive state (0) then active time will always be 0.
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+
+        # For input events add the input number to the alert field.
+        # This is useful for looking for particular inputs when the events column is collapsed.
+        event.alertText = appendAlertText(event.alertText, "Input : {0:d}".format(event.inputNo))
+
+        # Indicate event is Input event to control presentation format.
+        event.isInput = True
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# DEBUG event.
+# =============================================================================
+def parseDebug(log, event, hdr):
+    sp = debugPattern.search(hdr.specifics)
+    if sp:
+        # Debug information.
+        event.debugInfo = sp.group(1)
+
+        # Check and alert for known critical debug issues.
+        if "Time1H:" in event.debugInfo:
+            event.alertText = appendAlertText(event.alertText, "Time correction.")
+        elif "Time1H INV:" in event.debugInfo:
+            event.alertText = appendAlertText(event.alertText, "Invalid time detected.")
+        elif "Time(BAD)" in event.debugInfo:
+            event.alertText = appendAlertText(event.alertText, "BAD time detected.")
+        elif "v:" in event.debugInfo:
+            readBatteryVoltage(log, event, hdr.time, event.debugInfo)
+
+        # Indicate event is Debug event to control presentation format.
+        event.isDebug = True
+        log.numDebugEvents += 1
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# POWER event.
+# =============================================================================
+def parsePower(log, event, hdr):
+    sp = powerPattern.search(hdr.specifics)
+    if sp:
+        event.tripStartId = int(sp.group(3))
+        event.voltage = int(sp.group(1)) / 10.0
+        event.batteryState = sp.group(2)
+
+        # If battery voltage not okay set alert text.
+        if event.batteryState != "OK":
+            event.alertText = appendAlertText(event.alertText, "Battery not OK.")
+        readBatteryVoltage(log, event, hdr.time, sp.group(4))
+
+        # Add event to list of events.
+        log.events.append(event)
+
+# =============================================================================
+# TRIP event
+# (variation with no On Seat time)
+# Need to check for longest search string first.
+# =============================================================================
+def parseTrip(log, event, hdr):
+    log.tripEnd = hdr.time
+    log.logger.debug("Detected trip end at {0:s}".format(datetime.fromtimestamp(log.tripEnd).strftime('%d/%m/%Y %H:%M:%S')))
+
+    # Check TRIP event with on seat time.
+    sp = tripPatternOnSeat.search(hdr.specifics)
+    if sp:
+        event.timeOnSeat = int(sp.group(6))
+        voltText = sp.group(7)
+    else:
+        # Check TRIP event without on seat time.
+        sp = tripPattern.search(hdr.specifics)
+        if sp:
+            voltText = sp.group(6)
+
+    # If either type of TRIP event then do end of trip processing.
+    if sp:
+        event.tripStartId = int(sp.group(1))
+        event.timeFwd = int(sp.group(2))
+        event.timeRev = int(sp.group(3))
+        event.timeIdle = int(sp.group(4))
+        event.maxIdle = int(sp.group(5))
+        readBatteryVoltage(log, event, hdr.time, voltText)
+
+        # Increment event counters.
+        log.numTripEvents += 1
+
+        # Extend zone crossings to the end (and maybe start) of the trip.
+        closeZoneXings(log, hdr.time)
+
+        # Can do a check if time in traction / idle adds up to trip duration.
+        totalTimes = event.timeFwd + event.timeRev + event.timeIdle
+        tripTime = log.tripEnd - log.tripStart
+        diff = tripTime - totalTimes
+        if diff != 0:
+            event.alertText = appendAlertText(event.alertText, "Trip time inconsistent.")
+
+        # Don't want to collect any more extra data as not useful for trip plots.
+        log.stopExtraData = True
+
+        # Add event to list of events.
+        log.events.append(event)
+
+        # Set TRIP event reached flag. Used so that we can look for TRIPSUMMARY and/or TRIPLOAD events.
+        log.tripTrip = True
+
+# =============================================================================
+# Trip summary type events. These occurs after the TRIP event but are only generated if events occurred during the trip.
+# Doing these events separately as they are different format to the OTHER event messages.
+# =============================================================================
+def parseTripSummary(log, event, hdr):
+    if log.tripTrip == True:
+        sp = tripSummaryPattern.search(hdr.specifics)
+        if sp:
+            event.tripStartId = int(sp.group(1))
+
+            # Increment event counters.
+            log.numTripEvents += 1
+
+            # Normally this event would be tagged "out of trip" as occurred after TRIP event.
+            # Treat it specially as part of the trip, really.
+            event.isOutOfTrip = False
+
+            # Add event to list of events.
+            log.events.append(event)
+
+def parseTripLoad(log, event, hdr):
+    if log.tripTrip == True:
+        sp = tripLoadPattern.search(hdr.specifics)
+        if sp:
+            event.tripStartId = int(sp.group(1))
+            event.travelLoaded = int(sp.group(2))
+            event.travelUnloaded = int(sp.group(3))
+            event.idleLoaded = int(sp.group(4))
+            event.idleUnloaded = int(sp.group(5))
+            event.liftCount = int(sp.group(6))
+            event.cumWeight = int(sp.group(7))
+
+            # Increment event counters.
+            log.numTripEvents += 1
+
+            # Normally this event would be tagged "out of trip" as occurred after TRIP event.
+            # Treat it specially as part of the trip, really.
+            event.isOutOfTrip = False
+
+            # Add event to list of events.
+            log.events.append(event)
+
+            # Extend zone crossings to the end (and maybe start) of the trip.
+            closeZoneXings(log, hdr.time)
+
+            # Don't want to collect any more extra data as not useful for trip plots.
+            log.stopExtraData = True
+
+            # Add event to list of events.
+            log.events.append(event)
+
+            # Set TRIP event reached flag.
+            log.tripTrip = True
+
+# =============================================================================
+# Power off event
+# =============================================================================
+def parseIgnOff(log, event, hdr):
+    log.tripEnd = hdr.time
+    log.logger.debug("Detected power OFF at: {0:s}".format(datetime.fromtimestamp(log.tripEnd).strftime('%d/%m/%Y %H:%M:%S')))
+
+    sp = ignOnPattern.search(hdr.specifics)
+    if sp:
+        readBatteryVoltage(log, event, hdr.time, sp.group(1))
+
+        # Increment event counters.
+        log.numTripEvents += 1
+
+# =============================================================================
+# Events detected separately, e.g. the trip / power cycle start event.
+# =============================================================================
+def parseIgnored(log, event, hdr):
+    pass
+
+# =============================================================================
+# Other events
+# Only event names checked, parameter details ignored.
+# =============================================================================
+def parseOther(log, event, hdr):
+    # Indicate that event is OTHER event, i.e. not supported (yet).
+    event.isOther = True
+
+    # Increment event counters.
+    log.numOtherEvents += 1
+
+    # Add event to list of events.
+    log.events.append(event)
+
+# Zoners don't report the trip based events, so their other events are everything else.
+def parseOtherZone(log, event, hdr):
+    parseOther(log, event, hdr)
+
+# *******************************************
+# Event parsers for trip events.
+# SWSTART events are matched separately as firmware may add a suffix to the event name.
+# *******************************************
+tripEventParsers = {
+    "SIGNON" : parseIgnored,
+    "OVERSPEED" : parseOverspeed,
+    "ZONEOVERSPEED" : parseZoneOverspeed,
+    "ENGINEOVERSPEED" : parseEngineOverspeed,
+    "LOWCOOLANT" : parseDurationEvent,
+    "OILPRESSURE" : parseDurationEvent,
+    "ENGINETEMP" : parseDurationEvent,
+    "OFFSEAT" : parseDurationEvent,
+    "OVERLOAD" : parseDurationEvent,
+    "UNBUCKLED" : parseUnbuckled,
+    "ZONECHANGE" : parseZoneChange,
+    "IMPACT" : parseImpact,
+    "CHECKLIST" : parseChecklist,
+    "CLFAIL" : parseClfail,
+    "XSIDLESTART" : parseXsidleStart,
+    "XSIDLE" : parseXsidle,
+    "CONFIG" : parseConfig,
+    "SERVICE" : parseService,
+    "POWERDOWN" : parsePowerdown,
+    "REPORT" : parseReport,
+    "CRITICALOUTPUTSET" : parseCriticalOutputSet,
+    "OOS PM" : parseOos,
+    "OOS UPM" : parseOos,
+    "INPUT" : parseInput,
+    "DEBUG" : parseDebug,
+    "POWER" : parsePower,
+    "TRIP" : parseTrip,
+    "TRIPSUMMARY" : parseTripSummary,
+    "TRIPLOAD" : parseTripLoad
+}
+
+# *******************************************
+# Event parsers for Zoner power cycle events.
+# *******************************************
+zoneEventParsers = {
+    "HARDWARE IGN_ON" : parseIgnored,
+    "HARDWARE IGN_OFF" : parseIgnOff,
+    "ZONECHANGE" : parseZoneChange,
+    "ZONETRANSITION" : parseZoneTransition,
+    "POWERDOWN" : parsePowerdown,
+    "REPORT" : parseReport,
+    "INPUT" : parseInput,
+    "DEBUG" : parseDebug,
+    "POWER" : parsePower
+}
 
 # *******************************************
 # Append to event alert text.
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+
+from PyQt5 import QtCore, QtGui
+
+from utils import *
+from tripinfo import *
+from tripquery import *
+
+# *******************************************
+# Trip tree node class.
+# Top level node of the trip data tree, for a trip / power cycle.
+# Event nodes are only created when needed, i.e. when the trip is expanded.
+# *******************************************
+class TripNode():
+    # Initializer / Instance Attributes
+    def __init__(self, row, trip):
+        self.row = row
+        self.trip = trip
+
+        # Shown events, and their nodes once created.
+        self.events = None
+        self.eventNodes = None
+
+        # Trip has an alert in a shown event; used to colour trip.
+        self.inAlert = None
+
+# *******************************************
+# Event tree node class.
+# Detail rows are only produced when needed, i.e. when the event is shown or expanded.
+# *******************************************
+class EventNode():
+    # Initializer / Instance Attributes
+    def __init__(self, parent, row, event):
+        self.parent = parent
+        self.row = row
+        self.event = event
+
+        # Event details as (name, value, alert) tuples.
+        self.details = None
+
+# *******************************************
+# Trip data tree model class.
+# Model of the trip / power cycle log for a tree view, with three levels; trips, events and event details.
+# Tree nodes are created lazily, and formatting is provided through the data roles,
+# so the tree can be shown straight away however big the log is.
+# *******************************************
+class TripTreeModel(QtCore.QAbstractItemModel):
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, tripLog, isZoner, eventDetails, showEvents):
+        super(TripTreeModel, self).__init__()
+
+        self.cfg = config
+        self.logger = logger
+
+        self.logger.debug("TripTreeModel class constructor.")
+
+        # Trip / power cycle log, and function to get event details for an event of a trip.
+        self.tripLog = tripLog
+        self.isZoner = isZoner
+        self.eventDetails = eventDetails
+
+        # Event types shown, dictionary of Input, Other, Debug, Report and OutOfTrip flags.
+        self.showEvents = showEvents
+
+        # Parent of top level (trip) indexes.
+        self.root = object()
+
+        # Trip nodes, created as needed.
+        self.tripNodes = [None] * len(self.tripLog)
+
+        # Index of trip rows by event type, for event filtering.
+        # And trip rows in alert, worked out as needed.
+        self.eventIndex = EventIndex()
+        self.eventIndex.replaceTrips(0, self.tripLog)
+        self.tripAlerts = {}
+
+        # Fonts and colours.
+        self.fontBold = QtGui.QFont()
+        self.fontBold.setBold(True)
+        self.fontPlain = QtGui.QFont()
+        self.fontPlain.setBold(False)
+        self.brushes = {}
+
+    # *******************************************
+    # Brush for configured trip data colour.
+    # *******************************************
+    def brush(self, colour):
+        if colour not in self.brushes:
+            self.brushes[colour] = QtGui.QBrush(QtGui.QColor(self.cfg.TripData[colour]))
+        return self.brushes[colour]
+
+    # *******************************************
+    # Check if event is shown.
+    # *******************************************
+    def eventShown(self, ev):
+        if ev.isInput and (not self.showEvents["Input"]):
+            return False
+        if ev.isOther and (not self.showEvents["Other"]):
+            return False
+        if ev.isDebug and (not self.showEvents["Debug"]):
+            return False
+        if ev.isReport and (not self.showEvents["Report"]):
+            return False
+        if ev.isOutOfTrip and (not self.showEvents["OutOfTrip"]):
+            return False
+        return True
+
+    # *******************************************
+    # Change event types shown.
+    # Shown events of trips already looked at are filtered again, keeping the nodes of events still shown,
+    # so the view keeps its expanded, selected and hidden (filtered) rows.
+    # Trips not yet looked at are filtered when needed, as before.
+    # *******************************************
+    def setShowEvents(self, showEvents):
+        self.layoutAboutToBeChanged.emit()
+
+        # What each persistent index (expanded, selected, current, hidden) refers to.
+        oldIndexes = self.persistentIndexList()
+        refs = []
+        for idx in oldIndexes:
+            owner = idx.internalPointer()
+            if isinstance(owner, TripNode):
+                # Event, so remember its node as its row may change.
+                refs.append((idx, self.eventNode(owner, idx.row())))
+            else:
+                refs.append((idx, None))
+
+        self.showEvents = showEvents
+        for node in self.tripNodes:
+            if node is not None:
+                self.refilterEvents(node)
+
+        # Move persistent indexes to the new rows of their events.
+        # Indexes of events now hidden, or of their details, become invalid.
+        newIndexes = []
+        for idx, evNode in refs:
+            owner = idx.internalPointer()
+            if evNode is not None:
+                if evNode.row >= 0:
+                    newIndexes.append(self.createIndex(evNode.row, idx.column(), owner))
+                else:
+                    newIndexes.append(QtCore.QModelIndex())
+            elif isinstance(owner, EventNode) and (owner.row < 0):
+                newIndexes.append(QtCore.QModelIndex())
+            else:
+                newIndexes.append(idx)
+        self.changePersistentIndexList(oldIndexes, newIndexes)
+
+        self.layoutChanged.emit()
+
+    # *******************************************
+    # Filter shown events of trip node again.
+    # Nodes of events no longer shown get a row of -1.
+    # *******************************************
+    def refilterEvents(self, node):
+        # Trip alert colour depends on the events shown.
+        node.inAlert = None
+        if node.events is None:
+            return
+
+        oldNodes = {}
+        for evNode in node.eventNodes:
+            if evNode is not None:
+                evNode.row = -1
+                oldNodes[id(evNode.event)] = evNode
+
+        node.events = [ev for ev in node.trip.events if self.eventShown(ev)]
+        node.eventNodes = [oldNodes.get(id(ev)) for ev in node.events]
+        for row, evNode in enumerate(node.eventNodes):
+            if evNode is not None:
+                evNode.row = row
+
+    # *******************************************
+    # Get trip node for row.
+    # *******************************************
+    def tripNode(self, row):
+        node = self.tripNodes[row]
+        if node is None:
+            node = TripNode(row, self.tripLog[row])
+            self.tripNodes[row] = node
+        return node
+
+    # *******************************************
+    # Get shown events of trip node.
+    # *******************************************
+    def tripEvents(self, node):
+        if node.events is None:
+            node.events = [ev for ev in node.trip.events if self.eventShown(ev)]
+            node.eventNodes = [None] * len(node.events)
+        return node.events
+
+    # *******************************************
+    # Get event node for row of trip node.
+    # *******************************************
+    def eventNode(self, node, row):
+        self.tripEvents(node)
+        evNode = node.eventNodes[row]
+        if evNode is None:
+            evNode = EventNode(node, row, node.events[row])
+            node.eventNodes[row] = evNode
+        return evNode
+
+    # *******************************************
+    # Get details of event node.
+    # Events of 'other' type don't have details.
+    # Details with an alert set the event and trip in alert.
+    # *******************************************
+    def nodeDetails(self, evNode):
+        if evNode.details is None:
+            ev = evNode.event
+            if ev.isOther:
+                evNode.details = []
+            else:
+                evNode.details = self.eventDetails(evNode.parent.trip, ev)
+                if any(alert for name, value, alert in evNode.details):
+                    evNode.parent.trip.tripInAlert = True
+                    ev.eventInAlert = True
+        return evNode.details
+
+    # *******************************************
+    # Check if trip has an alert in any of its events.
+    # Sets the trip and event in alert flags, used for filtering.
+    # Only worked out once for each trip.
+    # *******************************************
+    def tripAlert(self, row):
+        if row not in self.tripAlerts:
+            trip = self.tripLog[row]
+            trip.tripInAlert = False
+            for ev in trip.events:
+                ev.eventInAlert = False
+                if (not ev.isOther) and any(alert for name, value, alert in self.eventDetails(trip, ev)):
+                    trip.tripInAlert = True
+                    ev.eventInAlert = True
+            self.tripAlerts[row] = trip.tripInAlert
+        return self.tripAlerts[row]
+
+    # *******************************************
+    # Check if event alert is shown on its trip.
+    # Don't highlight trip if event type is hidden.
+    # *******************************************
+    def eventAlertShown(self, ev):
+        if ev.isInput and self.showEvents["Input"]:
+            return True
+        elif ev.isDebug and self.showEvents["Debug"]:
+            return True
+        elif ev.isReport and self.showEvents["Report"]:
+            return True
+        elif ev.isOther and self.showEvents["Other"]:
+            return True
+        return (not ev.isInput) and (not ev.isOther) and (not ev.isDebug) and (not ev.isReport)
+
+    # *******************************************
+    # Check if trip is shown in alert colour.
+    # *******************************************
+    def tripShownInAlert(self, node):
+        if node.inAlert is None:
+            node.inAlert = False
+            for ev in node.trip.events:
+                if (not ev.isOther) and self.eventAlertShown(ev):
+                    if any(alert for name, value, alert in self.eventDetails(node.trip, ev)):
+                        node.inAlert = True
+                        break
+        return node.inAlert
+
+    # *******************************************
+    # Label and time columns of trip.
+    # *******************************************
+    def tripText(self, row, column):
+        t = self.tripLog[row]
+        if column == 0:
+            if self.isZoner == False:
+                return "Trip {0:d} [ID {1:d}]".format((row + 1), t.tripStartId)
+            return "Power Cycle {0:d}".format(row + 1)
+        elif column == 1:
+            # Need to check that the trip was ended.
+            if t.tripEnd > 0:
+                return "{0:s}  to  {1:s}".format(unixTimeString(t.tripStart, self.cfg.TimeUTC), unixTimeString(t.tripEnd, self.cfg.TimeUTC))
+            return "{0:s}".format(unixTimeString(t.tripStart, self.cfg.TimeUTC))
+        elif t.tripEnd <= 0:
+            if self.isZoner == False:
+                return "No trip end."
+            return "No power cycle end."
+        return ""
+
+    # *******************************************
+    # Label, time and alert columns of event.
+    # *******************************************
+    def eventText(self, ev, column):
+        if column == 0:
+            return "{0:s}".format(ev.event)
+        elif column == 1:
+            return "{0:s}".format(unixTimeString(ev.serverTime, self.cfg.TimeUTC))
+        return ev.alertText
+
+    # *******************************************
+    # Find trips with an event type (or DEBUG sub-type) containing the filter text.
+    # Hidden events are included.
+    # Returns sorted list of matching trip rows.
+    # *******************************************
+    def findTrips(self, text):
+        if text == "":
+            return list(range(len(self.tripLog)))
+        return sorted(self.eventIndex.findTrips(text))
+
+    # *******************************************
+    # Find trips matching a query (see tripquery).
+    # Hidden events are included.
+    # Returns sorted list of matching trip rows.
+    # *******************************************
+    def queryTrips(self, query):
+        return query.findTrips(self.tripLog, self.eventIndex, self.tripAlert)
+
+    # *******************************************
+    # Replace trips from first row to the end of the log with new trips.
+    # Used when refreshing a log file; earlier trips are not changed.
+    # *******************************************
+    def replaceTrips(self, firstRow, newTrips):
+        self.eventIndex.replaceTrips(firstRow, newTrips)
+        for row in range(firstRow, len(self.tripLog)):
+            self.tripAlerts.pop(row, None)
+        if firstRow < len(self.tripLog):
+            self.beginRemoveRows(QtCore.QModelIndex(), firstRow, len(self.tripLog) - 1)
+            del self.tripLog[firstRow:]
+            del self.tripNodes[firstRow:]
+            self.endRemoveRows()
+        if len(newTrips) > 0:
+            self.beginInsertRows(QtCore.QModelIndex(), firstRow, firstRow + len(newTrips) - 1)
+            self.tripLog.extend(newTrips)
+            self.tripNodes.extend([None] * len(newTrips))
+            self.endInsertRows()
+
+    # *******************************************
+    # Model index for row and column under parent.
+    # *******************************************
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.root)
+        owner = parent.internalPointer()
+        if owner is self.root:
+            # Parent is a trip, so index is an event.
+            return self.createIndex(row, column, self.tripNode(parent.row()))
+        # Parent is an event, so index is an event detail.
+        return self.createIndex(row, column, self.eventNode(owner, parent.row()))
+
+    # *******************************************
+    # Parent of model index.
+    # Index internal pointer is the node of its parent.
+    # *******************************************
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        owner = index.internalPointer()
+        if owner is self.root:
+            return QtCore.QModelIndex()
+        if isinstance(owner, TripNode):
+            return self.createIndex(owner.row, 0, self.root)
+        return self.createIndex(owner.row, 0, owner.parent)
+
+    # *******************************************
+    # Number of rows under parent.
+    # *******************************************
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self.tripLog)
+        if parent.column() > 0:
+            return 0
+        owner = parent.internalPointer()
+        if owner is self.root:
+            return len(self.tripEvents(self.tripNode(parent.row())))
+        if isinstance(owner, TripNode):
+            return len(self.nodeDetails(self.eventNode(owner, parent.row())))
+        return 0
+
+    # *******************************************
+    # Number of columns; label, value / time, and comment.
+    # *******************************************
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 3
+
+    # *******************************************
+    # Header labels.
+    # *******************************************
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if (orientation == QtCore.Qt.Horizontal) and (role == QtCore.Qt.DisplayRole):
+            if section == 0:
+                if self.isZoner == False:
+                    return "Trip Data"
+                return "Power Cycle Data"
+            return ""
+        return None
+
+    # *******************************************
+    # Data for model index and role.
+    # *******************************************
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        owner = index.internalPointer()
+        if owner is self.root:
+            return self.tripData(index.row(), index.column(), role)
+        if isinstance(owner, TripNode):
+            return self.eventData(self.eventNode(owner, index.row()), index.column(), role)
+        return self.detailData(self.nodeDetails(owner)[index.row()], index.column(), role)
+
+    # *******************************************
+    # Data and formatting of trip row.
+    # *******************************************
+    def tripData(self, row, column, role):
+        t = self.tripLog[row]
+        if role == QtCore.Qt.DisplayRole:
+            return self.tripText(row, column)
+        elif role == QtCore.Qt.FontRole:
+            if (column < 2) or (t.tripEnd <= 0):
+                return self.fontBold
+        elif role == QtCore.Qt.ForegroundRole:
+            if column == 0:
+                # Trip in alert colour if not ended, or if any shown event has an alert.
+                if (t.tripEnd <= 0) or self.tripShownInAlert(self.tripNode(row)):
+                    return self.brush("AlertColour")
+            elif t.tripEnd <= 0:
+                if column == 1:
+                    return self.brush("TripColour")
+                return self.brush("CommentColour")
+        elif role == QtCore.Qt.BackgroundRole:
+            if column < 2:
+                return self.brush("TripBackColour")
+        return None
+
+    # *******************************************
+    # Data and formatting of event row.
+    # Apply specific formatting for normal events.
+    # Apply different formatting if INPUT or 'other' events.
+    # *******************************************
+    def eventData(self, evNode, column, role):
+        ev = evNode.event
+        if role == QtCore.Qt.DisplayRole:
+            return self.eventText(ev, column)
+        elif role == QtCore.Qt.FontRole:
+            if column == 0:
+                if ev.isOther or ev.isInput or ev.isDebug or ev.isReport:
+                    return self.fontPlain
+                return self.fontBold
+            elif (column == 2) and (ev.alertText != ""):
+                if ev.isInput:
+                    return self.fontPlain
+                return self.fontBold
+        elif role == QtCore.Qt.ForegroundRole:
+            if column == 0:
+                # If detail alert then also use alert colour for related event.
+                if any(alert for name, value, alert in self.nodeDetails(evNode)):
+                    return self.brush("AlertColour")
+                if ev.isOther:
+                    return self.brush("OtherEventColour")
+                elif ev.isInput:
+                    return self.brush("InputEventColour")
+                elif ev.isDebug:
+                    return self.brush("DebugEventColour")
+                elif ev.isReport:
+                    return self.brush("ReportEventColour")
+                return self.brush("EventColour")
+            elif (column == 2) and (ev.alertText != ""):
+                # For INPUT events alert field has the input channel number,
+                # so colour in trip colour instead of comment/alert colours.
+                if ev.isInput:
+                    return self.brush("TripColour")
+                return self.brush("CommentColour")
+        return None
+
+    # *******************************************
+    # Data and formatting of event detail row.
+    # *******************************************
+    def detailData(self, detail, column, role):
+        name, value, alert = detail
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return name
+            elif column == 1:
+                return value
+            return ""
+        elif role == QtCore.Qt.FontRole:
+            if (column == 0) or ((column == 1) and alert):
+                return self.fontBold
+        elif role == QtCore.Qt.ForegroundRole:
+            # If detail alert then use alert colour.
+            if (column == 1) and alert:
+                return self.brush("AlertColour")
+        elif role == QtCore.Qt.TextAlignmentRole:
+            if column == 0:
+                return QtCore.Qt.AlignRight
+        return None
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+
+import re
+from bisect import bisect_left
+
+from tripinfo import *
+
+# *******************************************
+# Trip query language.
+#
+# A query selects trips / power cycles by the events they have, e.g.
+#   IMPACT[severity = C] within 60 s of OVERSPEED
+#   *[rssi < 10 and speed > 20]
+#   (UNBUCKLED or OVERSPEED[duration >= 30]) and not alert
+#
+#   query     := term (("and" | "or") term)*, "and" binding tighter than "or"
+#   term      := "not" term | "(" query ")" | "alert" | "firmware" op value | events ["within" number ["s"] "of" events]
+#   events    := (type | "*") ["[" condition (("and" | ",") condition)* "]"]
+#   condition := field ("=" | "!=" | "<" | "<=" | ">" | ">=" | "~") value
+#
+# Event types are event names or DEBUG sub-types (see eventTypes); quote types with spaces, e.g. "OOS PM".
+# Fields are event variables (e.g. rssi, speed, battery, severity, duration), or time for the event time.
+# "~" is contains, comparing as text. Keywords, fields and unquoted types are not case sensitive.
+# "alert" is trips in alert, as the event filter alert option.
+# "firmware" compares the controller firmware version at the start of the trip, as text, e.g. firmware ~ 4.3.
+# *******************************************
+
+# Query tokens; quoted strings, numbers, comparisons, brackets, and words.
+queryTokenPattern = re.compile(r'\s*(?:"([^"]*)"|(-?[0-9]+(?:\.[0-9]+)?)(?![A-Za-z_(.])|(==|!=|<=|>=|[=<>~])|([\[\](),*])|([^\s\[\](),=!<>~"]+))')
+
+# Query keywords.
+queryKeywords = {"and", "or", "not", "alert", "firmware", "within", "of", "s"}
+
+# Event variables that are text, rather than numbers.
+textVariables = {"event", "alertText"} | {name for name, value in vars(Event).items() if isinstance(value, str) and (not name.startswith("_"))}
+
+# *******************************************
+# Query error exception.
+# Raised when a query can't be parsed.
+# *******************************************
+class QueryError(Exception):
+    pass
+
+# *******************************************
+# Trip query class.
+# Parses query once, then finds matching trips of a trip / power cycle log.
+# The event index is used to only look at trips that could match.
+# *******************************************
+class TripQuery():
+    # Initializer / Instance Attributes
+    def __init__(self, config, text):
+
+        self.cfg = config
+        self.text = text
+
+        # Event variables that can be used in conditions; lower case name to variable name.
+        self.fields = {name.lower() : name for name in eventVariables()}
+        self.fields["time"] = "serverTime"
+
+        # Parse query into tree of query nodes.
+        self.tokens = tokenizeQuery(text)
+        self.pos = 0
+        self.root = self.parseOr()
+        if self.pos < len(self.tokens):
+            raise QueryError("Unexpected '{0:s}' in query.".format(self.tokens[self.pos][1]))
+
+    # *******************************************
+    # Find trips matching query.
+    # Trip alert function (of trip row) is needed if query includes alert.
+    # Returns sorted list of matching trip rows.
+    # *******************************************
+    def findTrips(self, tripLog, eventIndex, tripAlert=None):
+        rows = self.root.candidates(eventIndex)
+        if rows is None:
+            rows = range(len(tripLog))
+        else:
+            rows = sorted(rows)
+        return [row for row in rows if self.root.match(tripLog[row], row, tripAlert)]
+
+    # *******************************************
+    # Find events of trip matching any of the event types and conditions in the query.
+    # *******************************************
+    def findEvents(self, trip):
+        specs = self.root.eventSpecs()
+        return [ev for ev in trip.events if any(spec.matchEvent(ev) for spec in specs)]
+
+    # *******************************************
+    # Next token, or None if no more tokens.
+    # Tokens are (kind, text) tuples.
+    # *******************************************
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    # *******************************************
+    # Check if next token is keyword or symbol, and if so take it.
+    # *******************************************
+    def accept(self, word):
+        tok = self.peek()
+        if (tok is not None) and (tok[0] in ("word", "symbol", "op")) and (tok[1].lower() == word):
+            self.pos += 1
+            return True
+        return False
+
+    # *******************************************
+    # Take next token, which must be keyword or symbol.
+    # *******************************************
+    def expect(self, word):
+        if not self.accept(word):
+            tok = self.peek()
+            if tok is None:
+                raise QueryError("Expected '{0:s}' at end of query.".format(word))
+            raise QueryError("Expected '{0:s}' but found '{1:s}'.".format(word, tok[1]))
+
+    # *******************************************
+    # Parse terms separated by "or".
+    # *******************************************
+    def parseOr(self):
+        nodes = [self.parseAnd()]
+        while self.accept("or"):
+            nodes.append(self.parseAnd())
+        if len(nodes) == 1:
+            return nodes[0]
+        return OrNode(nodes)
+
+    # *******************************************
+    # Parse terms separated by "and".
+    # *******************************************
+    def parseAnd(self):
+        nodes = [self.parseTerm()]
+        while self.accept("and"):
+            nodes.append(self.parseTerm())
+        if len(nodes) == 1:
+            return nodes[0]
+        return AndNode(nodes)
+
+    # *******************************************
+    # Parse term.
+    # *******************************************
+    def parseTerm(self):
+        if self.accept("not"):
+            return NotNode(self.parseTerm())
+        if self.accept("("):
+            node = self.parseOr()
+            self.expect(")")
+            return node
+        if self.accept("alert"):
+            return AlertNode()
+        if self.accept("firmware"):
+            return FirmwareNode(*self.parseComparison("firmware"))
+        spec = self.parseEvents()
+        if self.accept("within"):
+            tok = self.peek()
+            if (tok is None) or (tok[0] != "number"):
+                raise QueryError("Expected number of seconds after 'within'.")
+            self.pos += 1
+            self.accept("s")
+            self.expect("of")
+            return WithinNode(spec, float(tok[1]), self.parseEvents())
+        return spec
+
+    # *******************************************
+    # Parse event type and conditions.
+    # *******************************************
+    def parseEvents(self):
+        tok = self.peek()
+        if tok is None:
+            raise QueryError("Expected event type at end of query.")
+        if tok[0] == "symbol" and tok[1] == "*":
+            eType = None
+        elif (tok[0] == "string") or ((tok[0] == "word") and (tok[1].lower() not in queryKeywords)):
+            eType = tok[1]
+        else:
+            raise QueryError("Expected event type but found '{0:s}'.".format(tok[1]))
+        self.pos += 1
+
+        conditions = []
+        if self.accept("["):
+            conditions.append(self.parseCondition())
+            while self.accept("and") or self.accept(","):
+                conditions.append(self.parseCondition())
+            self.expect("]")
+        return EventsNode(self.cfg, eType, conditions, (tok[0] == "string"))
+
+    # *******************************************
+    # Parse event variable condition.
+    # Returns (variable, operator, value) tuple; value is a number for numeric variables.
+    # *******************************************
+    def parseCondition(self):
+        tok = self.peek()
+        if (tok is None) or (tok[0] != "word"):
+            raise QueryError("Expected event variable in condition.")
+        field = self.fields.get(tok[1].lower())
+        if field is None:
+            raise QueryError("Unknown event variable '{0:s}'.".format(tok[1]))
+        self.pos += 1
+
+        op, tok = self.parseComparison(field)
+
+        # Text variables are compared as text, numeric variables need numeric values.
+        if (field in textVariables) or (op == "~"):
+            value = tok[1]
+        elif tok[0] == "number":
+            value = float(tok[1])
+        else:
+            raise QueryError("Expected number for '{0:s}'.".format(field))
+        return (field, op, value)
+
+    # *******************************************
+    # Parse comparison operator and value, following field.
+    # Returns (operator, value token) tuple.
+    # *******************************************
+    def parseComparison(self, field):
+        tok = self.peek()
+        if (tok is None) or (tok[0] != "op"):
+            raise QueryError("Expected comparison after '{0:s}'.".format(field))
+        op = tok[1]
+        if op == "==":
+            op = "="
+        self.pos += 1
+
+        tok = self.peek()
+        if (tok is None) or (tok[0] not in ("number", "string", "word")):
+            raise QueryError("Expected value after '{0:s} {1:s}'.".format(field, op))
+        self.pos += 1
+        return (op, tok)
+
+# *******************************************
+# Query node for trips matching all of the terms.
+# *******************************************
+class AndNode():
+    # Initializer / Instance Attributes
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    # Trip rows that could match, from the event index; None if any trip could match.
+    def candidates(self, eventIndex):
+        rows = None
+        for node in self.nodes:
+            nodeRows = node.candidates(eventIndex)
+            if nodeRows is not None:
+                rows = nodeRows if rows is None else (rows & nodeRows)
+        return rows
+
+    def match(self, trip, row, tripAlert):
+        return all(node.match(trip, row, tripAlert) for node in self.nodes)
+
+    def eventSpecs(self):
+        return [spec for node in self.nodes for spec in node.eventSpecs()]
+
+# *******************************************
+# Query node for trips matching any of the terms.
+# *******************************************
+class OrNode():
+    # Initializer / Instance Attributes
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def candidates(self, eventIndex):
+        nodeRows = [node.candidates(eventIndex) for node in self.nodes]
+        if None in nodeRows:
+            return None
+        return set().union(*nodeRows)
+
+    def match(self, trip, row, tripAlert):
+        return any(node.match(trip, row, tripAlert) for node in self.nodes)
+
+    def eventSpecs(self):
+        return [spec for node in self.nodes for spec in node.eventSpecs()]
+
+# *******************************************
+# Query node for trips not matching term.
+# *******************************************
+class NotNode():
+    # Initializer / Instance Attributes
+    def __init__(self, node):
+        self.node = node
+
+    # Any trip could match, but event types of term still need resolving against the index.
+    def candidates(self, eventIndex):
+        self.node.candidates(eventIndex)
+        return None
+
+    def match(self, trip, row, tripAlert):
+        return not self.node.match(trip, row, tripAlert)
+
+    def eventSpecs(self):
+        return []
+
+# *******************************************
+# Query node for trips in alert.
+# *******************************************
+class AlertNode():
+    def candidates(self, eventIndex):
+        return None
+
+    def match(self, trip, row, tripAlert):
+        if tripAlert is None:
+            raise QueryError("Trip alert state not available.")
+        return tripAlert(row)
+
+    def eventSpecs(self):
+        return []
+
+# *******************************************
+# Query node for trips by controller firmware version at the start of the trip.
+# *******************************************
+class FirmwareNode():
+    # Initializer / Instance Attributes
+    def __init__(self, op, tok):
+        self.op = op
+        self.value = tok[1]
+        self.test = conditionTest("firmwareVersion", op, self.value)
+
+    def candidates(self, eventIndex):
+        return None
+
+    # Trips without a known firmware version don't match.
+    def match(self, trip, row, tripAlert):
+        return (trip.firmwareVersion is not None) and self.test(trip)
+
+    def eventSpecs(self):
+        return []
+
+# *******************************************
+# Query node for trips with an event of a type (or any type) matching all conditions.
+# *******************************************
+class EventsNode():
+    # Initializer / Instance Attributes
+    def __init__(self, config, eType, conditions, quoted):
+        self.cfg = config
+        self.eType = eType
+        self.quoted = quoted
+        self.conditions = conditions
+        self.tests = [conditionTest(field, op, value) for field, op, value in conditions]
+
+        # Type as given in query; event type is matched against types of events in the index.
+        self.typeText = eType
+        self.resolveType(config.filterEvents)
+
+    # *******************************************
+    # Resolve event type against known event types.
+    # Unquoted types are not case sensitive.
+    # Filter event types also match DEBUG events with the type in their details, as in the event index.
+    # *******************************************
+    def resolveType(self, eTypes):
+        if (self.typeText is not None) and (not self.quoted) and (self.eType not in eTypes):
+            for eType in eTypes:
+                if eType.lower() == self.typeText.lower():
+                    self.eType = eType
+                    break
+        self.isDebugType = (self.eType in self.cfg.filterEvents)
+
+    def candidates(self, eventIndex):
+        if self.eType is None:
+            return None
+        self.resolveType(eventIndex.typeRows)
+        return eventIndex.typeRows.get(self.eType, set())
+
+    # Check if event is of type and matches conditions.
+    def matchEvent(self, ev):
+        if (self.eType is not None) and (ev.event != self.eType):
+            if not (self.isDebugType and ev.isDebug and (self.eType in ev.debugInfo)):
+                return False
+        for test in self.tests:
+            if not test(ev):
+                return False
+        return True
+
+    def match(self, trip, row, tripAlert):
+        return any(self.matchEvent(ev) for ev in trip.events)
+
+    def eventSpecs(self):
+        return [self]
+
+# *******************************************
+# Query node for trips with an event matching one spec within a time of an event matching another.
+# *******************************************
+class WithinNode():
+    # Initializer / Instance Attributes
+    def __init__(self, spec, seconds, otherSpec):
+        self.spec = spec
+        self.seconds = seconds
+        self.otherSpec = otherSpec
+
+    def candidates(self, eventIndex):
+        return AndNode([self.spec, self.otherSpec]).candidates(eventIndex)
+
+    def match(self, trip, row, tripAlert):
+        others = sorted((ev for ev in trip.events if self.otherSpec.matchEvent(ev)), key=lambda ev: ev.serverTime)
+        if len(others) == 0:
+            return False
+        otherTimes = [ev.serverTime for ev in others]
+        for ev in trip.events:
+            if self.spec.matchEvent(ev):
+                # Other events from the time before the event to the time after it.
+                idx = bisect_left(otherTimes, ev.serverTime - self.seconds)
+                while (idx < len(others)) and (otherTimes[idx] <= (ev.serverTime + self.seconds)):
+                    # An event isn't within time of itself.
+                    if others[idx] is not ev:
+                        return True
+                    idx += 1
+        return False
+
+    def eventSpecs(self):
+        return [self.spec, self.otherSpec]
+
+# *******************************************
+# Split query text into tokens.
+# *******************************************
+def tokenizeQuery(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = queryTokenPattern.match(text, pos)
+        if (m is None) or (m.end() == pos):
+            raise QueryError("Can't read query at '{0:s}'.".format(text[pos:]))
+        if m.group(1) is not None:
+            tokens.append(("string", m.group(1)))
+        elif m.group(2) is not None:
+            tokens.append(("number", m.group(2)))
+        elif m.group(3) is not None:
+            tokens.append(("op", m.group(3)))
+        elif m.group(4) is not None:
+            tokens.append(("symbol", m.group(4)))
+        else:
+            tokens.append(("word", m.group(5)))
+        pos = m.end()
+        while (pos < len(text)) and text[pos].isspace():
+            pos += 1
+    if len(tokens) == 0:
+        raise QueryError("Query is empty.")
+    return tokens
+
+# *******************************************
+# Make test function of event for condition.
+# Text values are compared without case.
+# *******************************************
+def conditionTest(field, op, value):
+    if op == "~":
+        text = str(value).lower()
+        return lambda ev: text in str(getattr(ev, field)).lower()
+    if isinstance(value, str):
+        value = value.lower()
+        if op == "=":
+            return lambda ev: str(getattr(ev, field)).lower() == value
+        elif op == "!=":
+            return lambda ev: str(getattr(ev, field)).lower() != value
+        elif op == "<":
+            return lambda ev: str(getattr(ev, field)).lower() < value
+        elif op == "<=":
+            return lambda ev: str(getattr(ev, field)).lower() <= value
+        elif op == ">":
+            return lambda ev: str(getattr(ev, field)).lower() > value
+        return lambda ev: str(getattr(ev, field)).lower() >= value
+    if op == "=":
+        return lambda ev: getattr(ev, field) == value
+    elif op == "!=":
+        return lambda ev: getattr(ev, field) != value
+    elif op == "<":
+        return lambda ev: getattr(ev, field) < value
+    elif op == "<=":
+        return lambda ev: getattr(ev, field) <= value
+    elif op == ">":
+        return lambda ev: getattr(ev, field) > value
+    return lambda ev: getattr(ev, field) >= value
+
+# *******************************************
+# Names of event variables, common and event specific.
+# *******************************************
+def eventVariables():
+    common = [name for name in Event.__slots__ if name != "__dict__"]
+    specific = [name for name, value in vars(Event).items() if (not name.startswith("_")) and isinstance(value, (int, float, str))]
+    return common + specific
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from tripinfo import *
+from tripquery import *
+from logcache import *
+
+# *******************************************
+# Trip store.
+# SQLite database of parsed log files, so trips and events can be queried across logs after the application closes.
+#
+#   logs    : log file, its content hash, controller and firmware.
+#   trips   : trips / power cycles of each log, with the controller ID and firmware version at their start.
+#   events  : events of each trip; common variables are columns, event specific variables are JSON details.
+#   gnss, speed, rssi, battery, zone : time series of each trip, columns as the trip series.
+#
+# Log files are keyed by content hash (and parser version), so importing a log file again is skipped.
+# *******************************************
+
+# Store schema version; a store with a different version is rebuilt.
+storeVersion = 2
+
+# Event variables stored as columns; the rest are stored in the JSON details.
+eventColumns = ("event", "serverTime", "alertText", "isOther", "isInput", "isDebug", "isReport", "isOutOfTrip",
+                "tripStartId", "battery", "rssi", "lat", "long", "posErr", "speed")
+
+# Trip time series stored, by table name; trip attribute and series class.
+storeSeries = (("gnss", "gnssLog", GnssSeries), ("speed", "speedLog", SpeedSeries), ("rssi", "rssiLog", RssiSeries),
+               ("battery", "batteryLevel", BatterySeries), ("zone", "zoneXings", ZoneSeries))
+
+# Event found in the store.
+StoredEvent = namedtuple("StoredEvent", ["fileName", "controllerID", "firmwareVersion", "tripStartId", "tripStart", "event", "serverTime", "details"])
+
+# *******************************************
+# Trip store class.
+# *******************************************
+class TripStore():
+    # Initializer / Instance Attributes
+    def __init__(self, config, logger, fileName):
+
+        self.cfg = config
+        self.logger = logger
+        self.fileName = fileName
+
+        self.logger.debug("TripStore class constructor.")
+
+        # Other processes (e.g. fleet workers) may be writing, so wait for them rather than failing.
+        self.db = sqlite3.connect(fileName, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.createTables()
+
+    # *******************************************
+    # Close store.
+    # *******************************************
+    def close(self):
+        self.db.close()
+
+    # *******************************************
+    # Create tables and indexes if not already created.
+    # *******************************************
+    def createTables(self):
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, storeVersion):
+            self.logger.warning("Trip store version {0:d} out of date, rebuilding : {1:s}".format(version, self.fileName))
+            with self.db:
+                for table in ["events", "trips", "logs"] + [name for name, attr, seriesClass in storeSeries]:
+                    self.db.execute("DROP TABLE IF EXISTS {0:s}".format(table))
+
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, fileHash TEXT NOT NULL, parserVersion INTEGER NOT NULL, "
+                "fileName TEXT, controllerID INTEGER, firmwareVersion TEXT, isZoner INTEGER, importTime INTEGER)")
+            self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS logsHash ON logs (fileHash, parserVersion)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS logsController ON logs (controllerID)")
+
+            self.db.execute("CREATE TABLE IF NOT EXISTS trips (id INTEGER PRIMARY KEY, logId INTEGER NOT NULL REFERENCES logs(id) ON DELETE CASCADE, "
+                "logRow INTEGER, tripStartId INTEGER, tripStart INTEGER, tripEnd INTEGER, controllerID INTEGER, firmwareVersion TEXT)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS tripsLog ON trips (logId)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS tripsStart ON trips (tripStart)")
+
+            columns = ", ".join('"{0:s}"'.format(col) for col in eventColumns)
+            self.db.execute("CREATE TABLE IF NOT EXISTS events (tripId INTEGER NOT NULL REFERENCES trips(id) ON DELETE CASCADE, "
+                "{0:s}, details TEXT)".format(columns))
+            self.db.execute("CREATE INDEX IF NOT EXISTS eventsType ON events (event COLLATE NOCASE, serverTime)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS eventsTime ON events (serverTime)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS eventsTrip ON events (tripId)")
+
+            for name, attr, seriesClass in storeSeries:
+                columns = ", ".join('"{0:s}"'.format(col) for col, typeCode in seriesClass.columnTypes)
+                self.db.execute("CREATE TABLE IF NOT EXISTS {0:s} (tripId INTEGER NOT NULL REFERENCES trips(id) ON DELETE CASCADE, {1:s})".format(name, columns))
+                self.db.execute("CREATE INDEX IF NOT EXISTS {0:s}Trip ON {0:s} (tripId)".format(name))
+
+            self.db.execute("PRAGMA user_version={0:d}".format(storeVersion))
+
+    # *******************************************
+    # Check if log file contents are already in the store.
+    # *******************************************
+    def hasLog(self, contentHash):
+        row = self.db.execute("SELECT id FROM logs WHERE fileHash = ? AND parserVersion = ?", (contentHash, parserVersion)).fetchone()
+        return row is not None
+
+    # *******************************************
+    # Add log data (as read by log reader or loaded from cache) to the store.
+    # Log data is dictionary of controllerID, firmwareVersion, tripLog and zoneXLog.
+    # Everything is added in one transaction, with bulk inserts for events and series.
+    # Returns False if the log file contents were already in the store.
+    # *******************************************
+    def addLog(self, fileName, logData, contentHash=None):
+        if contentHash is None:
+            contentHash = fileHash(fileName)
+        if self.hasLog(contentHash):
+            self.logger.debug("Log file already in trip store : {0:s}".format(fileName))
+            return False
+
+        # No trips but maybe this is a Zoner, as in the application.
+        isZoner = (len(logData["tripLog"]) == 0) and (len(logData["zoneXLog"]) > 0)
+        if isZoner:
+            logs = logData["zoneXLog"]
+        else:
+            logs = logData["tripLog"]
+
+        columnSet = set(eventColumns)
+        eventSql = "INSERT INTO events VALUES (?, {0:s}, ?)".format(", ".join("?" * len(eventColumns)))
+        with self.db:
+            # Log file contents may have been added since checking, e.g. by another process adding a copy of the log file.
+            cur = self.db.execute("INSERT OR IGNORE INTO logs (fileHash, parserVersion, fileName, controllerID, firmwareVersion, isZoner, importTime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (contentHash, parserVersion, os.path.abspath(fileName), logData["controllerID"], logData["firmwareVersion"], isZoner, int(time.time())))
+            if cur.rowcount == 0:
+                self.logger.debug("Log file already in trip store : {0:s}".format(fileName))
+                return False
+            logId = cur.lastrowid
+
+            for row, t in enumerate(logs):
+                cur = self.db.execute("INSERT INTO trips (logId, logRow, tripStartId, tripStart, tripEnd, controllerID, firmwareVersion) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (logId, row, t.tripStartId, t.tripStart, t.tripEnd, t.controllerID, t.firmwareVersion))
+                tripId = cur.lastrowid
+
+                # Event specific variables are those set on the event, rather than the class defaults.
+                self.db.executemany(eventSql, ([tripId] + [getattr(ev, col, None) for col in eventColumns] +
+                    [json.dumps({k : v for k, v in ev.__dict__.items() if k not in columnSet}, default=str)] for ev in t.events))
+
+                for name, attr, seriesClass in storeSeries:
+                    series = getattr(t, attr, None)
+                    if (series is not None) and (len(series) > 0):
+                        self.db.executemany("INSERT INTO {0:s} VALUES (?{1:s})".format(name, ", ?" * len(series.columns)),
+                            ((tripId,) + point for point in zip(*series.columns)))
+
+        self.logger.info("Added log file to trip store : {0:s}".format(fileName))
+        return True
+
+    # *******************************************
+    # Find events matching an event query (see tripquery), across all log files in the store.
+    # Only event terms (with conditions) joined by "or" can be run against the store,
+    # optionally with firmware terms joined by "and" to limit them to trips of firmware versions.
+    # Optionally limited to a time range (Unix time) and controller.
+    # Returns list of stored events, in time order.
+    # *******************************************
+    def findEvents(self, query, startTime=None, endTime=None, controllerID=None):
+        where, params = self.querySql(query.root)
+
+        if startTime is not None:
+            where += " AND events.serverTime >= ?"
+            params.append(startTime)
+        if endTime is not None:
+            where += " AND events.serverTime < ?"
+            params.append(endTime)
+        if controllerID is not None:
+            where += " AND logs.controllerID = ?"
+            params.append(controllerID)
+
+        sql = ("SELECT logs.fileName, COALESCE(trips.controllerID, logs.controllerID), COALESCE(trips.firmwareVersion, logs.firmwareVersion), trips.tripStartId, trips.tripStart, events.event, events.serverTime, events.details "
+            "FROM events JOIN trips ON events.tripId = trips.id JOIN logs ON trips.logId = logs.id "
+            "WHERE {0:s} ORDER BY events.serverTime".format(where))
+        return [StoredEvent(*row[:-1], json.loads(row[-1])) for row in self.db.execute(sql, params)]
+
+    # *******************************************
+    # SQL condition for query node.
+    # Returns (SQL, parameters) tuple.
+    # *******************************************
+    def querySql(self, node):
+        if isinstance(node, OrNode):
+            parts = [self.querySql(n) for n in node.nodes]
+            return ("(" + " OR ".join(sql for sql, params in parts) + ")", [p for sql, params in parts for p in params])
+        if isinstance(node, AndNode) and (sum(1 for n in node.nodes if not isinstance(n, FirmwareNode)) <= 1):
+            parts = [self.querySql(n) for n in node.nodes]
+            return ("(" + " AND ".join(sql for sql, params in parts) + ")", [p for sql, params in parts for p in params])
+        if isinstance(node, FirmwareNode):
+            return self.compareSql("trips.firmwareVersion", node.op, node.value, [])
+        if not isinstance(node, EventsNode):
+            raise QueryError("Only event types and conditions, joined by 'or', and firmware can be found in the trip store.")
+
+        terms = []
+        params = []
+        if node.eType is not None:
+            # Unquoted types are not case sensitive; filter event types also match DEBUG events with the type in their details.
+            # Types are looked up in the (not case sensitive) index either way.
+            typeSql = "events.event = ? COLLATE NOCASE"
+            params.append(node.eType)
+            if node.quoted:
+                typeSql = "({0:s} AND events.event = ?)".format(typeSql)
+                params.append(node.eType)
+            if node.isDebugType:
+                typeSql = "({0:s} OR (events.isDebug AND instr(json_extract(events.details, '$.debugInfo'), ?) > 0))".format(typeSql)
+                params.append(node.eType)
+            terms.append(typeSql)
+
+        for field, op, value in node.conditions:
+            if field in eventColumns:
+                fieldSql = 'events."{0:s}"'.format(field)
+            else:
+                # Event specific variable not set on the event has the class default.
+                fieldSql = "COALESCE(json_extract(events.details, '$.{0:s}'), ?)".format(field)
+                params.append(getattr(Event, field))
+
+            sql, params = self.compareSql(fieldSql, op, value, params)
+            terms.append(sql)
+
+        if len(terms) == 0:
+            return ("1", params)
+        return ("(" + " AND ".join(terms) + ")", params)
+
+    # *******************************************
+    # SQL comparison of field with value.
+    # Text is compared ignoring case, as in the query.
+    # Returns (SQL, parameters) tuple; value added to the parameters given.
+    # *******************************************
+    def compareSql(self, fieldSql, op, value, params):
+        if op == "~":
+            sql = "instr(lower(CAST({0:s} AS TEXT)), lower(?)) > 0".format(fieldSql)
+        elif isinstance(value, str):
+            sql = "lower(CAST({0:s} AS TEXT)) {1:s} lower(?)".format(fieldSql, op)
+        else:
+            sql = "{0:s} {1:s} ?".format(fieldSql, op)
+        params.append(value)
+        return (sql, params)
+
+# *******************************************
+# Add log data to the trip store, if enabled.
+# Errors are logged rather than raised, as the store is optional.
+# *******************************************
+def storeLog(config, logger, fileName, logData):
+    if not config.LogParsing["StoreLogs"]:
+        return
+    try:
+        store = TripStore(config, logger, config.LogParsing["StoreFile"])
+        try:
+            # Content hash is known if the log file has just been read (or loaded from the cache).
+            store.addLog(fileName, logData, logData.get("contentHash"))
+        finally:
+            store.close()
+    except Exception as e:
+        logger.warning("Failed to add log file to trip store : {0:s} : {1:s}".format(fileName, str(e)))